@@ -0,0 +1,42 @@
+"""
+Smart File Cleaner.
+
+Импорт пакета дёшев: подгружается только ядро (cleaner.core). Сканер, GUI (PyQt6),
+фоновая служба и удаление импортируются лениво, при первом обращении.
+"""
+from .core import (
+    CACHE_FILE, INDEX_FILE, DAYS_OLD, CACHE_MAX_AGE, SCAN_ROOT, SYSTEM_PATHS,
+    TEMP_KEYWORDS, TRASH_EXT, DirIndex, human, size_to_bytes, load_cache,
+    iter_cache_chunks, save_cache, save_index, load_index, is_system_or_skip,
+    squarify, compute_treemap_layout
+)
+
+# Имя -> модуль, из которого оно подгружается при первом обращении
+_LAZY = {
+    'Scanner': 'scanner',
+    'ScanDaemon': 'daemon',
+    'InotifyWatcher': 'daemon',
+    'ScanThrottle': 'throttle',
+    'delete_paths': 'deletion',
+    'move_to_trash': 'deletion',
+    'restore_from_trash': 'deletion',
+    'purge_trash': 'deletion',
+    'export_results': 'export',
+    'export_records': 'export',
+    'aggregate_reports': 'fleet',
+    'Snapshot': 'snapshot',
+    'SnapshotDirIndex': 'snapshot',
+    'ResultSet': 'results',
+    'compress_paths': 'compress',
+    'build_plan': 'policy',
+    'execute_plan': 'policy',
+    'CleanerApp': 'gui',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        module = importlib.import_module(f'.{_LAZY[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,338 @@
+"""
+Точка входа: python -m cleaner [--daemon] [--processes N] [--purge-trash [ДНЕЙ]]
+                               [--throttle [OPS/С]] [--throttle-bytes БАЙТ/С] [--idle]
+                               [--export ФАЙЛ [--scan] [--dirs] [--diff]]
+                               [--diff [--dirs] [--top N]]
+                               [--fleet ПАПКА [--top N] [--json ФАЙЛ]]
+                               [--policy [ФАЙЛ] [--dry-run] [--plan ФАЙЛ]]
+                               [--compress ПУТЬ... [--codec gzip|xz|zstd] [--level N]]
+
+Режимы (--daemon, --purge-trash, --export, --diff, --fleet, --policy, --compress) взаимоисключающие,
+кроме --daemon --policy и --export --diff.
+"""
+import sys
+import logging
+
+# Опции командной строки: имя -> сколько значений за ней следует (0 - флаг, 1 - обязательное
+# значение, '?' - необязательное, '*' - список до следующей опции)
+_OPTIONS = {
+    '--daemon': 0, '--processes': 1, '--purge-trash': '?',
+    '--throttle': '?', '--throttle-bytes': 1, '--idle': 0,
+    '--export': 1, '--scan': 0, '--dirs': 0, '--diff': 0, '--top': 1,
+    '--fleet': 1, '--json': 1,
+    '--policy': '?', '--dry-run': 0, '--plan': 1,
+    '--compress': '*', '--codec': 1, '--level': 1,
+}
+# Числовые опции: имя -> наименьшее допустимое значение
+_NUMERIC = {
+    '--processes': 0, '--purge-trash': 0, '--throttle': 0, '--throttle-bytes': 0, '--top': 1, '--level': 1,
+}
+# Режимы работы: в одном запуске - только один; сочетания (режим, уточняющая опция) допустимы
+_MODES = ('--daemon', '--purge-trash', '--export', '--diff', '--fleet', '--policy', '--compress')
+_MODE_COMBINATIONS = {('--daemon', '--policy'), ('--export', '--diff')}
+
+
+def _check_args(args):
+    """
+    Ошибка в командной строке (неизвестная опция, лишний аргумент, опция без значения,
+    нечисловое значение, несовместимые режимы) или None. Опечатка не должна молча
+    игнорироваться: "--dry-rn" иначе выполнил бы политики по-настоящему.
+    """
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        arity = _OPTIONS.get(arg)
+        if arity is None:
+            return f"неизвестная опция {arg}" if arg.startswith('-') else f"лишний аргумент {arg}"
+        i += 1
+        value = None
+        if arity == 1:
+            if i >= len(args) or args[i].startswith('--'):
+                return f"опции {arg} нужно значение"
+            value = args[i]
+            i += 1
+        elif arity == '?':
+            if i < len(args) and not args[i].startswith('--'):
+                value = args[i]
+                i += 1
+        elif arity == '*':
+            while i < len(args) and not args[i].startswith('--'):
+                i += 1
+        if value is not None and arg in _NUMERIC:
+            error = _number_error(arg, value)
+            if error:
+                return error
+
+    modes = [mode for mode in _MODES if mode in args]
+    modes = [mode for mode in modes if not any((other, mode) in _MODE_COMBINATIONS for other in modes)]
+    if len(modes) > 1:
+        return f"опции {' и '.join(modes)} несовместимы"
+    return None
+
+
+def _number_error(name, value):
+    """Ошибка в значении числовой опции или None."""
+    try:
+        number = int(value)
+    except ValueError:
+        return f"значение {name} должно быть целым числом, а не {value!r}"
+    if number < _NUMERIC[name]:
+        return f"значение {name} должно быть не меньше {_NUMERIC[name]}"
+    return None
+
+
+def _option(name, default=None):
+    """Значение опции вида '--name N' из командной строки."""
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return default
+
+
+def _int_option(name, default=None):
+    """Значение числовой опции (уже проверено _check_args) или default, если значения нет."""
+    value = _option(name)
+    if value is None or value.startswith('--'):
+        return default
+    return int(value)
+
+
+def _export(path, processes, throttle):
+    """
+    Экспорт отчёта без GUI: из кэша или после нового сканирования (--scan), --dirs - с агрегатами
+    папок, --diff - с изменениями с прошлого сканирования.
+    """
+    if not path:
+        logging.error("Укажите файл: --export отчёт.jsonl[.gz] | .csv[.gz] | .parquet")
+        return 2
+
+    with_dirs = '--dirs' in sys.argv
+    try:
+        if '--scan' in sys.argv:
+            _export_fresh_scan(path, with_dirs, processes, throttle)
+        else:
+            _export_cache(path, with_dirs)
+    except (ValueError, RuntimeError) as e:
+        logging.error(f"Экспорт невозможен: {e}")
+        return 2
+    return 0
+
+
+def _export_fresh_scan(path, with_dirs, processes, throttle):
+    from .core import DAYS_OLD, save_cache, save_index
+    from .export import export_records, iter_item_records, iter_dir_records
+    from .scanner import Scanner
+
+    scanner = Scanner(DAYS_OLD, on_progress=logging.info, processes=processes, throttle=throttle)
+    items = scanner.run_scan()
+    completed = scanner.dir_index is not None
+    save_cache(items, retain=completed)
+    if completed:
+        save_index(scanner.dir_index, retain=True)
+
+    def records():
+        yield from iter_item_records(items)
+        if with_dirs and completed:
+            yield from iter_dir_records(scanner.dir_index, scan_time=scanner.scan_time)
+        yield from _delta_records(with_dirs)
+
+    export_records(records(), path)
+
+
+def _export_cache(path, with_dirs):
+    from .core import load_index
+    from .export import export_records, iter_cache_records, iter_dir_records
+
+    def records():
+        yield from iter_cache_records()
+        index = load_index() if with_dirs else None
+        if index is not None:
+            yield from iter_dir_records(index)
+        yield from _delta_records(with_dirs)
+
+    export_records(records(), path)
+
+
+def _delta_records(with_dirs):
+    """Записи изменений между двумя последними сканированиями (если задан --diff)."""
+    if '--diff' not in sys.argv:
+        return
+    from .export import iter_latest_delta_records
+    yield from iter_latest_delta_records(('items', 'dirs') if with_dirs else ('items',))
+
+
+def _diff():
+    """Что выросло или появилось с прошлого сканирования (--dirs - по агрегатам папок)."""
+    from .core import DIFF_TOP
+    from .diff import latest_pair, compare_files, format_diff
+
+    pair = latest_pair('dirs' if '--dirs' in sys.argv else 'items')
+    if pair is None:
+        logging.error("Нужно хотя бы два сохранённых сканирования")
+        return 1
+    print(format_diff(compare_files(*pair, top=_int_option('--top', DIFF_TOP))))
+    return 0
+
+
+def _compress(processes):
+    """Сжатие старых файлов и папок на месте вместо удаления; экономия по каждому элементу."""
+    from .core import human
+    from .compress import compress_paths
+
+    i = sys.argv.index('--compress') + 1
+    paths = []
+    while i < len(sys.argv) and not sys.argv[i].startswith('--'):
+        paths.append(sys.argv[i])
+        i += 1
+    if not paths:
+        logging.error("Укажите файлы или папки: --compress ПУТЬ...")
+        return 2
+
+    try:
+        report = compress_paths(paths, codec=_option('--codec'), level=_int_option('--level'), processes=processes)
+    except ValueError as e:
+        logging.error(str(e))
+        return 2
+
+    for path, (files, before, after, errors) in report.items():
+        line = f"{human(before - after):>11}  {files:>6} файлов  {path}"
+        print(line + (f"  (ошибок: {errors})" if errors else ""))
+    return 1 if any(entry[3] for entry in report.values()) else 0
+
+
+def _fleet(directory, processes):
+    """Сводка по отчётам многих машин из одной папки."""
+    import os
+    import json
+    from .fleet import find_reports, aggregate_reports, format_summary, summary_to_dict
+
+    if not directory or not os.path.isdir(directory):
+        logging.error("Укажите папку с отчётами: --fleet ПАПКА")
+        return 2
+    reports = find_reports(directory)
+    if not reports:
+        logging.error(f"В папке {directory} нет отчётов")
+        return 1
+
+    top = _int_option('--top', 20)
+    summary = aggregate_reports(reports, processes)
+    print(format_summary(summary, top))
+
+    json_path = _option('--json')
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(summary_to_dict(summary, top), f, ensure_ascii=False, indent=2)
+    return 0
+
+
+def _policy_path():
+    from .core import POLICY_FILE
+    path = _option('--policy')
+    return path if path and not path.startswith('--') else POLICY_FILE
+
+
+def _run_policies():
+    """Очистка по политикам: план по тёплому индексу; --dry-run - только показать план."""
+    import json
+    from .core import load_index
+    from .policy import load_policies, build_plan, format_plan, execute_plan
+
+    try:
+        policies = load_policies(_policy_path())
+    except (ValueError, OSError) as e:
+        logging.error(f"Ошибка в файле политик: {e}")
+        return 2
+    if not policies:
+        logging.error(f"Нет политик в {_policy_path()}")
+        return 1
+
+    plan = build_plan(policies, load_index())
+    print(format_plan(plan))
+
+    plan_path = _option('--plan')
+    if plan_path:
+        with open(plan_path, 'w', encoding='utf-8') as f:
+            json.dump(plan, f, ensure_ascii=False, indent=2)
+
+    if '--dry-run' in sys.argv:
+        return 0
+    _, _, _, failed_paths = execute_plan(plan)
+    return 1 if failed_paths else 0
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    error = _check_args(sys.argv[1:])
+    if error:
+        logging.error(f"Ошибка в командной строке: {error}")
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+
+    # --processes N: многопроцессное сканирование (0 - по числу ядер)
+    processes = _int_option('--processes')
+
+    # Щадящий режим: --throttle [OPS/С], --throttle-bytes БАЙТ/С, --idle (только при простое системы)
+    throttle = None
+    if any(opt in sys.argv for opt in ('--throttle', '--throttle-bytes', '--idle')):
+        from .core import SCAN_OPS_PER_SEC, SCAN_BYTES_PER_SEC
+        from .throttle import ScanThrottle
+
+        throttle = ScanThrottle(
+            ops_per_sec=_int_option('--throttle', SCAN_OPS_PER_SEC),
+            bytes_per_sec=_int_option('--throttle-bytes', SCAN_BYTES_PER_SEC),
+            idle_only='--idle' in sys.argv,
+        )
+
+    if '--purge-trash' in sys.argv:
+        # Очистка корзины от записей старше срока хранения (для cron/таймера)
+        from .core import TRASH_RETENTION_DAYS
+        from .deletion import purge_trash
+
+        _, failed_paths = purge_trash(_int_option('--purge-trash', TRASH_RETENTION_DAYS))
+        return 1 if failed_paths else 0
+
+    if '--policy' in sys.argv and '--daemon' not in sys.argv:
+        return _run_policies()
+
+    if '--compress' in sys.argv:
+        return _compress(processes)
+
+    if '--fleet' in sys.argv:
+        return _fleet(_option('--fleet'), processes)
+
+    if '--export' in sys.argv:
+        return _export(_option('--export'), processes, throttle)
+
+    if '--diff' in sys.argv:
+        return _diff()
+
+    if '--daemon' in sys.argv:
+        # Фоновая служба без GUI: держит кэш и индекс тёплыми
+        from .core import DAYS_OLD
+        from .daemon import ScanDaemon
+
+        # --policy [ФАЙЛ]: служба выполняет политики после каждого полного сканирования
+        policies = None
+        if '--policy' in sys.argv:
+            from .policy import load_policies
+            try:
+                policies = load_policies(_policy_path())
+            except (ValueError, OSError) as e:
+                logging.error(f"Ошибка в файле политик: {e}")
+                return 2
+
+        daemon = ScanDaemon(DAYS_OLD, processes=processes, throttle=throttle, policies=policies)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            daemon.stop()
+        return 0
+
+    from .gui import main as gui_main
+    return gui_main(processes, throttle)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Бенчмарк времени импорта ядра: python -m cleaner.bench_startup [повторов]
+
+Каждый замер - в новом процессе интерпретатора (холодный импорт без sys.modules).
+Код возврата 1, если медиана превышает IMPORT_BUDGET_MS или ядро подтянуло
+тяжёлые модули (Qt, shutil, ctypes...), которые должны импортироваться лениво.
+"""
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+IMPORT_BUDGET_MS = 50
+HEAVY_MODULES = ['PyQt6', 'shutil', 'ctypes', 'getpass', 'cleaner.gui', 'cleaner.scanner', 'cleaner.deletion']
+
+_PROBE = """
+import sys, time, json
+t = time.perf_counter()
+import cleaner
+elapsed = (time.perf_counter() - t) * 1000
+print(json.dumps({'ms': elapsed, 'heavy': [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_once():
+    """Один холодный импорт пакета в отдельном процессе: (миллисекунды, тяжёлые модули)."""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=project_root)
+    out = subprocess.run([sys.executable, '-c', _PROBE], env=env, capture_output=True, text=True, check=True)
+    data = json.loads(out.stdout)
+    return data['ms'], data['heavy']
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    repeats = int(argv[0]) if argv else 15
+
+    timings = []
+    heavy = set()
+    for _ in range(repeats):
+        ms, loaded = measure_once()
+        timings.append(ms)
+        heavy.update(loaded)
+
+    median = statistics.median(timings)
+    print(f"Импорт cleaner: медиана {median:.1f} ms, мин {min(timings):.1f} ms, "
+          f"макс {max(timings):.1f} ms ({repeats} замеров), бюджет {IMPORT_BUDGET_MS} ms")
+
+    ok = True
+    if heavy:
+        print(f"ОШИБКА: при импорте ядра загружены тяжёлые модули: {', '.join(sorted(heavy))}")
+        ok = False
+    if median > IMPORT_BUDGET_MS:
+        print("ОШИБКА: превышен бюджет времени импорта")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
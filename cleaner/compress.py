@@ -0,0 +1,275 @@
+"""
+Сжатие старых файлов на месте - мягкая альтернатива удалению для холодных данных.
+
+Каждый файл сжимается потоково, кусками по COMPRESS_CHUNK_SIZE (файл целиком в память
+не читается), во временный файл рядом с оригиналом. Затем архив проверяется: он
+распаковывается потоком, и контрольная сумма сравнивается с оригиналом. Только после
+этого архив атомарно получает своё имя (файл.gz / .xz / .zst), а оригинал удаляется.
+Архив и переименование сбрасываются на диск (fsync) до удаления оригинала, так что
+после сбоя питания остаётся хотя бы одна целая копия.
+Папки сжимаются пофайлово. Файлы раздаются по процессам, поэтому сжатие
+масштабируется по ядрам. Аварийно завершившийся процесс не прерывает сжатие: его
+файлы считаются ошибками, остальные сжимает новый пул.
+
+Кодеки: gzip и xz (lzma) из стандартной библиотеки; zstd - если доступен модуль
+compression.zstd (Python 3.14+) или пакет zstandard.
+"""
+import os
+import gzip
+import lzma
+import shutil
+import hashlib
+import logging
+
+from .core import (
+    COMPRESS_CODEC, COMPRESS_LEVEL, COMPRESS_CHUNK_SIZE, COMPRESS_MIN_SIZE, COMPRESS_SKIP_EXT, human,
+    process_pool_context
+)
+from .stats import allocated_size
+
+EXTENSIONS = {'gzip': '.gz', 'xz': '.xz', 'zstd': '.zst'}
+
+# Итог по файлу: сжат, пропущен (не выгодно / уже сжат / жёсткие ссылки), ошибка
+COMPRESSED = 'compressed'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+
+# === КОДЕКИ ===
+
+def _zstd():
+    """('stdlib' | 'zstandard', модуль) или None, если zstd недоступен."""
+    try:
+        from compression import zstd
+        return 'stdlib', zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return 'zstandard', zstandard
+    except ImportError:
+        return None
+
+
+def available_codecs():
+    """Доступные кодеки в порядке предпочтения по умолчанию."""
+    codecs = ['zstd'] if _zstd() is not None else []
+    return codecs + ['gzip', 'xz']
+
+
+def default_codec():
+    return COMPRESS_CODEC or available_codecs()[0]
+
+
+def _open_writer(codec, raw, level):
+    """Сжимающая обёртка над открытым файлом raw (сам raw она не закрывает)."""
+    if codec == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=level or 6)
+    if codec == 'xz':
+        return lzma.LZMAFile(raw, 'wb', preset=level or 6)
+    if codec == 'zstd':
+        flavour, module = _zstd()
+        if flavour == 'stdlib':
+            return module.ZstdFile(raw, 'wb', level=level or 3)
+        return module.ZstdCompressor(level=level or 3).stream_writer(raw, closefd=False)
+    raise ValueError(f"Неизвестный кодек: {codec}")
+
+
+def _open_reader(codec, path):
+    if codec == 'gzip':
+        return gzip.open(path, 'rb')
+    if codec == 'xz':
+        return lzma.open(path, 'rb')
+    flavour, module = _zstd()
+    if flavour == 'stdlib':
+        return module.open(path, 'rb')
+    return module.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+def _stream(src, dst=None):
+    """Копирует поток кусками; возвращает (sha256, байт). dst=None - только контрольная сумма."""
+    digest = hashlib.sha256()
+    total = 0
+    while True:
+        chunk = src.read(COMPRESS_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        total += len(chunk)
+        if dst is not None:
+            dst.write(chunk)
+    return digest.digest(), total
+
+
+# === ОДИН ФАЙЛ (выполняется в процессе-воркере) ===
+
+def _should_skip(path, st):
+    if not os.path.isfile(path) or os.path.islink(path):
+        return "не обычный файл"
+    if st.st_nlink > 1:
+        return "жёсткие ссылки: место не освободится"
+    if st.st_size < COMPRESS_MIN_SIZE:
+        return "слишком маленький"
+    if os.path.splitext(path)[1].lower() in COMPRESS_SKIP_EXT:
+        return "уже сжат"
+    return None
+
+
+def compress_file(path, codec, level=None):
+    """
+    Сжимает один файл на месте. Возвращает (итог, путь архива, занято до, занято после, причина).
+    Архив, который не меньше оригинала, отбрасывается - оригинал остаётся.
+    """
+    target = path + EXTENSIONS[codec]
+    directory, name = os.path.split(target)
+    tmp_path = os.path.join(directory, f".{name}.tmp{os.getpid()}")
+    created = False
+    try:
+        st = os.lstat(path)
+        reason = _should_skip(path, st)
+        if reason:
+            return SKIPPED, None, 0, 0, reason
+        if os.path.lexists(target):
+            return SKIPPED, None, 0, 0, f"{target} уже существует"
+
+        # Временный архив доступен только владельцу, пока на него не перенесены права оригинала;
+        # O_EXCL не даёт писать в оставшийся или подложенный файл с тем же именем
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o600)
+        created = True
+        with open(path, 'rb') as src, os.fdopen(fd, 'wb') as raw:
+            with _open_writer(codec, raw, level) as dst:
+                source_digest, source_size = _stream(src, dst)
+            # Архив должен быть на диске до удаления оригинала: иначе после сбоя питания
+            # может остаться обрезанный архив и ни одной целой копии
+            raw.flush()
+            os.fsync(raw.fileno())
+
+        # Файл изменился во время сжатия - архив не соответствует ему
+        after = os.lstat(path)
+        if (after.st_size, after.st_mtime_ns) != (st.st_size, st.st_mtime_ns) or source_size != st.st_size:
+            os.remove(tmp_path)
+            return SKIPPED, None, 0, 0, "файл изменился во время сжатия"
+
+        # Проверка: распакованный архив совпадает с оригиналом
+        with _open_reader(codec, tmp_path) as check:
+            if _stream(check) != (source_digest, source_size):
+                os.remove(tmp_path)
+                return FAILED, None, 0, 0, "проверка архива не пройдена"
+
+        before, compressed = allocated_size(st), allocated_size(os.stat(tmp_path))
+        if compressed >= before:
+            os.remove(tmp_path)
+            return SKIPPED, None, 0, 0, "сжатие не уменьшает размер"
+
+        # Права и время оригинала переносятся на архив (по mtime файл остаётся "старым")
+        shutil.copystat(path, tmp_path)
+        if hasattr(os, 'chown'):
+            try:
+                os.chown(tmp_path, st.st_uid, st.st_gid)
+            except OSError:
+                pass
+        os.replace(tmp_path, target)
+        _fsync_dir(directory)  # Переименование тоже должно пережить сбой раньше удаления оригинала
+        os.remove(path)
+        return COMPRESSED, target, before, compressed, None
+    except Exception as e:
+        if created and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return FAILED, None, 0, 0, str(e)
+
+
+def _fsync_dir(directory):
+    """Сбрасывает на диск записи папки (переименования). На Windows папку так не открыть - пропуск."""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _compress_task(task):
+    item, path, codec, level = task
+    return (item, path) + compress_file(path, codec, level)
+
+
+# === МНОЖЕСТВО ЭЛЕМЕНТОВ ===
+
+def _iter_tasks(items, codec, level):
+    """(элемент, файл, кодек, уровень) для каждого файла выбранных файлов и папок."""
+    for item in items:
+        if os.path.isdir(item) and not os.path.islink(item):
+            for dirpath, dirnames, filenames in os.walk(item):
+                for fn in filenames:
+                    yield item, os.path.join(dirpath, fn), codec, level
+        else:
+            yield item, item, codec, level
+
+
+def compress_paths(items, codec=None, level=COMPRESS_LEVEL, processes=None, on_file=None, stop_event=None):
+    """
+    Сжимает выбранные файлы и папки (папки - пофайлово) в processes процессах.
+    on_file(элемент, файл, итог, байт сэкономлено) вызывается по мере готовности.
+    Возвращает {элемент: [сжато файлов, занято до, занято после, ошибок]} - экономия по элементу
+    равна 'до' - 'после'.
+    """
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    from concurrent.futures.process import BrokenProcessPool
+
+    codec = codec or default_codec()
+    if codec not in available_codecs():
+        raise ValueError(f"Кодек {codec} недоступен (доступны: {', '.join(available_codecs())})")
+    processes = processes or os.cpu_count() or 1
+    report = {item: [0, 0, 0, 0] for item in items}
+
+    def collect(future, task):
+        try:
+            item, path, status, _, before, after, reason = future.result()
+        except Exception as e:
+            # Воркер упал (например, убит при нехватке памяти) - файл не сжат, оригинал на месте
+            item, path, status, before, after = task[0], task[1], FAILED, 0, 0
+            reason = f"процесс сжатия завершился аварийно: {e!r}"
+        entry = report[item]
+        if status == COMPRESSED:
+            entry[0] += 1
+            entry[1] += before
+            entry[2] += after
+        elif status == FAILED:
+            entry[3] += 1
+            logging.error(f"Ошибка сжатия {path}: {reason}")
+        if on_file is not None:
+            on_file(item, path, status, before - after)
+
+    # Окно задач ограничено: в очереди не больше нескольких файлов на процесс, а не все файлы сразу
+    window = processes * 4
+    pool = ProcessPoolExecutor(max_workers=processes, mp_context=process_pool_context())
+    pending = {}  # future -> задача
+    try:
+        for task in _iter_tasks(items, codec, level):
+            if stop_event is not None and stop_event.is_set():
+                break
+            try:
+                future = pool.submit(_compress_task, task)
+            except BrokenProcessPool:
+                # Пул сломан упавшим воркером: отправленные задачи учитываются как ошибки,
+                # остальные файлы сжимает новый пул
+                for broken, broken_task in pending.items():
+                    collect(broken, broken_task)
+                pending = {}
+                pool.shutdown(wait=False)
+                pool = ProcessPoolExecutor(max_workers=processes, mp_context=process_pool_context())
+                future = pool.submit(_compress_task, task)
+            pending[future] = task
+            if len(pending) >= window:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future, pending.pop(future))
+        for future, task in pending.items():
+            collect(future, task)
+    finally:
+        pool.shutdown()
+
+    saved = sum(before - after for _, before, after, _ in report.values())
+    logging.info(f"Сжатие ({codec}): {sum(e[0] for e in report.values())} файлов, сэкономлено {human(saved)}")
+    return report
@@ -0,0 +1,593 @@
+"""Лёгкое ядро: настройки, утилиты, кэш и индекс каталогов. Не импортирует Qt."""
+import os
+import sys
+import json
+import time
+import logging
+import re
+import threading
+from array import array
+
+# === КОНФИГУРАЦИЯ & НАСТРОЙКИ ===
+# Кэш и индекс лежат в корне проекта, рядом с пакетом (как и до разделения на модули)
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FILE = os.path.join(APP_DIR, "cleaner_cache.json")
+DAYS_OLD = 60
+CACHE_MAX_AGE = 7 * 86400  # 7 дней
+INDEX_FILE = os.path.join(APP_DIR, "cleaner_index.json")
+# Бинарные снимки кэша и индекса (snapshot.py): читаются через mmap без разбора JSON
+CACHE_SNAPSHOT_FILE = os.path.join(APP_DIR, "cleaner_cache.snap")
+INDEX_SNAPSHOT_FILE = os.path.join(APP_DIR, "cleaner_index.snap")
+SNAPSHOT_DIR = os.path.join(APP_DIR, "cleaner_snapshots")  # История снимков полных сканирований
+SNAPSHOT_KEEP = 10        # Сколько последних сканирований хранить (для сравнения, см. diff.py)
+DIFF_TOP = 20             # Сколько путей с наибольшим ростом показывать
+SCAN_ROOT = 'C:\\' if sys.platform.startswith('win') else os.path.expanduser('~')
+SCAN_PROCESSES = 1  # 1 - сканирование в одном потоке; N > 1 - N процессов; 0 - по числу ядер
+
+# Щадящий режим сканирования (--throttle, см. throttle.ScanThrottle)
+SCAN_OPS_PER_SEC = 0               # Бюджет stat-операций в секунду (0 - без ограничения)
+SCAN_BYTES_PER_SEC = 0             # Бюджет просмотренного объёма в секунду (0 - без ограничения)
+SCAN_LATENCY_HIGH = 0.002          # Средняя задержка stat (сек), выше которой сканер уступает диск
+SCAN_LATENCY_LOW = 0.0005          # Задержка, ниже которой скорость восстанавливается
+SCAN_IDLE_LOAD = 0.5               # "Простой": load average на ядро не выше
+SCAN_IDLE_IO_PRESSURE = 10.0       # и давление на диск (PSI some avg10, %) не выше
+SCAN_IDLE_CHECK_INTERVAL = 5.0     # Как часто проверять простой (сек)
+
+# Пороги отбора (можно менять в GUI без пересканирования, см. Scanner.reevaluate)
+TRASH_DIR_MIN_SIZE = 1024 * 1024           # Папки-мусор по ключевым словам: > 1 MB
+APPDATA_DIR_MIN_SIZE = 10 * 1024 * 1024    # Подпапки AppData с мусорными файлами: > 10 MB
+MERGE_RATIO = 0.85                         # Доля старых файлов, чтобы предложить папку целиком
+MERGE_RATIO_TEMP = 0.6                     # То же для временных/системных папок
+MIN_ITEM_SIZE = 0                          # Общий минимальный размер элемента в результатах
+
+EXPORT_CHUNK_SIZE = 5000           # Строк в одной пачке при экспорте отчётов
+FLEET_PATTERN_DEPTH = 3            # Глубина шаблонов путей в сводке по парку машин (--fleet)
+FLEET_SORT_CHUNK = 200000          # Записей отчёта в памяти при сортировке (--fleet); остальное - во временных файлах
+
+# Учёт ошибок обхода (см. errors.ScanErrors)
+ERRORS_FILE = os.path.join(APP_DIR, "cleaner_errors.json")
+ERROR_LOG_MAX = 1000                  # Сколько ошибок с путями хранить в журнале
+ERROR_SKIP_TTL = CACHE_MAX_AGE        # Папки без доступа пропускаются 7 дней, затем проверяются снова
+ERROR_RETRY_BASE = 3600               # Первая задержка повтора после сбоя ввода-вывода (сек), далее x2
+ERROR_RETRY_MAX_DELAY = 7 * 86400     # Предел задержки повтора
+ERROR_RETRY_QUEUE_MAX = 1000          # Предел числа известных проблемных папок
+SCAN_RETRY_ATTEMPTS = 4               # Попыток чтения при кратковременной ошибке (EINTR/EAGAIN/EBUSY) в том же скане
+SCAN_RETRY_DELAY = 0.05               # Первая пауза перед повтором в том же скане (сек), далее x2
+
+POLICY_FILE = os.path.join(APP_DIR, "cleaner_policies.json")  # Политики автоочистки (--policy)
+
+# Удаление: по умолчанию в корзину (переименование, можно отменить)
+USE_TRASH = True
+TRASH_RETENTION_DAYS = 30          # Сколько дней хранить удалённое в корзине до окончательной очистки
+# Записи корзины, созданные программой: очищаются только они, а не всё, что пользователь
+# сам удалил в файловом менеджере
+TRASH_LEDGER_FILE = os.path.join(APP_DIR, "cleaner_trash.json")
+TRASH_AUTO_PURGE = False           # Очищать свои записи корзины при запуске GUI и после сканов службы
+
+# Сжатие старых файлов на месте (compress.py) - альтернатива удалению
+COMPRESS_CODEC = None              # 'zstd' / 'gzip' / 'xz'; None - zstd, если доступен, иначе gzip
+COMPRESS_LEVEL = None              # None - уровень кодека по умолчанию
+COMPRESS_CHUNK_SIZE = 1024 * 1024  # Файлы читаются и проверяются кусками, а не целиком
+COMPRESS_MIN_SIZE = 4096           # Меньшие файлы не сжимаются: экономия меньше блока
+# Уже сжатые форматы - повторное сжатие ничего не даст
+COMPRESS_SKIP_EXT = {
+    '.gz', '.tgz', '.xz', '.txz', '.zst', '.bz2', '.lz4', '.zip', '.7z', '.rar', '.jar', '.whl',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.mp3', '.aac', '.ogg', '.flac', '.mp4',
+    '.mkv', '.avi', '.mov', '.webm', '.pdf', '.docx', '.xlsx', '.pptx', '.odt', '.apk', '.deb', '.rpm',
+}
+
+# Фоновая служба (--daemon)
+DAEMON_RESCAN_INTERVAL = 6 * 3600  # Полное пересканирование раз в 6 часов
+DAEMON_COALESCE_DELAY = 2.0        # Сколько копить события перед пересчётом (сек)
+DAEMON_POLL_INTERVAL = 300         # Проверка mtime "холодных" папок без inotify (сек)
+DAEMON_SAVE_INTERVAL = 60          # Как часто сбрасывать тёплый индекс на диск (сек)
+
+# Системные пути, которые всегда исключаются для безопасности.
+# Минимальный список для сканирования C:\
+SYSTEM_PATHS = [
+    r'C:\Windows',
+    r'C:\System Volume Information',
+    r'C:\Program Files',
+    r'C:\Program Files (x86)',
+    r'C:\ProgramData',
+    r'C:\$Recycle.Bin'
+] if sys.platform.startswith('win') else [
+    '/bin','/etc','/usr','/lib','/lib64','/boot','/dev','/proc','/sys','/var','/opt','/root','/sbin'
+]
+
+# Ключевые слова для быстрого поиска мусорных папок с присвоением категории
+TEMP_KEYWORDS = {
+    'cache': '[Кэш]',
+    '.cache': '[Кэш]',
+    'temp': '[Временные]',
+    'tmp': '[Временные]',
+    'log': '[Логи]',
+    'logs': '[Логи]',
+    'roaming': '[Roaming]',
+    'local': '[Local]',
+    'locallow': '[LocalLow]',
+    'site-packages': '[Python Кэш]',
+    '__pycache__': '[Python Кэш]',
+    '.npm': '[NPM Кэш]',
+    'vendor': '[Вендор]', # Общая категория для временных библиотек
+    '.venv': '[Вирт. Среда]',
+    'venv': '[Вирт. Среда]',
+}
+
+# Расширения для быстрого поиска мусорных файлов
+TRASH_EXT = {
+    '.log', '.tmp', '.temp', '.bak', '.old', '.cache', '.junk',
+    '.dmp', '.err', '.dump', '.swp', '.obj', '.o', '.pyc', '.class'
+}
+
+# === УТИЛИТЫ ===
+
+def human(size):
+    """Преобразование байтов в читаемый формат (GB, MB, KB и т.д.)"""
+    # Используем KiB/MiB/GiB для совместимости со скриншотами
+    for unit in ['B', 'KiB', 'MiB', 'GiB', 'TiB']:
+        if abs(size) < 1024:
+            # Используем rjust для выравнивания, если необходимо, но для простоты убираем
+            return f"{size:,.1f} {unit}".replace(',', ' ')
+        size /= 1024
+    return f"{size:,.1f} PiB".replace(',', ' ')
+
+def size_to_bytes(human_size_str):
+    """
+    Преобразование читаемого формата (например, "1.2 GiB") обратно в байты для сортировки.
+    Улучшено для надежного парсинга.
+    """
+    if not isinstance(human_size_str, str):
+        return 0
+    
+    human_size_str = human_size_str.strip().replace(',', '.')
+    
+    # Регулярное выражение для поиска числа и единиц (например, 1.2, GiB)
+    match = re.match(r"(\d+(\.\d+)?)\s*([KMGTPE]i?B)", human_size_str, re.IGNORECASE)
+    
+    if not match:
+        # Проверка на просто "B" (например, "820.0 B")
+        if human_size_str.endswith('B') and len(human_size_str.split()) == 2:
+            try:
+                size_str, _ = human_size_str.split()
+                return int(float(size_str))
+            except:
+                return 0
+        return 0
+        
+    size = float(match.group(1))
+    unit_str = match.group(3).upper().replace('IB', '').replace('B', '') # MIB -> M, GB -> G
+
+    units = {'K': 1024, 'M': 1024**2, 'G': 1024**3, 'T': 1024**4, 'P': 1024**5}
+    
+    multiplier = units.get(unit_str, 1)
+    
+    return int(size * multiplier)
+
+
+def load_cache():
+    """Загрузка данных из кэша"""
+    if not os.path.exists(CACHE_FILE):
+        return {}
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        found_items = {}
+        now = time.time()
+
+        for path, info in data.items():
+            last_scan = info.get('last_scan', 0)
+            # Проверка актуальности кэша и существования файла
+            if now - last_scan <= CACHE_MAX_AGE and os.path.exists(path):
+                found_items[path] = info
+
+        logging.info(f"Кэш загружен: {len(found_items)} элементов")
+        return found_items
+    except Exception as e:
+        logging.error(f"Ошибка загрузки кэша: {e}")
+        return {}
+
+def iter_cache_chunks(chunk_size=5000):
+    """
+    Потоковая выдача кэша пачками (dict путь -> info) без проверки существования путей.
+    Проверка выполняется отдельно и лениво (см. CleanerApp._start_cache_validation).
+    Если есть свежий бинарный снимок, пачки читаются из него по убыванию размера:
+    первая пачка готова без разбора остального кэша.
+    """
+    from .snapshot import open_snapshot
+    snapshot = open_snapshot(CACHE_SNAPSHOT_FILE, CACHE_FILE)
+    if snapshot is not None:
+        with snapshot:
+            yield from snapshot.chunks(chunk_size, CACHE_MAX_AGE)
+        return
+
+    if not os.path.exists(CACHE_FILE):
+        return
+    with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    now = time.time()
+    chunk = {}
+    for path, info in data.items():
+        if now - info.get('last_scan', 0) <= CACHE_MAX_AGE:
+            chunk[path] = info
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = {}
+    if chunk:
+        yield chunk
+
+def save_cache(items, retain=False):
+    """Сохранение данных в кэш. retain - сохранить снимок в истории сканирований (SNAPSHOT_DIR)."""
+    try:
+        cache_data = {}
+        current_time = time.time()
+        for path, info in items.items():
+            cache_data[path] = {
+                'type': info['type'],
+                'size': info['size'],
+                'apparent_size': info.get('apparent_size', info['size']),
+                'count': info.get('count', 1),
+                'category': info.get('category', 'Неизвестно'),
+                'last_scan': current_time
+            }
+        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+
+        from .snapshot import write_items_snapshot, retain_snapshot
+        write_items_snapshot(cache_data, CACHE_SNAPSHOT_FILE)
+        if retain:
+            retain_snapshot(CACHE_SNAPSHOT_FILE, SNAPSHOT_DIR, 'items', SNAPSHOT_KEEP)
+        logging.info("Кэш сохранён")
+    except Exception as e:
+        logging.error(f"Ошибка сохранения кэша: {e}")
+
+def save_index(index, retain=False):
+    """
+    Сохранение индекса каталогов (тёплый индекс для GUI). Запись атомарная.
+    retain - сохранить снимок в истории сканирований (SNAPSHOT_DIR).
+    """
+    try:
+        live = [i for i in range(len(index)) if index.paths[i] in index.ids]
+        data = {
+            'saved': time.time(),
+            'paths': [index.paths[i] for i in live],
+            'own': [index.own_sizes[i] for i in live],
+            'total': [index.total_sizes[i] for i in live],
+        }
+        # Имя с pid: GUI и фоновая служба могут сохранять индекс одновременно
+        directory, name = os.path.split(INDEX_FILE)
+        tmp_file = os.path.join(directory, f".{name}.tmp{os.getpid()}")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, INDEX_FILE)
+
+        from .snapshot import write_dirs_snapshot, retain_snapshot
+        write_dirs_snapshot(index, INDEX_SNAPSHOT_FILE)
+        if retain:
+            retain_snapshot(INDEX_SNAPSHOT_FILE, SNAPSHOT_DIR, 'dirs', SNAPSHOT_KEEP)
+        logging.info(f"Индекс сохранён: {len(live)} папок")
+    except Exception as e:
+        logging.error(f"Ошибка сохранения индекса: {e}")
+
+def load_index():
+    """
+    Загрузка индекса каталогов, если он не старше CACHE_MAX_AGE. Из снимка индекс не строится:
+    возвращается SnapshotDirIndex, который читает папки из mmap по мере просмотра.
+    """
+    from .snapshot import open_snapshot, SnapshotDirIndex, KIND_DIRS
+    snapshot = open_snapshot(INDEX_SNAPSHOT_FILE, INDEX_FILE)
+    if snapshot is not None:
+        if snapshot.kind != KIND_DIRS or time.time() - snapshot.created > CACHE_MAX_AGE:
+            snapshot.close()
+            return None
+        index = SnapshotDirIndex(snapshot)
+        logging.info(f"Индекс открыт из снимка: {len(index)} папок")
+        return index
+
+    if not os.path.exists(INDEX_FILE):
+        return None
+    try:
+        with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if time.time() - data.get('saved', 0) > CACHE_MAX_AGE:
+            return None
+        index = DirIndex.from_entries(zip(data['paths'], data['own'], data['total']))
+        logging.info(f"Индекс загружен: {len(index)} папок")
+        return index
+    except Exception as e:
+        logging.error(f"Ошибка загрузки индекса: {e}")
+        return None
+
+def is_system_or_skip(path):
+    """Проверка пути на принадлежность к системным или исключенным"""
+    try:
+        abs_path = os.path.normcase(os.path.abspath(path))
+    except:
+        return True # Недоступный путь
+
+    return any(abs_path.startswith(os.path.normcase(os.path.abspath(s))) for s in SYSTEM_PATHS)
+
+def process_pool_context():
+    """
+    Контекст multiprocessing для пулов процессов. fork в многопоточном процессе (GUI на Qt,
+    фоновые потоки) небезопасен, поэтому воркеры запускаются через forkserver, а где его
+    нет (Windows, macOS без него) - через spawn.
+    """
+    import multiprocessing
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+# Номер системного вызова ioprio_set по архитектурам Linux
+_IOPRIO_SET_SYSCALL = {'x86_64': 251, 'i386': 289, 'i686': 289, 'aarch64': 30, 'armv7l': 314}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+
+def lower_thread_priority():
+    """
+    Понижает приоритет текущего потока: nice 19 и класс ввода-вывода idle (как `ionice -c3`).
+    На Linux приоритеты задаются для отдельного потока, поэтому GUI и остальные потоки не затрагиваются.
+    Возвращает True, если удалось понизить приоритет ввода-вывода.
+    """
+    if not sys.platform.startswith('linux'):
+        return False
+    import ctypes
+    import platform
+    import threading
+
+    tid = threading.get_native_id()
+    try:
+        os.setpriority(os.PRIO_PROCESS, tid, 19)
+    except OSError as e:
+        logging.debug(f"Не удалось понизить nice потока: {e}")
+
+    syscall_nr = _IOPRIO_SET_SYSCALL.get(platform.machine())
+    if syscall_nr is None:
+        return False
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.syscall(syscall_nr, _IOPRIO_WHO_PROCESS, tid, _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT) != 0:
+        logging.debug(f"ioprio_set не удался: {os.strerror(ctypes.get_errno())}")
+        return False
+    return True
+
+# === ИНДЕКС КАТАЛОГОВ (Карта диска) ===
+
+class DirIndex:
+    """
+    Компактный индекс размеров каталогов, построенный из дерева сканирования.
+    Каталоги пронумерованы, размеры хранятся в массивах. Дети сортируются по размеру сразу
+    при построении; после изменений (фоновая служба) узел пересортировывается при следующем
+    запросе под блокировкой, в новый список: индекс читают одновременно поток GUI и поток
+    раскладки карты, и выданный ранее список не меняется у них в руках.
+    """
+
+    def __init__(self):
+        self.paths = []                 # id -> полный путь
+        self.ids = {}                   # полный путь -> id
+        self.parents = array('i')       # id -> id родителя (-1 для корня)
+        self.own_sizes = array('q')     # размер файлов непосредственно в папке
+        self.total_sizes = array('q')   # размер папки вместе с подпапками
+        self.children = []              # id -> список id подпапок
+        self.roots = []
+        self._unsorted = set()          # id, чей порядок детей устарел после изменений размеров
+        self._lock = threading.Lock()   # изменения индекса и пересортировка детей
+
+    def __len__(self):
+        return len(self.paths)
+
+    @classmethod
+    def from_tree(cls, tree):
+        """Строит индекс из дерева, которое возвращает Scanner._build_old_tree."""
+        return cls.from_entries(
+            (path, node['real_size'], node['total_real_size']) for path, node in tree.items()
+        )
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Строит индекс из последовательности (путь, свой размер, полный размер)."""
+        index = cls()
+        for path, own_size, total_size in entries:
+            index.ids[path] = len(index.paths)
+            index.paths.append(path)
+            index.own_sizes.append(own_size)
+            index.total_sizes.append(total_size)
+            index.children.append([])
+
+        index.parents = array('i', [-1]) * len(index.paths)
+        for i, path in enumerate(index.paths):
+            parent = index.ids.get(os.path.dirname(path), -1)
+            if parent == i:
+                parent = -1 # Корень диска: dirname('C:\\') == 'C:\\'
+            index.parents[i] = parent
+            if parent == -1:
+                index.roots.append(i)
+            else:
+                index.children[parent].append(i)
+
+        by_size = index.total_sizes.__getitem__
+        for kids in index.children:
+            kids.sort(key=by_size, reverse=True)
+        index.roots.sort(key=by_size, reverse=True)
+        return index
+
+    def name_of(self, node_id):
+        """Короткое имя папки для отображения."""
+        path = self.paths[node_id]
+        return os.path.basename(path) or path
+
+    def live_entries(self):
+        """(путь, свой размер, полный размер) папок, которые не удалены из индекса."""
+        for i, path in enumerate(self.paths):
+            if path in self.ids:
+                yield path, self.own_sizes[i], self.total_sizes[i]
+
+    def children_of(self, node_id):
+        """Подпапки, отсортированные по убыванию размера. Возвращённый список не изменяется."""
+        with self._lock:
+            if node_id in self._unsorted:
+                self.children[node_id] = sorted(self.children[node_id], key=self.total_sizes.__getitem__, reverse=True)
+                self._unsorted.discard(node_id)
+            return self.children[node_id]
+
+    # --- Инкрементальные обновления (фоновая служба) ---
+
+    def add_dir(self, path, own_size=0):
+        """Добавляет новую папку; её размер учитывается во всех предках."""
+        with self._lock:
+            if path in self.ids:
+                return self.ids[path]
+            node_id = len(self.paths)
+            parent = self.ids.get(os.path.dirname(path), -1)
+            self.ids[path] = node_id
+            self.paths.append(path)
+            self.parents.append(parent)
+            self.own_sizes.append(0)
+            self.total_sizes.append(0)
+            self.children.append([])
+            if parent == -1:
+                self.roots = self.roots + [node_id]
+            else:
+                self.children[parent] = self.children[parent] + [node_id]
+                self._unsorted.add(parent)
+        self.set_own_size(path, own_size)
+        return node_id
+
+    def set_own_size(self, path, size):
+        """Обновляет размер файлов папки и проталкивает разницу только вверх по предкам."""
+        with self._lock:
+            node_id = self.ids.get(path)
+            if node_id is None:
+                return
+            delta = size - self.own_sizes[node_id]
+            if delta == 0:
+                return
+            self.own_sizes[node_id] = size
+            while node_id != -1:
+                self.total_sizes[node_id] += delta
+                node_id = self.parents[node_id]
+                # Порядок детей у предка мог измениться
+                if node_id != -1:
+                    self._unsorted.add(node_id)
+
+    def remove_dir(self, path):
+        """Удаляет папку вместе с подпапками. Номера не переиспользуются (запись остаётся пустой)."""
+        with self._lock:
+            node_id = self.ids.get(path)
+            if node_id is None:
+                return
+            total = self.total_sizes[node_id]
+            parent = self.parents[node_id]
+            if parent == -1:
+                self.roots = [i for i in self.roots if i != node_id]
+            else:
+                self.children[parent] = [i for i in self.children[parent] if i != node_id]
+
+            # Вычитаем размер из предков
+            up = parent
+            while up != -1:
+                self.total_sizes[up] -= total
+                self._unsorted.add(up)
+                up = self.parents[up]
+
+            # Стираем поддерево
+            stack = [node_id]
+            while stack:
+                i = stack.pop()
+                stack.extend(self.children[i])
+                self.ids.pop(self.paths[i], None)
+                self.children[i] = []
+                self.own_sizes[i] = 0
+                self.total_sizes[i] = 0
+                self.parents[i] = -1
+                self._unsorted.discard(i)
+
+
+def squarify(sizes, x, y, w, h):
+    """
+    Раскладка squarified treemap (Bruls et al.).
+    sizes должны быть положительными и отсортированными по убыванию.
+    Возвращает список прямоугольников (x, y, w, h) в том же порядке.
+    """
+    rects = []
+    total = sum(sizes)
+    if total <= 0 or w <= 0 or h <= 0:
+        return rects
+
+    scale = w * h / total
+    areas = [s * scale for s in sizes]
+    i, n = 0, len(areas)
+
+    while i < n:
+        short = min(w, h)
+        # Набираем строку, пока худшее соотношение сторон не начнёт расти
+        row_sum = row_min = row_max = areas[i]
+        worst = _worst_ratio(row_sum, row_min, row_max, short)
+        j = i + 1
+        while j < n:
+            a = areas[j]
+            new_worst = _worst_ratio(row_sum + a, min(row_min, a), max(row_max, a), short)
+            if new_worst > worst:
+                break
+            row_sum += a
+            row_min = min(row_min, a)
+            row_max = max(row_max, a)
+            worst = new_worst
+            j += 1
+
+        if w >= h:
+            # Столбец у левого края
+            col_w = row_sum / h
+            cy = y
+            for a in areas[i:j]:
+                rh = a / col_w
+                rects.append((x, cy, col_w, rh))
+                cy += rh
+            x += col_w
+            w -= col_w
+        else:
+            # Строка у верхнего края
+            row_h = row_sum / w
+            cx = x
+            for a in areas[i:j]:
+                rw = a / row_h
+                rects.append((cx, y, rw, row_h))
+                cx += rw
+            y += row_h
+            h -= row_h
+        i = j
+
+    return rects
+
+def _worst_ratio(row_sum, row_min, row_max, short):
+    """Худшее соотношение сторон в строке treemap."""
+    if row_min <= 0 or short <= 0:
+        return float('inf')
+    s2 = row_sum * row_sum
+    w2 = short * short
+    return max(w2 * row_max / s2, s2 / (w2 * row_min))
+
+def compute_treemap_layout(index, node_id, width, height, max_items=300):
+    """
+    Раскладка одного (видимого) уровня карты: только прямые подпапки node_id.
+    Мелкие подпапки и файлы самой папки сворачиваются в отдельные плитки (id = -1).
+    Возвращает список (id, подпись, размер, (x, y, w, h)).
+    """
+    entries = []
+    kids = index.children_of(node_id)
+    for kid in kids[:max_items]:
+        size = index.total_sizes[kid]
+        if size <= 0:
+            break
+        entries.append((kid, index.name_of(kid), size))
+
+    rest = sum(index.total_sizes[k] for k in kids[max_items:])
+    if rest > 0:
+        entries.append((-1, f"Прочее ({len(kids) - max_items} папок)", rest))
+    if index.own_sizes[node_id] > 0:
+        entries.append((-1, "Файлы в папке", index.own_sizes[node_id]))
+
+    entries.sort(key=lambda e: e[2], reverse=True)
+    rects = squarify([e[2] for e in entries], 0, 0, width, height)
+    return [(e[0], e[1], e[2], r) for e, r in zip(entries, rects)]
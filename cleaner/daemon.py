@@ -0,0 +1,424 @@
+"""
+Фоновая служба (--daemon): inotify на Linux, опрос как запасной вариант.
+
+По событиям обновляются тёплый индекс папок и кэш результатов (его читают GUI и --export):
+файлы-элементы в изменённых папках перечитываются, размеры папок-элементов берутся из индекса.
+Новые элементы (файлы, ставшие старыми, новый мусор) и число файлов/видимый размер папок-элементов
+обновляются только при полном сканировании раз в DAEMON_RESCAN_INTERVAL.
+
+Папки без наблюдения inotify ("холодные") опрашиваются раз в DAEMON_POLL_INTERVAL: сравниваются
+mtime папки и размеры/mtime её файлов (один scandir со stat на папку), так что виден и рост файла
+внутри папки, mtime которой не меняется.
+"""
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import logging
+import threading
+
+from .core import (
+    DAYS_OLD, DAEMON_RESCAN_INTERVAL, DAEMON_COALESCE_DELAY, DAEMON_POLL_INTERVAL,
+    DAEMON_SAVE_INTERVAL, TRASH_RETENTION_DAYS, TRASH_AUTO_PURGE, is_system_or_skip, save_cache, save_index
+)
+from .scanner import Scanner
+from .stats import allocated_size
+
+# === ФОНОВАЯ СЛУЖБА (inotify / опрос) ===
+
+class InotifyWatcher:
+    """Минимальная обёртка над inotify (Linux) через ctypes, без сторонних библиотек."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+
+    WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                  IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.wd_to_path = {}
+
+    @staticmethod
+    def available():
+        return sys.platform.startswith('linux')
+
+    def add_watch(self, path):
+        """Ставит наблюдение на папку. ENOSPC означает исчерпание лимита max_user_watches."""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self.wd_to_path[wd] = path
+        return wd
+
+    def read_events(self, timeout):
+        """Ждёт события до timeout секунд. Возвращает список (папка, имя, маска)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(buf):
+            wd, mask, _, name_len = self.EVENT_HEADER.unpack_from(buf, offset)
+            offset += self.EVENT_HEADER.size
+            name = os.fsdecode(buf[offset:offset + name_len].rstrip(b'\0'))
+            offset += name_len
+
+            if mask & self.IN_IGNORED:
+                self.wd_to_path.pop(wd, None)
+                continue
+            dir_path = self.wd_to_path.get(wd)
+            if dir_path is not None or mask & self.IN_Q_OVERFLOW:
+                events.append((dir_path, name, mask))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class ScanDaemon:
+    """
+    Фоновая служба: один полный скан, затем индекс поддерживается в актуальном состоянии.
+    Изменения приходят от inotify (или от опроса mtime, если inotify недоступен или
+    исчерпан лимит наблюдений), копятся DAEMON_COALESCE_DELAY секунд и пересчитываются
+    только для затронутых папок с проталкиванием разницы вверх по предкам.
+    """
+
+    def __init__(self, days_old=DAYS_OLD, processes=None, throttle=None, policies=None):
+        self.scanner = Scanner(days_old, processes=processes, throttle=throttle)
+        self.policies = policies or []  # Политики автоочистки, выполняются после полного сканирования
+        self.stop_event = threading.Event()
+        self.index = None
+        self.watcher = None
+        self.cold_dirs = {}      # папка -> состояние (_dir_state), для папок без inotify-наблюдения
+        self.items = {}          # Результаты последнего сканирования (кэш для GUI и --export)
+        self.items_by_dir = {}   # папка -> пути найденных в ней файлов
+        self.items_changed = False
+        self.dirty = set()       # папки, ожидающие пересчёта
+        self.first_dirty_at = 0
+        self.index_changed = False
+        self.rescan_due = 0
+
+    def stop(self):
+        self.stop_event.set()
+        self.scanner.stop()
+
+    def full_scan(self):
+        """Полное сканирование: обновляет кэш результатов и тёплый индекс."""
+        logging.info("Служба: полное сканирование...")
+        items = self.scanner.run_scan()
+        if self.stop_event.is_set() or self.scanner.dir_index is None:
+            return
+        save_cache(items, retain=True)
+        self.index = self.scanner.dir_index
+        save_index(self.index, retain=True)
+        # Дерево пачек StatBatch нужно только для переоценки в GUI - не держим его до следующего скана
+        self.scanner.release_scan_data()
+        self._set_items(items)
+        self._setup_watches()
+        if self.policies:
+            self._run_policies()
+        if TRASH_AUTO_PURGE:
+            self._start_trash_purge()
+
+    def _run_policies(self):
+        """Автоочистка по политикам: план по свежему индексу и его выполнение."""
+        from .policy import build_plan, execute_plan
+        try:
+            plan = build_plan(self.policies, self.index)
+            if plan['entries']:
+                execute_plan(plan)
+        except Exception as e:
+            logging.error(f"Служба: ошибка выполнения политик: {e}")
+
+    def _start_trash_purge(self):
+        """Очистка своих старых записей корзины в отдельном потоке с пониженным приоритетом."""
+        from .deletion import purge_trash
+        threading.Thread(
+            target=purge_trash, args=(TRASH_RETENTION_DAYS, self.stop_event), daemon=True
+        ).start()
+
+    def _set_items(self, items):
+        self.items = items
+        self.items_by_dir = {}
+        for path, info in items.items():
+            if info['type'] in ('file', 'trash_file'):
+                self.items_by_dir.setdefault(os.path.dirname(path), set()).add(path)
+        self.items_changed = False
+
+    def _drop_item(self, path):
+        info = self.items.pop(path, None)
+        if info is not None and info['type'] in ('file', 'trash_file'):
+            self.items_by_dir.get(os.path.dirname(path), set()).discard(path)
+        self.items_changed = True
+
+    def _refresh_items(self, dirty, removed):
+        """
+        Обновление найденных элементов после пересчёта индекса: элементы в удалённых папках
+        убираются, файлы изменённых папок перечитываются, размеры папок-элементов на путях
+        от изменённых папок к корню берутся из индекса.
+        """
+        if removed:
+            for path in [p for p in self.items if _under_any(p, removed)]:
+                self._drop_item(path)
+
+        threshold = time.time() - self.scanner.days_old * 86400
+        ancestors = set()
+        for dir_path in dirty:
+            for path in list(self.items_by_dir.get(dir_path, ())):
+                self._refresh_file(path, threshold)
+            while dir_path not in ancestors:
+                ancestors.add(dir_path)
+                dir_path = os.path.dirname(dir_path)
+
+        for path in ancestors:
+            info = self.items.get(path)
+            node_id = self.index.ids.get(path)
+            if info is None or info['type'] not in ('dir', 'trash_dir') or node_id is None:
+                continue
+            size = self.index.total_sizes[node_id]
+            if size < self.scanner.min_size or size <= 0:
+                self._drop_item(path)
+            elif size != info['size']:
+                info['size'] = size
+                self.items_changed = True
+
+    def _refresh_file(self, path, threshold):
+        """Файл-элемент: исчез или (старый файл) изменён после порога возраста - убрать, иначе новый размер."""
+        info = self.items[path]
+        try:
+            st = os.lstat(path)
+        except OSError:
+            self._drop_item(path)
+            return
+        size = allocated_size(st)
+        if (info['type'] == 'file' and st.st_mtime > threshold) or size < self.scanner.min_size or size <= 0:
+            self._drop_item(path)
+        elif size != info['size'] or st.st_size != info.get('apparent_size'):
+            info['size'] = size
+            info['apparent_size'] = st.st_size
+            self.items_changed = True
+
+    def _setup_watches(self):
+        """Ставит inotify-наблюдения на все папки индекса; остаток уходит в опрос по mtime."""
+        if self.watcher:
+            self.watcher.close()
+            self.watcher = None
+        self.cold_dirs = {}
+
+        if InotifyWatcher.available():
+            try:
+                self.watcher = InotifyWatcher()
+            except OSError as e:
+                logging.warning(f"inotify недоступен ({e}), используется опрос")
+
+        limit_reached = False
+        for path in list(self.index.ids):
+            if self.watcher and not limit_reached:
+                try:
+                    self.watcher.add_watch(path)
+                    continue
+                except OSError as e:
+                    if e.errno != errno.ENOSPC:
+                        continue # Папка исчезла или нет доступа
+                    logging.warning("Лимит inotify исчерпан, остальные папки проверяются опросом")
+                    limit_reached = True
+            self._add_cold(path)
+
+        logging.info(f"Служба: наблюдение за {len(self.watcher.wd_to_path) if self.watcher else 0} папками, "
+                     f"опрос {len(self.cold_dirs)}")
+
+    def _add_cold(self, path):
+        state = self._dir_state(path)
+        if state is not None:
+            self.cold_dirs[path] = state
+
+    @staticmethod
+    def _dir_state(path):
+        """mtime папки и (размер, mtime) её файлов; None, если папка недоступна."""
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        files = {}
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            files[entry.name] = (st.st_size, st.st_mtime)
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+        return mtime, files
+
+    def _watch_new_dir(self, path):
+        """Новая папка: наблюдение inotify, либо опрос, если лимит исчерпан."""
+        if self.watcher:
+            try:
+                self.watcher.add_watch(path)
+                return
+            except OSError:
+                pass
+        self._add_cold(path)
+
+    def _mark_dirty(self, path):
+        if not self.dirty:
+            self.first_dirty_at = time.time()
+        self.dirty.add(path)
+
+    def _on_event(self, dir_path, name, mask):
+        """Обработка одного события inotify: только помечаем папку, пересчёт позже пачкой."""
+        if mask & InotifyWatcher.IN_Q_OVERFLOW:
+            # Очередь ядра переполнена - события потеряны, нужен полный скан
+            self.rescan_due = 0
+            return
+        self._mark_dirty(dir_path)
+        if mask & InotifyWatcher.IN_ISDIR and name:
+            self._mark_dirty(os.path.join(dir_path, name))
+
+    def _poll_cold(self):
+        """
+        Проверка папок без наблюдения: mtime папки меняют добавление и удаление записей,
+        запись в существующий файл видна только по его размеру и mtime.
+        """
+        for path, old_state in list(self.cold_dirs.items()):
+            if self.stop_event.is_set():
+                return
+            state = self._dir_state(path)
+            if state is None:
+                self.cold_dirs.pop(path, None)
+                self._mark_dirty(path)
+                continue
+            if state != old_state:
+                self.cold_dirs[path] = state
+                self._mark_dirty(path)
+
+    def _flush(self):
+        """Пересчёт накопленных папок. Агрегаты меняются только вдоль путей к корню."""
+        dirty, self.dirty = self.dirty, set()
+        removed = set()
+        # Сначала родители, чтобы новые подпапки вставали под уже существующий узел
+        for path in sorted(dirty, key=len):
+            if is_system_or_skip(path):
+                continue
+            if not os.path.isdir(path):
+                self.index.remove_dir(path)
+                self.cold_dirs.pop(path, None)
+                removed.add(path)
+            elif path in self.index.ids:
+                self.index.set_own_size(path, self._own_size(path))
+            elif os.path.dirname(path) in self.index.ids:
+                # Новая (или перемещённая) папка - индексируем всё её поддерево
+                for sub_dir, dirnames, _ in os.walk(path):
+                    dirnames[:] = [d for d in dirnames if not is_system_or_skip(os.path.join(sub_dir, d))]
+                    self.index.add_dir(sub_dir, self._own_size(sub_dir))
+                    self._watch_new_dir(sub_dir)
+            self.index_changed = True
+        self._refresh_items(dirty, removed)
+
+    def _save(self):
+        """Сброс на диск изменённых индекса и кэша результатов."""
+        if self.index_changed:
+            save_index(self.index)
+            self.index_changed = False
+        if self.items_changed:
+            save_cache(self.items)
+            self.items_changed = False
+
+    @staticmethod
+    def _own_size(path):
+        """Место на диске, занятое файлами непосредственно в папке."""
+        total = 0
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_file(follow_symlinks=False):
+                            total += allocated_size(entry.stat(follow_symlinks=False))
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+        return total
+
+    def serve_forever(self):
+        """Основной цикл службы."""
+        self.full_scan()
+        now = time.time()
+        self.rescan_due = now + DAEMON_RESCAN_INTERVAL
+        poll_due = now + DAEMON_POLL_INTERVAL
+        save_due = now + DAEMON_SAVE_INTERVAL
+
+        try:
+            while not self.stop_event.is_set():
+                if self.watcher:
+                    for dir_path, name, mask in self.watcher.read_events(timeout=1.0):
+                        self._on_event(dir_path, name, mask)
+                else:
+                    self.stop_event.wait(1.0)
+
+                now = time.time()
+                if self.index is None:
+                    if now >= self.rescan_due:
+                        self.full_scan()
+                        self.rescan_due = now + DAEMON_RESCAN_INTERVAL
+                    continue
+
+                if now >= poll_due:
+                    self._poll_cold()
+                    poll_due = now + DAEMON_POLL_INTERVAL
+
+                if self.dirty and now - self.first_dirty_at >= DAEMON_COALESCE_DELAY:
+                    self._flush()
+
+                if (self.index_changed or self.items_changed) and now >= save_due:
+                    self._save()
+                    save_due = now + DAEMON_SAVE_INTERVAL
+
+                if now >= self.rescan_due:
+                    self.full_scan()
+                    self.rescan_due = time.time() + DAEMON_RESCAN_INTERVAL
+        finally:
+            if self.index is not None:
+                self._save()
+            if self.watcher:
+                self.watcher.close()
+
+
+def _under_any(path, dirs):
+    """Лежит ли path в одной из папок dirs (или совпадает с ней)."""
+    while True:
+        if path in dirs:
+            return True
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
@@ -0,0 +1,358 @@
+"""
+Удаление файлов и папок с диска. Импортируется лениво, только при удалении.
+
+Два режима:
+  - delete_paths: окончательное удаление (shutil.rmtree / os.remove);
+  - move_to_trash: перенос в корзину по спецификации freedesktop.org Trash -
+    одно переименование на элемент, поэтому мгновенно даже для огромных папок
+    и может быть отменено (restore_from_trash). Место освобождает purge_trash.
+
+Каждый перенос записывается в журнал TRASH_LEDGER_FILE: purge_trash удаляет только
+записи из журнала, а не всё содержимое корзины пользователя.
+"""
+import os
+import sys
+import json
+import time
+import errno
+import shutil
+import logging
+import threading
+from urllib.parse import quote
+
+from .core import TRASH_LEDGER_FILE, lower_thread_priority
+
+TRASH_INFO_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+TRASH_NAME_ATTEMPTS = 100  # Попыток занять свободное имя в корзине, если его перехватывают
+_trash_dir_cache = {}  # st_dev -> корзина этой файловой системы
+_ledger_lock = threading.Lock()
+_renameat2 = None      # libc renameat2 (Linux); False - недоступна
+
+_AT_FDCWD = -100
+_RENAME_NOREPLACE = 1
+
+
+def delete_paths(paths, on_removed=None):
+    """
+    Удаляет файлы и папки (папки - целиком, со всем содержимым).
+    on_removed(path) вызывается для каждого удалённого или уже отсутствующего пути.
+    Возвращает (число удалённых, список путей с ошибками).
+    """
+    on_removed = on_removed or (lambda path: None)
+    deleted_count = 0
+    failed_paths = []
+
+    for path in paths:
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.isfile(path):
+                os.remove(path)
+            else:
+                # Путь мог быть удален в прошлой итерации (например, подпапка)
+                on_removed(path)
+                continue
+
+            on_removed(path)
+            deleted_count += 1
+        except Exception as e:
+            logging.error(f"Ошибка удаления {path}: {e}")
+            failed_paths.append(path)
+
+    return deleted_count, failed_paths
+
+
+# === КОРЗИНА (freedesktop.org Trash) ===
+
+def _home_trash():
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(data_home, 'Trash')
+
+
+def _top_trash_name():
+    # На Windows нет uid - корзина приложения в корне диска
+    return f'.Trash-{os.getuid()}' if hasattr(os, 'getuid') else '.cleaner-trash'
+
+
+def _mount_point(path):
+    """Корень файловой системы, на которой лежит path."""
+    path = os.path.realpath(path)
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def _ensure_trash(trash_dir):
+    os.makedirs(os.path.join(trash_dir, 'files'), mode=0o700, exist_ok=True)
+    os.makedirs(os.path.join(trash_dir, 'info'), mode=0o700, exist_ok=True)
+    return trash_dir
+
+
+def trash_dir_for(path):
+    """
+    Корзина на той же файловой системе, что и path (чтобы перенос был переименованием):
+    домашняя корзина, если path на одном устройстве с ней, иначе $topdir/.Trash-$uid.
+    """
+    device = os.lstat(path).st_dev
+    trash_dir = _trash_dir_cache.get(device)
+    if trash_dir is not None:
+        return trash_dir
+
+    home_trash = _home_trash()
+    home_root = os.path.dirname(home_trash)
+    os.makedirs(home_root, exist_ok=True)
+    if os.stat(home_root).st_dev == device:
+        trash_dir = _ensure_trash(home_trash)
+    else:
+        trash_dir = _ensure_trash(os.path.join(_mount_point(os.path.dirname(os.path.abspath(path))), _top_trash_name()))
+
+    _trash_dir_cache[device] = trash_dir
+    return trash_dir
+
+
+def _reserve_trash_name(trash_dir, path, deleted_at):
+    """
+    Создаёт info/<имя>.trashinfo с уникальным именем (O_EXCL, как требует спецификация)
+    и возвращает (имя, путь к info-файлу).
+    """
+    base = os.path.basename(os.path.normpath(path)) or 'item'
+    info = (
+        "[Trash Info]\n"
+        f"Path={quote(os.path.abspath(path))}\n"
+        f"DeletionDate={time.strftime(TRASH_INFO_DATE_FORMAT, time.localtime(deleted_at))}\n"
+    ).encode('utf-8')
+
+    n = 1
+    while True:
+        name = base if n == 1 else f"{base}.{n}"
+        info_path = os.path.join(trash_dir, 'info', name + '.trashinfo')
+        if os.path.lexists(os.path.join(trash_dir, 'files', name)):
+            # Элемент без info-файла (осиротевший) - его нельзя затереть переносом
+            n += 1
+            continue
+        try:
+            fd = os.open(info_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            n += 1
+            continue
+        with os.fdopen(fd, 'wb') as f:
+            f.write(info)
+        return name, info_path
+
+
+def _load_renameat2():
+    global _renameat2
+    if _renameat2 is None:
+        _renameat2 = False
+        if sys.platform.startswith('linux'):
+            import ctypes
+            try:
+                _renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+            except (OSError, AttributeError):
+                pass  # glibc старше 2.28
+    return _renameat2
+
+
+def _rename_noreplace(src, dst):
+    """
+    os.rename, который не заменяет существующий dst, а бросает FileExistsError. На Linux -
+    атомарный renameat2(RENAME_NOREPLACE); на Windows os.rename и так не заменяет; где
+    renameat2 нет или ФС его не поддерживает - проверка dst непосредственно перед rename.
+    """
+    renameat2 = _load_renameat2()
+    if renameat2:
+        import ctypes
+        if renameat2(_AT_FDCWD, os.fsencode(src), _AT_FDCWD, os.fsencode(dst), _RENAME_NOREPLACE) == 0:
+            return
+        err = ctypes.get_errno()
+        if err not in (errno.EINVAL, errno.ENOSYS):
+            raise OSError(err, os.strerror(err), src, None, dst)
+    if os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst)
+    os.rename(src, dst)
+
+
+def _move_into_trash(trash_dir, path, deleted_at):
+    """
+    Переносит path в files/ корзины под свободным именем. Возвращает (путь в корзине, info-файл).
+    Если имя в files/ заняли между проверкой и переносом, берётся следующее.
+    """
+    for _ in range(TRASH_NAME_ATTEMPTS):
+        name, info_path = _reserve_trash_name(trash_dir, path, deleted_at)
+        trashed_path = os.path.join(trash_dir, 'files', name)
+        try:
+            _rename_noreplace(path, trashed_path)
+            return trashed_path, info_path
+        except BaseException as e:
+            try:
+                os.remove(info_path)
+            except OSError:
+                pass
+            if not isinstance(e, FileExistsError):
+                raise
+    raise FileExistsError(errno.EEXIST, "нет свободного имени в корзине", path)
+
+
+def move_to_trash(paths, on_removed=None):
+    """
+    Переносит файлы и папки в корзину их файловой системы одним rename на элемент.
+    on_removed(path) вызывается для каждого перенесённого или уже отсутствующего пути.
+    Возвращает (число перенесённых, список путей с ошибками,
+    список записей (исходный путь, путь в корзине, info-файл) для restore_from_trash).
+    """
+    on_removed = on_removed or (lambda path: None)
+    moved_count = 0
+    failed_paths = []
+    entries = []
+    deleted_at = time.time()
+
+    for path in paths:
+        if not os.path.lexists(path):
+            # Путь мог быть перенесён в прошлой итерации (например, подпапка)
+            on_removed(path)
+            continue
+
+        try:
+            trash_dir = trash_dir_for(path)
+            trashed_path, info_path = _move_into_trash(trash_dir, path, deleted_at)
+        except Exception as e:
+            if isinstance(e, OSError) and e.errno == errno.EXDEV:
+                logging.error(f"Корзина на другой файловой системе, перенос {path} невозможен без копирования")
+            else:
+                logging.error(f"Ошибка переноса в корзину {path}: {e}")
+            failed_paths.append(path)
+            continue
+
+        entries.append((path, trashed_path, info_path))
+        on_removed(path)
+        moved_count += 1
+
+    if entries:
+        _update_ledger(added=[list(entry) + [deleted_at] for entry in entries])
+    return moved_count, failed_paths, entries
+
+
+def restore_from_trash(entries):
+    """
+    Возвращает элементы из корзины на прежнее место (отмена move_to_trash).
+    Возвращает (список восстановленных путей, список путей с ошибками).
+    """
+    restored = []
+    failed_paths = []
+
+    # В обратном порядке: сначала то, что было перенесено последним
+    for original_path, trashed_path, info_path in reversed(entries):
+        try:
+            if os.path.lexists(original_path):
+                raise FileExistsError(f"на месте уже есть {original_path}")
+            os.makedirs(os.path.dirname(original_path), exist_ok=True)
+            _rename_noreplace(trashed_path, original_path)
+        except Exception as e:
+            logging.error(f"Ошибка восстановления {original_path}: {e}")
+            failed_paths.append(original_path)
+            continue
+
+        try:
+            os.remove(info_path)
+        except OSError:
+            pass
+        restored.append(original_path)
+
+    restored_set = set(restored)
+    _update_ledger(removed={info_path for original_path, _, info_path in entries if original_path in restored_set})
+    return restored, failed_paths
+
+
+# === ЖУРНАЛ СВОИХ ЗАПИСЕЙ КОРЗИНЫ ===
+
+def load_ledger():
+    """Записи корзины, созданные программой: [исходный путь, путь в корзине, info-файл, время переноса]."""
+    if not os.path.exists(TRASH_LEDGER_FILE):
+        return []
+    try:
+        with open(TRASH_LEDGER_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logging.error(f"Ошибка загрузки журнала корзины: {e}")
+        return []
+
+
+def _update_ledger(added=(), removed=()):
+    """Добавляет записи в журнал и убирает записи с info-файлами из removed. Запись атомарная."""
+    if not added and not removed:
+        return
+    with _ledger_lock:
+        ledger = [entry for entry in load_ledger() if entry[2] not in removed]
+        ledger.extend(added)
+        try:
+            tmp_file = TRASH_LEDGER_FILE + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(ledger, f, ensure_ascii=False)
+            os.replace(tmp_file, TRASH_LEDGER_FILE)
+        except Exception as e:
+            logging.error(f"Ошибка сохранения журнала корзины: {e}")
+
+
+def _info_path_field(info_path):
+    """Поле Path= из .trashinfo или None, если файла нет или он повреждён."""
+    try:
+        with open(info_path, encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('Path='):
+                    return line.split('=', 1)[1].strip()
+    except Exception:
+        pass
+    return None
+
+
+def _remove_tree(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def purge_trash(retention_days, stop_event=None, low_priority=True):
+    """
+    Окончательно удаляет записи корзины старше retention_days, созданные move_to_trash
+    (по журналу TRASH_LEDGER_FILE). Чужие записи корзины не трогаются; записи, которые
+    пользователь уже восстановил или удалил сам, просто убираются из журнала.
+    Выполняется с пониженным приоритетом (nice 19, ionice idle), чтобы не мешать
+    интерактивной работе; stop_event (threading.Event) прерывает очистку между записями.
+    Возвращает (число удалённых записей, список путей с ошибками).
+    """
+    if low_priority:
+        lower_thread_priority()
+
+    cutoff = time.time() - retention_days * 86400
+    purged_count = 0
+    failed_paths = []
+    done = set()  # info-файлы записей, которых больше нет в корзине
+
+    for original_path, trashed_path, info_path, deleted_at in load_ledger():
+        if stop_event is not None and stop_event.is_set():
+            break
+        # info-файл с тем же именем мог быть создан заново для чужого удаления - сверяем Path=
+        if _info_path_field(info_path) != quote(os.path.abspath(original_path)):
+            done.add(info_path)
+            continue
+        if deleted_at > cutoff:
+            continue
+
+        try:
+            # Сначала данные, затем info: при сбое запись останется видна и будет удалена позже
+            _remove_tree(trashed_path)
+            os.remove(info_path)
+            done.add(info_path)
+            purged_count += 1
+        except Exception as e:
+            logging.error(f"Ошибка очистки корзины {trashed_path}: {e}")
+            failed_paths.append(trashed_path)
+
+    _update_ledger(removed=done)
+    if purged_count:
+        logging.info(f"Очистка корзины: удалено {purged_count} записей старше {retention_days} дн.")
+    return purged_count, failed_paths
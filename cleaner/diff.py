@@ -0,0 +1,119 @@
+"""
+Сравнение двух сканирований: что выросло, появилось или исчезло с прошлого раза.
+
+Снимки из истории (snapshot.py, SNAPSHOT_DIR) сливаются одним проходом в порядке путей,
+как два отсортированных списка: в памяти только текущая пара строк, итоги по категориям
+и DIFF_TOP путей с наибольшим ростом, сколько бы строк ни было в снимках.
+"""
+import time
+import heapq
+
+from .core import SNAPSHOT_DIR, DIFF_TOP, human
+from .snapshot import Snapshot, KIND_ITEMS, history
+
+
+def _change(snapshot, i, old_size, new_size):
+    if snapshot.kind == KIND_ITEMS:
+        _, _, _, _, category_id, type_id = snapshot.record(i)
+        category, item_type = snapshot.labels[category_id], snapshot.labels[type_id]
+    else:
+        category, item_type = None, 'dir'
+    return snapshot.path(i), old_size, new_size, category, item_type
+
+
+def diff_snapshots(old, new):
+    """
+    Изменения между открытыми снимками old и new одного вида, в порядке путей:
+    (путь, старый размер, новый размер, категория, тип). У появившихся путей старый
+    размер None, у исчезнувших - новый; пути с прежним размером пропускаются.
+    """
+    if old.kind != new.kind:
+        raise ValueError("Снимки разного вида: сравнивать можно элементы с элементами, папки с папками")
+
+    old_rows, new_rows = old.iter_sorted(), new.iter_sorted()
+    o, n = next(old_rows, None), next(new_rows, None)
+    while o is not None or n is not None:
+        if n is None or (o is not None and o[0] < n[0]):
+            yield _change(old, o[1], old.size(o[1]), None)
+            o = next(old_rows, None)
+        elif o is None or n[0] < o[0]:
+            yield _change(new, n[1], None, new.size(n[1]))
+            n = next(new_rows, None)
+        else:
+            old_size, new_size = old.size(o[1]), new.size(n[1])
+            if old_size != new_size:
+                yield _change(new, n[1], old_size, new_size)
+            o, n = next(old_rows, None), next(new_rows, None)
+
+
+def summarize_diff(changes, top=DIFF_TOP):
+    """
+    Итоги потока изменений: число выросших/уменьшившихся/появившихся/исчезнувших путей,
+    общий прирост, прирост по категориям {категория: [байт, путей]} и top путей
+    с наибольшим ростом [(прирост, путь, было, стало)].
+    """
+    summary = {'grew': 0, 'shrunk': 0, 'appeared': 0, 'gone': 0, 'delta': 0, 'categories': {}, 'top': []}
+    heap = []  # Неубывающая куча: вершина - наименьший рост среди лучших top
+    for path, old_size, new_size, category, _ in changes:
+        delta = (new_size or 0) - (old_size or 0)
+        if old_size is None:
+            summary['appeared'] += 1
+        elif new_size is None:
+            summary['gone'] += 1
+        elif delta > 0:
+            summary['grew'] += 1
+        else:
+            summary['shrunk'] += 1
+        summary['delta'] += delta
+
+        entry = summary['categories'].setdefault(category or '', [0, 0])
+        entry[0] += delta
+        entry[1] += 1
+
+        if delta > 0:
+            record = (delta, path, old_size, new_size)
+            if len(heap) < top:
+                heapq.heappush(heap, record)
+            elif record > heap[0]:
+                heapq.heapreplace(heap, record)
+
+    summary['top'] = sorted(heap, reverse=True)
+    return summary
+
+
+def latest_pair(prefix='items', directory=SNAPSHOT_DIR):
+    """Пути двух последних сохранённых снимков вида prefix (старый, новый) или None."""
+    snapshots = history(directory, prefix)
+    return tuple(snapshots[-2:]) if len(snapshots) >= 2 else None
+
+
+def compare_files(old_path, new_path, top=DIFF_TOP):
+    """Итоги сравнения двух файлов снимков (см. summarize_diff) с временем обоих сканирований."""
+    with Snapshot(old_path) as old, Snapshot(new_path) as new:
+        summary = summarize_diff(diff_snapshots(old, new), top)
+        summary['old_created'], summary['new_created'] = old.created, new.created
+    return summary
+
+
+def format_diff(summary):
+    """Текстовый отчёт о росте для консоли и GUI."""
+    def when(ts):
+        return time.strftime('%Y-%m-%d %H:%M', time.localtime(ts))
+
+    sign = '+' if summary['delta'] >= 0 else '-'
+    lines = [
+        f"Сравнение сканирований {when(summary['old_created'])} -> {when(summary['new_created'])}",
+        f"Прирост: {sign}{human(abs(summary['delta']))}; выросло {summary['grew']}, появилось {summary['appeared']}, "
+        f"уменьшилось {summary['shrunk']}, исчезло {summary['gone']}",
+        "",
+        "По категориям:",
+    ]
+    for category, (delta, count) in sorted(summary['categories'].items(), key=lambda kv: -kv[1][0]):
+        sign = '+' if delta >= 0 else '-'
+        lines.append(f"  {sign}{human(abs(delta)):>11}  {count:>7} путей  {category or '(папки)'}")
+    lines.append("")
+    lines.append("Наибольший рост:")
+    for delta, path, old_size, new_size in summary['top']:
+        was = human(old_size) if old_size is not None else "новый"
+        lines.append(f"  +{human(delta):>11}  ({was} -> {human(new_size)})  {path}")
+    return "\n".join(lines)
@@ -0,0 +1,223 @@
+"""
+Учёт ошибок обхода: счётчики по видам, компактный журнал путей и очередь повторов.
+
+Папки без доступа запоминаются и пропускаются при следующих сканированиях (до истечения
+ERROR_SKIP_TTL), а папки с временными ошибками ввода-вывода (EIO, таймауты сетевых дисков)
+попадают в ограниченную очередь повторов с экспоненциальной задержкой. Кратковременные
+ошибки (EINTR, EAGAIN, EBUSY) сначала повторяются в том же сканировании (retry_transient, walk).
+Журнал хранится в ERRORS_FILE рядом с кэшем. Не зависит от Qt.
+"""
+import os
+import json
+import time
+import errno
+import logging
+
+from .core import (
+    ERRORS_FILE, ERROR_LOG_MAX, ERROR_SKIP_TTL, ERROR_RETRY_BASE, ERROR_RETRY_MAX_DELAY,
+    ERROR_RETRY_QUEUE_MAX, SCAN_RETRY_ATTEMPTS, SCAN_RETRY_DELAY
+)
+
+# Виды ошибок
+PERMISSION = 'permission'   # Нет доступа - папку можно пропускать
+MISSING = 'missing'         # Путь исчез во время обхода - обычная гонка, не запоминается
+IO = 'io'                   # Сбой ввода-вывода / сетевого диска - повтор с задержкой
+OTHER = 'other'
+
+_TRANSIENT_ERRNOS = {
+    errno.EIO, errno.ETIMEDOUT, errno.EAGAIN, errno.EBUSY, errno.ESTALE, errno.ENOTCONN,
+    errno.EHOSTDOWN, errno.EHOSTUNREACH, errno.ENETDOWN, errno.ENETUNREACH, errno.ECONNRESET,
+}
+# Ошибки, которые обычно проходят за доли секунды - их повторяем сразу, в том же сканировании
+_RETRY_NOW_ERRNOS = {errno.EINTR, errno.EAGAIN, errno.EBUSY}
+
+
+def classify_error(exc):
+    """Вид ошибки по исключению."""
+    if isinstance(exc, PermissionError):
+        return PERMISSION
+    if isinstance(exc, (FileNotFoundError, NotADirectoryError)):
+        return MISSING
+    if isinstance(exc, OSError) and exc.errno in _TRANSIENT_ERRNOS:
+        return IO
+    return OTHER
+
+
+def retry_transient(func, *args):
+    """
+    func(*args) с повтором при кратковременной ошибке (EINTR, EAGAIN, EBUSY): до SCAN_RETRY_ATTEMPTS
+    попыток с паузой от SCAN_RETRY_DELAY, удваивающейся каждый раз. Прочие ошибки и ошибка
+    последней попытки пробрасываются (их учитывает ScanErrors.record).
+    """
+    delay = SCAN_RETRY_DELAY
+    for attempt in range(1, SCAN_RETRY_ATTEMPTS):
+        try:
+            return func(*args)
+        except OSError as e:
+            if e.errno not in _RETRY_NOW_ERRNOS:
+                raise
+        time.sleep(delay)
+        delay *= 2
+    return func(*args)
+
+
+def _list_dir(path):
+    """Имена подпапок и файлов папки (как их делит os.walk: ссылка на папку - подпапка)."""
+    dirs, files = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            (dirs if is_dir else files).append(entry.name)
+    return dirs, files
+
+
+def walk(top, onerror=None):
+    """
+    os.walk сверху вниз без перехода по ссылкам, но чтение папки при кратковременной ошибке
+    повторяется (retry_transient), а не сразу уходит в onerror. Подпапки можно отсекать,
+    меняя dirnames на месте, как в os.walk.
+    """
+    stack = [top]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            dirnames, filenames = retry_transient(_list_dir, dirpath)
+        except OSError as e:
+            if onerror is not None:
+                onerror(e)
+            continue
+        yield dirpath, dirnames, filenames
+        for name in reversed(dirnames):
+            path = os.path.join(dirpath, name)
+            if not os.path.islink(path):
+                stack.append(path)
+
+
+class ScanErrors:
+    """
+    Ошибки одного сканирования и известные проблемные папки с прошлых сканирований.
+
+    known: путь папки -> [вид, errno, число неудач подряд, время следующей попытки].
+    Папки из known не обходятся, пока не наступило время следующей попытки.
+    """
+
+    def __init__(self, known=None):
+        self.counts = {}            # вид -> число ошибок за сканирование
+        self.log = []               # [путь, вид, errno] - первые ERROR_LOG_MAX ошибок
+        self.known = known if known is not None else {}
+        self.updates = {}           # Изменения known за это сканирование (None - путь убран)
+        self.skipped = 0            # Сколько известных проблемных папок пропущено
+
+    # --- Запись ---
+
+    def record(self, path, exc, is_dir=False):
+        """Учитывает ошибку; для папок с постоянной или временной ошибкой планирует пропуск/повтор."""
+        kind = classify_error(exc)
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        if len(self.log) < ERROR_LOG_MAX:
+            self.log.append([path, kind, getattr(exc, 'errno', None)])
+
+        if is_dir and kind in (PERMISSION, IO):
+            self._schedule(path, kind, getattr(exc, 'errno', None))
+
+    def on_walk_error(self, exc):
+        """Колбэк onerror для os.walk: ошибка чтения папки."""
+        self.record(exc.filename or '', exc, is_dir=True)
+
+    def _schedule(self, path, kind, err):
+        now = time.time()
+        entry = self.known.get(path)
+        failures = entry[2] + 1 if entry else 1
+        if kind == PERMISSION:
+            delay = ERROR_SKIP_TTL
+        else:
+            delay = min(ERROR_RETRY_MAX_DELAY, ERROR_RETRY_BASE * 2 ** (failures - 1))
+
+        self._set_known(path, [kind, err, failures, now + delay])
+
+    def _set_known(self, path, entry):
+        self.updates[path] = entry
+        self.known.pop(path, None)  # Переставляем в конец: порядок вставки - порядок вытеснения
+        if entry is None:
+            return
+        self.known[path] = entry
+        while len(self.known) > ERROR_RETRY_QUEUE_MAX:
+            self.known.pop(next(iter(self.known)))
+
+    # --- Пропуск и повтор ---
+
+    def should_skip(self, path):
+        """True, если папка известна как проблемная и время повтора ещё не пришло."""
+        entry = self.known.get(path)
+        if entry is None:
+            return False
+        if time.time() < entry[3]:
+            self.skipped += 1
+            return True
+        return False  # Пора повторить попытку
+
+    def prune(self, dirpath, dirnames):
+        """Убирает из dirnames (os.walk сверху вниз) известные проблемные подпапки."""
+        if self.known:
+            dirnames[:] = [d for d in dirnames if not self.should_skip(os.path.join(dirpath, d))]
+
+    def succeeded(self, path):
+        """Папка прочитана без ошибок - убираем её из очереди повторов."""
+        if self.known and path in self.known:
+            self._set_known(path, None)
+
+    # --- Объединение (процессы-воркеры) ---
+
+    def pack(self):
+        """Итоги воркера для передачи в основной процесс: счётчики, журнал и изменения known."""
+        return self.counts, self.log, self.updates, self.skipped
+
+    def merge(self, packed):
+        counts, log, updates, skipped = packed
+        for kind, n in counts.items():
+            self.counts[kind] = self.counts.get(kind, 0) + n
+        self.log.extend(log[:max(0, ERROR_LOG_MAX - len(self.log))])
+        for path, entry in updates.items():
+            self._set_known(path, entry)
+        self.skipped += skipped
+
+    # --- Итоги и хранение ---
+
+    def summary(self):
+        """Строка с итогами для статуса и журнала ('' если ошибок не было)."""
+        parts = [f"{kind}: {n}" for kind, n in sorted(self.counts.items())]
+        if self.skipped:
+            parts.append(f"пропущено известных: {self.skipped}")
+        return ", ".join(parts)
+
+    @classmethod
+    def load(cls):
+        """Известные проблемные папки из ERRORS_FILE."""
+        if not os.path.exists(ERRORS_FILE):
+            return cls()
+        try:
+            with open(ERRORS_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return cls({path: entry for path, *entry in data.get('known', [])})
+        except Exception as e:
+            logging.error(f"Ошибка загрузки журнала ошибок: {e}")
+            return cls()
+
+    def save(self):
+        """Сохраняет журнал и известные проблемные папки. Запись атомарная."""
+        try:
+            data = {
+                'saved': time.time(),
+                'counts': self.counts,
+                'log': self.log,
+                'known': [[path] + entry for path, entry in self.known.items()],
+            }
+            tmp_file = ERRORS_FILE + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, ERRORS_FILE)
+        except Exception as e:
+            logging.error(f"Ошибка сохранения журнала ошибок: {e}")
@@ -0,0 +1,219 @@
+"""
+Экспорт результатов сканирования в JSON Lines, CSV или Parquet.
+
+Записи идут через конвейер генераторов и пишутся пачками по EXPORT_CHUNK_SIZE строк,
+поэтому память не зависит от числа результатов. Суффикс .gz у JSONL/CSV включает сжатие.
+Parquet требует pyarrow (необязательная зависимость, импортируется только при экспорте в Parquet).
+"""
+import os
+import csv
+import json
+import gzip
+import socket
+import logging
+from itertools import islice
+
+from .core import EXPORT_CHUNK_SIZE
+
+# Колонки отчёта: одинаковые для найденных элементов (kind=item), агрегатов папок (kind=dir)
+# и изменений с прошлого сканирования (kind=delta, см. diff.py).
+# size - место на диске, которое освободит удаление; apparent_size - сумма видимых размеров (st_size);
+# delta - прирост с прошлого сканирования
+EXPORT_FIELDS = ('host', 'kind', 'path', 'category', 'type', 'size', 'apparent_size', 'count', 'own_size',
+                 'delta', 'last_scan')
+
+
+def detect_format(path):
+    """Формат по расширению файла (с учётом .gz)."""
+    name = path.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    for fmt, extensions in (('jsonl', ('.jsonl', '.ndjson', '.json')), ('csv', ('.csv',)), ('parquet', ('.parquet',))):
+        if name.endswith(extensions):
+            return fmt
+    raise ValueError(f"Неизвестный формат экспорта: {path} (ожидается .jsonl, .csv или .parquet)")
+
+
+# === ИСТОЧНИКИ ЗАПИСЕЙ ===
+
+def iter_item_records(items, host=None):
+    """Записи найденных элементов; items - dict путь -> info или итерируемое пар (путь, info)."""
+    host = host or socket.gethostname()
+    pairs = items.items() if hasattr(items, 'items') else items
+    for path, info in pairs:
+        yield {
+            'host': host,
+            'kind': 'item',
+            'path': path,
+            'category': info.get('category', 'Неизвестно'),
+            'type': info['type'],
+            'size': info['size'],
+            'apparent_size': info.get('apparent_size', info['size']),
+            'count': info.get('count', 1),
+            'own_size': None,
+            'delta': None,
+            'last_scan': info.get('last_scan'),
+        }
+
+
+def iter_dir_records(index, host=None, scan_time=None):
+    """Записи агрегатов по папкам из DirIndex (size - с подпапками, own_size - только свои файлы)."""
+    host = host or socket.gethostname()
+    for path, own_size, total_size in index.live_entries():
+        yield {
+            'host': host,
+            'kind': 'dir',
+            'path': path,
+            'category': None,
+            'type': 'dir',
+            'size': total_size,
+            'apparent_size': None,
+            'count': None,
+            'own_size': own_size,
+            'delta': None,
+            'last_scan': scan_time,
+        }
+
+
+def iter_delta_records(changes, host=None, scan_time=None):
+    """Записи изменений из diff.diff_snapshots: size - новый размер (0 - путь исчез), delta - прирост."""
+    host = host or socket.gethostname()
+    for path, old_size, new_size, category, item_type in changes:
+        yield {
+            'host': host,
+            'kind': 'delta',
+            'path': path,
+            'category': category,
+            'type': item_type,
+            'size': new_size or 0,
+            'apparent_size': None,
+            'count': None,
+            'own_size': None,
+            'delta': (new_size or 0) - (old_size or 0),
+            'last_scan': scan_time,
+        }
+
+
+def iter_latest_delta_records(prefixes=('items',), host=None):
+    """
+    Записи изменений между двумя последними сохранёнными сканированиями (история снимков,
+    см. diff.latest_pair) для каждого вида из prefixes ('items', 'dirs').
+    """
+    from .diff import latest_pair, diff_snapshots
+    from .snapshot import Snapshot
+
+    for prefix in prefixes:
+        pair = latest_pair(prefix)
+        if pair is None:
+            logging.warning(f"Изменения не экспортированы: нужно хотя бы два сохранённых сканирования ({prefix})")
+            continue
+        with Snapshot(pair[0]) as old, Snapshot(pair[1]) as new:
+            yield from iter_delta_records(diff_snapshots(old, new), host, new.created)
+
+
+def iter_cache_records(host=None):
+    """Записи из кэша результатов пачками, без загрузки всего кэша в виде результатов."""
+    from .core import iter_cache_chunks
+    for chunk in iter_cache_chunks(EXPORT_CHUNK_SIZE):
+        yield from iter_item_records(chunk, host)
+
+
+def _chunks(records, chunk_size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# === ЗАПИСЬ ===
+
+def _open_text(path, compress):
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def _write_jsonl(chunks, path, compress):
+    count = 0
+    with _open_text(path, compress) as f:
+        for chunk in chunks:
+            f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in chunk))
+            count += len(chunk)
+    return count
+
+
+def _write_csv(chunks, path, compress):
+    count = 0
+    with _open_text(path, compress) as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_FIELDS)
+        for chunk in chunks:
+            writer.writerows([record[field] for field in EXPORT_FIELDS] for record in chunk)
+            count += len(chunk)
+    return count
+
+
+def _write_parquet(chunks, path, compress):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Для экспорта в Parquet нужен пакет pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([
+        ('host', pa.string()), ('kind', pa.string()), ('path', pa.string()),
+        ('category', pa.string()), ('type', pa.string()), ('size', pa.int64()),
+        ('apparent_size', pa.int64()), ('count', pa.int64()), ('own_size', pa.int64()),
+        ('delta', pa.int64()), ('last_scan', pa.float64()),
+    ])
+    count = 0
+    # Parquet сжимается сам; каждая пачка - отдельная группа строк (row group)
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for chunk in chunks:
+            columns = {field: [record[field] for record in chunk] for field in EXPORT_FIELDS}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            count += len(chunk)
+    return count
+
+
+_WRITERS = {'jsonl': _write_jsonl, 'csv': _write_csv, 'parquet': _write_parquet}
+
+
+def export_records(records, path, fmt=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Пишет поток записей в файл пачками по chunk_size. Запись атомарная: файл появляется
+    под своим именем только после успешного завершения. Возвращает число записей.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in _WRITERS:
+        raise ValueError(f"Неизвестный формат экспорта: {fmt}")
+
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.tmp{os.getpid()}")
+    try:
+        count = _WRITERS[fmt](_chunks(records, chunk_size), tmp_path, path.lower().endswith('.gz'))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logging.info(f"Экспорт: {count} записей -> {path}")
+    return count
+
+
+def export_results(items, path, fmt=None, index=None, scan_time=None, deltas=()):
+    """
+    Экспорт найденных элементов, (если передан DirIndex) агрегатов по папкам и изменений
+    с прошлого сканирования для видов снимков из deltas ('items', 'dirs').
+    """
+    host = socket.gethostname()
+
+    def records():
+        yield from iter_item_records(items, host)
+        if index is not None:
+            yield from iter_dir_records(index, host, scan_time)
+        yield from iter_latest_delta_records(deltas, host)
+
+    return export_records(records(), path, fmt)
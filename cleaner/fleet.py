@@ -0,0 +1,350 @@
+"""
+Сводка по парку машин: объединяет отчёты многих машин (экспорт .jsonl/.csv[.gz]/.parquet,
+cleaner_cache.json или его снимок cleaner_cache.snap) из одной папки и считает, сколько места можно освободить:
+по категориям, по шаблонам путей (~/.cache/pip, */node_modules) и по правилам отбора
+(ключевым словам TEMP_KEYWORDS и расширениям TRASH_EXT).
+
+Каждый отчёт (одна машина) разбирается в отдельном процессе; в память родителя попадают
+только частичные агрегаты, которые затем сливаются. Отчёт читается потоково, а для
+отбрасывания вложенных элементов сортируется внешней сортировкой (FLEET_SORT_CHUNK записей
+в памяти, остальное - во временных файлах).
+"""
+import os
+import re
+import csv
+import json
+import gzip
+import heapq
+import pickle
+import logging
+import tempfile
+from itertools import islice
+
+from .core import TEMP_KEYWORDS, FLEET_PATTERN_DEPTH, FLEET_SORT_CHUNK, process_pool_context
+
+# Имена папок, которые сворачиваются в шаблон "*/имя", где бы они ни лежали
+COLLAPSE_NAMES = set(TEMP_KEYWORDS) | {'node_modules'}
+REPORT_SUFFIXES = ('.jsonl', '.jsonl.gz', '.ndjson', '.csv', '.csv.gz', '.parquet', '.json', '.snap')
+# Переменные компоненты путей, которые в шаблоне заменяются на "*": хэши и UUID, номера версий
+_HASH_PART = re.compile(r'[0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}|(?=.*\d)[0-9a-f]{8,}', re.IGNORECASE)
+_VERSION = re.compile(r'\d+(?:\.\d+)+')
+
+
+# === ЧТЕНИЕ ОТЧЁТОВ ===
+
+def _open_text(path):
+    if path.lower().endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def _iter_json_object(f, block_size=1 << 16):
+    """
+    Пары (ключ, значение) JSON-объекта верхнего уровня без загрузки файла целиком:
+    значения по одному разбираются JSONDecoder.raw_decode из буфера, который дочитывается блоками.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = '', 0, False
+
+    def peek():
+        # Следующий непробельный символ ('' - конец файла)
+        nonlocal buf, pos, eof
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or eof:
+                return buf[pos:pos + 1]
+            buf, pos = f.read(block_size), 0
+            eof = not buf
+
+    def value():
+        nonlocal buf, pos, eof
+        peek()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+                # Значение в самом конце буфера могло быть обрезано (число) - дочитываем
+                if end < len(buf) or eof:
+                    pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            block = f.read(block_size)
+            eof = not block
+            buf, pos = buf[pos:] + block, 0
+
+    if peek() != '{':
+        raise ValueError("ожидается JSON-объект")
+    pos += 1
+    if peek() == '}':
+        return
+    while True:
+        key = value()
+        if peek() != ':':
+            raise ValueError("ожидается ':' после ключа")
+        pos += 1
+        yield key, value()
+        separator = peek()
+        pos += 1
+        if separator == '}':
+            return
+        if separator != ',':
+            raise ValueError("ожидается ',' или '}'")
+
+
+def iter_report(path):
+    """Записи (host, path, category, type, size) найденных элементов одного отчёта."""
+    name = path.lower()
+    default_host = os.path.basename(path).split('.')[0]
+
+    if name.endswith('.json') and not name.endswith('.jsonl'):
+        # Кэш GUI (cleaner_cache.json): без имени машины - берём имя файла; читается потоково
+        with open(path, 'r', encoding='utf-8') as f:
+            for item_path, info in _iter_json_object(f):
+                yield default_host, item_path, info.get('category', 'Неизвестно'), info.get('type', ''), int(info.get('size', 0))
+        return
+
+    if name.endswith('.snap'):
+        # Бинарный снимок кэша GUI: строки читаются из mmap без разбора всего файла
+        from .snapshot import Snapshot, KIND_ITEMS
+        with Snapshot(path) as snapshot:
+            if snapshot.kind != KIND_ITEMS:
+                return  # Снимок индекса папок - не отчёт
+            for item_path, info in snapshot.items():
+                yield default_host, item_path, info['category'], info['type'], info['size']
+        return
+
+    if name.endswith('.parquet'):
+        import pyarrow.parquet as pq  # Необязательная зависимость, только для Parquet
+        for batch in pq.ParquetFile(path).iter_batches():
+            for row in batch.to_pylist():
+                if row.get('kind', 'item') == 'item':
+                    yield row.get('host') or default_host, row['path'], row.get('category') or '', row.get('type') or '', int(row.get('size') or 0)
+        return
+
+    with _open_text(path) as f:
+        rows = csv.DictReader(f) if name.endswith(('.csv', '.csv.gz')) else (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            if row.get('kind', 'item') == 'item':
+                yield row.get('host') or default_host, row['path'], row.get('category') or '', row.get('type') or '', int(row.get('size') or 0)
+
+
+def _path_parts(path):
+    return [part for part in path.replace('\\', '/').split('/') if part]
+
+
+def _sort_key(record):
+    return record[0], _path_parts(record[1])
+
+
+def _read_run(run):
+    # Один Unpickler на порцию: записи писались одним Pickler с общей таблицей повторов
+    unpickler = pickle.Unpickler(run)
+    while True:
+        try:
+            yield unpickler.load()
+        except EOFError:
+            return
+
+
+def _sorted_records(records, chunk_size=FLEET_SORT_CHUNK):
+    """
+    Записи по (машина, компоненты пути) внешней сортировкой: в памяти не больше chunk_size
+    записей, отсортированные порции сбрасываются во временные файлы и сливаются heapq.merge.
+    """
+    records = iter(records)
+    runs = []
+    try:
+        while True:
+            chunk = sorted(islice(records, chunk_size), key=_sort_key)
+            if not runs and len(chunk) < chunk_size:
+                yield from chunk  # Отчёт целиком поместился в одну порцию
+                return
+            if not chunk:
+                break
+            run = tempfile.TemporaryFile()
+            pickler = pickle.Pickler(run, pickle.HIGHEST_PROTOCOL)
+            for record in chunk:
+                pickler.dump(record)
+            run.seek(0)
+            runs.append(run)
+        yield from heapq.merge(*(_read_run(run) for run in runs), key=_sort_key)
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _top_level(records):
+    """
+    Убирает элементы, вложенные в другие элементы той же машины (папка целиком и файл в ней),
+    чтобы место не считалось дважды. Сортировка по компонентам пути ставит потомков сразу за предком,
+    поэтому достаточно помнить только последний оставленный элемент.
+    """
+    kept_host, kept_parts = None, None
+    for record in _sorted_records(records):
+        parts = _path_parts(record[1])
+        if record[0] == kept_host and kept_parts is not None and parts[:len(kept_parts)] == kept_parts:
+            continue
+        kept_host, kept_parts = record[0], parts
+        yield record
+
+
+# === ШАБЛОНЫ И ПРАВИЛА ===
+
+def _normalize_part(part):
+    """Компонент пути для шаблона: хэши и числа -> "*", номера версий внутри имени -> "*" (jdk-17.0.2 -> jdk-*)."""
+    if part.isdigit() or _HASH_PART.fullmatch(part):
+        return '*'
+    return _VERSION.sub('*', part)
+
+
+def path_pattern(path, depth=FLEET_PATTERN_DEPTH, item_type=None):
+    """
+    Шаблон пути для сводки: домашняя папка -> "~"; мусорная папка неглубоко от корня ->
+    "~/.cache/pip", глубже -> "*/node_modules"; прочее - первые depth компонентов ("~/Downloads").
+    Шаблон строится только из папок (у файла имя отбрасывается), а версии и хэши в
+    компонентах заменяются на "*", чтобы одинаковые места разных машин сливались.
+    """
+    parts = _path_parts(path)
+    if item_type in ('file', 'trash_file'):
+        parts = parts[:-1]
+    if len(parts) >= 2 and parts[0].lower() == 'home':
+        parts = ['~'] + parts[2:]
+    elif len(parts) >= 3 and parts[0].endswith(':') and parts[1].lower() == 'users':
+        parts = ['~'] + parts[3:]
+    prefix = '/' if path.startswith('/') and parts[:1] != ['~'] else ''
+    parts = [part if part == '~' else _normalize_part(part) for part in parts]
+
+    for k, part in enumerate(parts):
+        if part.lower() in COLLAPSE_NAMES:
+            if k < depth:
+                return prefix + '/'.join(parts[:k + 2])
+            return '*/' + part
+    return prefix + '/'.join(parts[:depth])
+
+
+def matched_rule(path, item_type):
+    """Правило отбора, по которому найден элемент: ключевое слово папки или расширение файла."""
+    if item_type == 'trash_dir':
+        dir_name = os.path.basename(path.replace('\\', '/').rstrip('/')).lower()
+        keyword = next((kw for kw in TEMP_KEYWORDS if kw in dir_name), None)
+        return f"папка: {keyword}" if keyword else "папка: AppData"
+    if item_type == 'trash_file':
+        return f"расширение: {os.path.splitext(path)[1].lower()}"
+    return "старые файлы"
+
+
+# === АГРЕГАЦИЯ ===
+
+def _new_summary():
+    return {'reports': 0, 'hosts': set(), 'items': 0, 'total': 0, 'categories': {}, 'patterns': {}, 'rules': {}}
+
+
+def _add(table, key, host, size):
+    entry = table.get(key)
+    if entry is None:
+        entry = table[key] = [0, 0, set()]
+    entry[0] += size
+    entry[1] += 1
+    entry[2].add(host)
+
+
+def summarize_report(path):
+    """
+    Частичная сводка по одному отчёту (выполняется в процессе-воркере). Отчёт, который не
+    удалось дочитать, не входит в сводку целиком: ни в число отчётов, ни в суммы.
+    """
+    summary = _new_summary()
+    try:
+        for host, item_path, category, item_type, size in _top_level(iter_report(path)):
+            summary['hosts'].add(host)
+            summary['items'] += 1
+            summary['total'] += size
+            _add(summary['categories'], category, host, size)
+            _add(summary['patterns'], path_pattern(item_path, item_type=item_type), host, size)
+            _add(summary['rules'], matched_rule(item_path, item_type), host, size)
+    except Exception as e:
+        logging.error(f"Ошибка чтения отчёта {path}: {e}")
+        return _new_summary()
+    summary['reports'] = 1
+    return summary
+
+
+def merge_summaries(target, part):
+    """Вливает частичную сводку part в target."""
+    target['reports'] += part['reports']
+    target['hosts'] |= part['hosts']
+    target['items'] += part['items']
+    target['total'] += part['total']
+    for table in ('categories', 'patterns', 'rules'):
+        for key, (size, count, hosts) in part[table].items():
+            entry = target[table].get(key)
+            if entry is None:
+                target[table][key] = [size, count, set(hosts)]
+            else:
+                entry[0] += size
+                entry[1] += count
+                entry[2] |= hosts
+    return target
+
+
+def find_reports(directory):
+    """Файлы отчётов в папке (без рекурсии)."""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(REPORT_SUFFIXES) and not name.startswith('.')
+    )
+
+
+def aggregate_reports(paths, processes=None):
+    """Сводка по списку отчётов; отчёты разбираются параллельно в processes процессах."""
+    summary = _new_summary()
+    if processes == 1 or len(paths) <= 1:
+        for path in paths:
+            merge_summaries(summary, summarize_report(path))
+        return summary
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=processes or None, mp_context=process_pool_context()) as pool:
+        for part in pool.map(summarize_report, paths):
+            merge_summaries(summary, part)
+    return summary
+
+
+def top_entries(table, n):
+    """n крупнейших записей таблицы: [(ключ, байты, элементов, машин)]."""
+    top = heapq.nlargest(n, table.items(), key=lambda kv: kv[1][0])
+    return [(key, size, count, len(hosts)) for key, (size, count, hosts) in top]
+
+
+def summary_to_dict(summary, top=20):
+    """Сводка в JSON-совместимом виде."""
+    def rows(table):
+        return [{'key': key, 'bytes': size, 'items': count, 'hosts': hosts}
+                for key, size, count, hosts in top_entries(summary[table], top)]
+    return {
+        'reports': summary['reports'],
+        'hosts': len(summary['hosts']),
+        'items': summary['items'],
+        'reclaimable_bytes': summary['total'],
+        'top_categories': rows('categories'),
+        'top_patterns': rows('patterns'),
+        'rules': rows('rules'),
+    }
+
+
+def format_summary(summary, top=20):
+    """Текстовый отчёт для консоли."""
+    from .core import human
+
+    lines = [
+        f"Отчётов: {summary['reports']}, машин: {len(summary['hosts'])}, элементов: {summary['items']}",
+        f"Можно освободить: {human(summary['total'])}",
+    ]
+    for title, table in (("Категории", 'categories'), ("Шаблоны путей", 'patterns'), ("Правила отбора", 'rules')):
+        lines.append("")
+        lines.append(f"{title}:")
+        for key, size, count, hosts in top_entries(summary[table], top):
+            lines.append(f"  {human(size):>12}  {count:>8} эл.  {hosts:>5} маш.  {key}")
+    return "\n".join(lines)
@@ -0,0 +1,1735 @@
+"""Графический интерфейс (PyQt6). Импортируется лениво, только при запуске окна."""
+import os
+import sys
+import re
+import time
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from PyQt6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+    QLabel, QPushButton, QLineEdit, QTreeWidget, QTreeWidgetItem, QTreeView,
+    QMessageBox, QSplitter, QProgressBar, QDialog, QListWidget, QListWidgetItem,
+    QHeaderView, QCheckBox, QFrame, QTabWidget, QSpinBox, QFileDialog, QMenu
+)
+from PyQt6.QtCore import (
+    Qt, QThread, QTimer, pyqtSignal, QObject, QEvent, QRectF, QAbstractItemModel, QModelIndex
+)
+from PyQt6.QtGui import QFont, QColor, QPalette, QPainter, QPen, QBrush
+
+from .core import (
+    DAYS_OLD, MIN_ITEM_SIZE, MERGE_RATIO, MERGE_RATIO_TEMP, TRASH_DIR_MIN_SIZE, APPDATA_DIR_MIN_SIZE, TRASH_EXT, USE_TRASH, TRASH_RETENTION_DAYS, TRASH_AUTO_PURGE, human, iter_cache_chunks, save_cache,
+    save_index, load_index, compute_treemap_layout
+)
+from .scanner import Scanner, passes_trash_floor
+from .selection import Selection
+from .results import ResultSet, open_cached_results
+
+# === СТИЛЬ & ЦВЕТОВАЯ СХЕМА (MODERN DARK MODE) ===
+STYLE_SHEET = """
+    QMainWindow { background-color: #1f2833; }
+    QWidget { background-color: #1f2833; color: #f2f2f2; font-family: Inter; }
+    QLabel#TitleLabel { color: #66fcf1; font-size: 24pt; font-weight: bold; }
+    QLabel { font-size: 10pt; }
+
+    QTreeView {
+        background-color: #2c3846;
+        color: #f2f2f2;
+        border: 1px solid #4a5a6b;
+        selection-background-color: #0b7c7c;
+        selection-color: #ffffff;
+        padding: 5px;
+        font-size: 10pt;
+        border-radius: 6px;
+    }
+    QHeaderView::section {
+        background-color: #3e4a59;
+        color: #66fcf1;
+        padding: 8px;
+        border: 1px solid #4a5a6b;
+        font-weight: bold;
+    }
+
+    QPushButton {
+        background-color: #45a29e;
+        color: #ffffff;
+        border-radius: 8px;
+        padding: 10px 15px;
+        font-weight: bold;
+        font-size: 10pt;
+        border: none;
+    }
+    QPushButton:hover {
+        background-color: #5ab6b2;
+    }
+    QPushButton#StopButton { background-color: #c53c3c; }
+    QPushButton#StopButton:hover { background-color: #e54b4b; }
+    QPushButton#DeleteButton { background-color: #a31c1c; }
+    QPushButton#DeleteButton:hover { background-color: #c92222; }
+    QPushButton#PreviewButton { background-color: #1f78c1; }
+    QPushButton#PreviewButton:hover { background-color: #2b8ce8; }
+
+    QLineEdit, QComboBox, QSpinBox {
+        background-color: #344354;
+        color: #f2f2f2;
+        border: 1px solid #4a5a6b;
+        padding: 6px;
+        border-radius: 4px;
+    }
+    QProgressBar {
+        border: 1px solid #4a5a6b;
+        border-radius: 5px;
+        text-align: center;
+        background-color: #344354;
+    }
+    QProgressBar::chunk {
+        background-color: #66fcf1;
+    }
+    QTabWidget::pane { border: 1px solid #4a5a6b; border-radius: 6px; }
+    QTabBar::tab {
+        background-color: #3e4a59;
+        color: #f2f2f2;
+        padding: 8px 16px;
+        border-top-left-radius: 6px;
+        border-top-right-radius: 6px;
+    }
+    QTabBar::tab:selected { background-color: #45a29e; color: #ffffff; }
+"""
+
+# === GUI (PyQt6) ===
+
+# Цвета плиток карты диска (в тон основной схеме)
+TREEMAP_COLORS = ['#45a29e', '#1f78c1', '#0b7c7c', '#66fcf1', '#3e7cb1', '#2b8ce8', '#5ab6b2', '#4a6fa5']
+
+class TreemapWidget(QWidget):
+    """Плиточная карта (squarified treemap) одного уровня индекса каталогов."""
+
+    node_activated = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(300, 200)
+        self.index = None
+        self.node_id = -1
+        self.layout_items = []
+        self._generation = 0
+
+    def set_node(self, index, node_id):
+        """Показывает подпапки node_id. Раскладка считается в фоновом потоке."""
+        self.index = index
+        self.node_id = node_id
+        self.request_layout()
+
+    def request_layout(self):
+        """Запускает пересчёт раскладки; устаревшие результаты отбрасываются по номеру поколения."""
+        if self.index is None or self.node_id < 0:
+            return
+        self._generation += 1
+        generation = self._generation
+        index, node_id = self.index, self.node_id
+        width, height = self.width(), self.height()
+
+        def layout_worker():
+            try:
+                items = compute_treemap_layout(index, node_id, width, height)
+            except Exception as e:
+                logging.error(f"Ошибка раскладки карты диска: {e}")
+                items = []
+            QApplication.instance().postEvent(self, TreemapLayoutEvent(generation, items))
+
+        threading.Thread(target=layout_worker, daemon=True).start()
+
+    def customEvent(self, event):
+        """Принимает готовую раскладку из фонового потока."""
+        if event.type() == TreemapLayoutEvent.EVENT_TYPE and event.generation == self._generation:
+            self.layout_items = event.items
+            self.update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.request_layout()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#2c3846"))
+        painter.setPen(QPen(QColor("#1f2833"), 1))
+        metrics = painter.fontMetrics()
+
+        for i, (node_id, label, size, (x, y, w, h)) in enumerate(self.layout_items):
+            rect = QRectF(x, y, w, h)
+            color = QColor(TREEMAP_COLORS[i % len(TREEMAP_COLORS)] if node_id >= 0 else "#4a5a6b")
+            painter.setBrush(QBrush(color))
+            painter.drawRect(rect)
+
+            # Подписываем только плитки, в которые помещается текст
+            if w > 60 and h > 2 * metrics.height():
+                painter.setPen(QColor("#ffffff"))
+                text_rect = rect.adjusted(4, 2, -4, -2)
+                painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop,
+                                 f"{label}\n{human(size)}")
+                painter.setPen(QPen(QColor("#1f2833"), 1))
+
+        painter.end()
+
+    def mousePressEvent(self, event):
+        """Клик по плитке - переход внутрь папки."""
+        pos = event.position()
+        for node_id, _, _, (x, y, w, h) in self.layout_items:
+            if node_id >= 0 and x <= pos.x() < x + w and y <= pos.y() < y + h:
+                self.node_activated.emit(node_id)
+                return
+
+
+class UsageView(QWidget):
+    """Вкладка 'Занятое место': дерево крупнейших папок и карта текущего уровня."""
+
+    # Сколько подпапок показывать в дереве на один уровень
+    MAX_TREE_CHILDREN = 500
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.index = None
+        self.current_node = -1
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        nav_frame = QFrame()
+        nav_layout = QHBoxLayout(nav_frame)
+        nav_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.up_btn = QPushButton("Вверх")
+        self.up_btn.clicked.connect(self.go_up)
+        self.up_btn.setEnabled(False)
+
+        self.path_label = QLabel("Данные появятся после сканирования")
+
+        nav_layout.addWidget(self.up_btn)
+        nav_layout.addWidget(self.path_label)
+        nav_layout.addStretch(1)
+        layout.addWidget(nav_frame)
+
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+
+        self.dir_tree = QTreeWidget()
+        self.dir_tree.setColumnCount(2)
+        self.dir_tree.setHeaderLabels(["Папка", "Размер"])
+        self.dir_tree.setColumnWidth(0, 350)
+        self.dir_tree.itemExpanded.connect(self._populate_item)
+        self.dir_tree.itemClicked.connect(lambda item, _: self._on_tree_clicked(item))
+
+        self.treemap = TreemapWidget()
+        self.treemap.node_activated.connect(self.show_node)
+
+        splitter.addWidget(self.dir_tree)
+        splitter.addWidget(self.treemap)
+        splitter.setStretchFactor(1, 1)
+        layout.addWidget(splitter)
+
+    def set_index(self, index):
+        """Подключает новый индекс каталогов (после сканирования)."""
+        self.index = index
+        self.dir_tree.clear()
+        if index is None or not index.roots:
+            return
+
+        self.dir_tree.addTopLevelItems([self._make_item(r) for r in index.roots])
+        self.show_node(index.roots[0])
+
+    def _make_item(self, node_id):
+        """Элемент дерева; дети добавляются лениво при раскрытии."""
+        item = QTreeWidgetItem([self.index.name_of(node_id), human(self.index.total_sizes[node_id])])
+        item.setData(0, Qt.ItemDataRole.UserRole, node_id)
+        if self.index.children[node_id]:
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+        return item
+
+    def _populate_item(self, item):
+        """Заполняет уровень дерева при первом раскрытии."""
+        if item.childCount() > 0:
+            return
+        node_id = item.data(0, Qt.ItemDataRole.UserRole)
+        if node_id is None or node_id < 0:
+            return
+
+        kids = self.index.children_of(node_id)
+        item.addChildren([self._make_item(k) for k in kids[:self.MAX_TREE_CHILDREN]])
+        if len(kids) > self.MAX_TREE_CHILDREN:
+            rest = sum(self.index.total_sizes[k] for k in kids[self.MAX_TREE_CHILDREN:])
+            more = QTreeWidgetItem([f"... ещё {len(kids) - self.MAX_TREE_CHILDREN} папок", human(rest)])
+            more.setData(0, Qt.ItemDataRole.UserRole, -1)
+            item.addChild(more)
+
+    def _on_tree_clicked(self, item):
+        node_id = item.data(0, Qt.ItemDataRole.UserRole)
+        if node_id is not None and node_id >= 0:
+            self.show_node(node_id)
+
+    def show_node(self, node_id):
+        """Переход к папке: обновляем подпись и карту."""
+        if self.index is None:
+            return
+        self.current_node = node_id
+        self.path_label.setText(f"{self.index.paths[node_id]}  —  {human(self.index.total_sizes[node_id])}")
+        self.up_btn.setEnabled(self.index.parents[node_id] >= 0)
+        self.treemap.set_node(self.index, node_id)
+
+    def go_up(self):
+        if self.index is not None and self.current_node >= 0:
+            parent = self.index.parents[self.current_node]
+            if parent >= 0:
+                self.show_node(parent)
+
+
+class ScanWorker(QObject):
+    """Qt-обёртка над Scanner: выполняется в QThread и передаёт результаты сигналами."""
+
+    # Сигналы для связи с GUI
+    progress_update = pyqtSignal(str)
+    scan_complete = pyqtSignal(dict)
+    index_ready = pyqtSignal(object)
+
+    def __init__(self, days_old, processes=None, throttle=None):
+        super().__init__()
+        self.scanner = Scanner(days_old, on_progress=self.progress_update.emit, processes=processes, throttle=throttle)
+
+    @property
+    def dir_index(self):
+        return self.scanner.dir_index
+
+    def stop(self):
+        """Установка флага остановки."""
+        self.scanner.stop()
+
+    def run_scan(self):
+        results = self.scanner.run_scan()
+        if results and self.scanner.dir_index is not None:
+            self.index_ready.emit(self.scanner.dir_index)
+        self.scan_complete.emit(results)
+
+
+_CATEGORY_LABEL_RE = re.compile(r'\((.+?)\)')
+_category_labels = {}  # категория -> короткая метка для названия (категорий единицы, строк - сотни тысяч)
+
+def _category_label(category):
+    label = _category_labels.get(category)
+    if label is None:
+        kw_match = _CATEGORY_LABEL_RE.search(category)
+        label = _category_labels[category] = kw_match.group(1) if kw_match else ''
+    return label
+
+
+def _display_name(path, category):
+    """Название элемента: для мусора добавляем короткую метку категории."""
+    name = os.path.basename(path) or path
+    return f"{name} {_category_label(category)}" if 'Мусор' in category else name
+
+
+class ResultDisplay:
+    """
+    Готовые строки строки таблицы для одного результата: считаются, когда строка впервые
+    показывается, и хранятся в ограниченном кэше модели (см. ResultsModel), а не для всех строк.
+    size и category - значения, по которым строки были посчитаны (при изменении пересчитываются).
+    """
+    __slots__ = ('path', 'size', 'category', 'name', 'size_text', 'size_tip', 'count_text')
+
+    def __init__(self, path, info):
+        self.path = path
+        self.size = info['size']
+        self.category = info['category']
+        self.name = _display_name(path, self.category)
+
+        self.size_text = human(self.size)
+        # Размер в таблице - место на диске; видимый размер показываем, если он заметно другой
+        # (разреженные файлы, жёсткие ссылки, учтённые в другом месте)
+        apparent_text = human(info.get('apparent_size', self.size))
+        self.size_tip = f"Видимый размер: {apparent_text}, на диске: {self.size_text}" if apparent_text != self.size_text else None
+        self.count_text = str(info['count']) if info.get('count', 0) > 0 else ''
+
+
+class ResultsModel(QAbstractItemModel):
+    """
+    Модель таблицы найденного поверх ResultSet: видимые строки - массив номеров строк набора
+    (после фильтра и сортировки), а путь, размер и подписи строки читаются, только когда
+    представление её рисует. Строки отображения хранятся в кэше на DISPLAY_CACHE строк,
+    поэтому память растёт с числом просмотренных строк, а не с размером результатов.
+
+    У папок один дочерний элемент - пример содержимого; он ищется при первом раскрытии
+    (fetchMore), а не для каждой строки. internalId дочернего элемента - номер строки
+    набора + 1 (0 - строка верхнего уровня).
+    """
+
+    COLUMNS = ["Имя", "Путь", "Категория", "Размер", "Файлов"]
+    DISPLAY_CACHE = 4096
+
+    checks_changed = pyqtSignal()  # Изменился выбор (чекбоксы)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.results = ResultSet()
+        self.selection = Selection(self.results.size)
+        self.visible = array('i')       # позиция в таблице -> номер строки набора
+        self._displays = OrderedDict()  # номер строки -> ResultDisplay (последние показанные)
+        self._samples = {}              # номер строки папки -> путь примера содержимого или None
+        self._positions = {}            # номер строки -> позиция (только для родителей примеров)
+
+    # --- Данные ---
+
+    def set_results(self, results):
+        """Новый набор результатов: выбор сбрасывается, таблица пуста до set_visible."""
+        self.beginResetModel()
+        self.results = results
+        self.selection.reset(len(results), results.size)
+        self.visible = array('i')
+        self._clear_caches()
+        self.endResetModel()
+
+    def set_visible(self, rows):
+        """Показывает строки набора в заданном порядке (после фильтра или сортировки)."""
+        self.beginResetModel()
+        self.selection.grow(len(self.results))
+        self.visible = array('i', rows)
+        self._samples.clear()
+        self._positions.clear()
+        self.endResetModel()
+
+    def append_visible(self, rows):
+        """Дописывает строки в конец таблицы (пачка из кэша), не перестраивая остальные."""
+        rows = list(rows)
+        if not rows:
+            return
+        self.selection.grow(len(self.results))
+        first = len(self.visible)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.visible.extend(rows)
+        self.endInsertRows()
+
+    def drop_rows(self, rows):
+        """Убирает строки набора из таблицы (их уже нет на диске или они удалены)."""
+        rows = set(rows)
+        positions = [pos for pos, row in enumerate(self.visible) if row in rows]
+        # Непрерывные участки удаляются с конца, чтобы позиции впереди не сдвигались
+        while positions:
+            last = first = positions.pop()
+            while positions and positions[-1] == first - 1:
+                first = positions.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.visible[first:last + 1]
+            self._positions.clear()
+            self.endRemoveRows()
+        for row in rows:
+            self._displays.pop(row, None)
+            self._samples.pop(row, None)
+
+    def remove_rows(self, rows):
+        """Удаляет строки из набора и таблицы. Возвращает dict путь -> info удалённых строк."""
+        removed = {}
+        for row in rows:
+            item = self.results.remove(row)
+            if item is not None:
+                self.selection.set(row, False)
+                removed[item[0]] = item[1]
+        self.drop_rows(rows)
+        return removed
+
+    def refresh_rows(self, rows=()):
+        """Строки изменились (размер, выбор) - перерисовать."""
+        for row in rows:
+            self._displays.pop(row, None)
+        if self.visible:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.visible) - 1, len(self.COLUMNS) - 1))
+
+    def _clear_caches(self):
+        self._displays.clear()
+        self._samples.clear()
+        self._positions.clear()
+
+    def display(self, row):
+        """Строки отображения строки набора (из кэша, если строка недавно показывалась)."""
+        display = self._displays.get(row)
+        if display is not None:
+            self._displays.move_to_end(row)
+            return display
+        display = self._displays[row] = ResultDisplay(self.results.path(row), self.results.info(row))
+        if len(self._displays) > self.DISPLAY_CACHE:
+            self._displays.popitem(last=False)
+        return display
+
+    def row_of(self, index):
+        """Номер строки набора для индекса верхнего уровня (None для примера содержимого)."""
+        if not index.isValid() or index.internalId() != 0:
+            return None
+        return self.visible[index.row()]
+
+    def _position_of(self, row):
+        pos = self._positions.get(row)
+        if pos is None:
+            pos = self._positions[row] = self.visible.index(row)
+        return pos
+
+    def _is_dir(self, row):
+        return self.results.item_type(row) in ('dir', 'trash_dir') and self.results.count(row) > 0
+
+    # --- QAbstractItemModel ---
+
+    def index(self, r, column, parent=QModelIndex()):
+        if not parent.isValid():
+            if 0 <= r < len(self.visible) and 0 <= column < len(self.COLUMNS):
+                return self.createIndex(r, column, 0)
+        elif parent.internalId() == 0 and r == 0:
+            return self.createIndex(0, column, self.visible[parent.row()] + 1)
+        return QModelIndex()
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid() or index.internalId() == 0:
+            return QModelIndex()
+        return self.createIndex(self._position_of(index.internalId() - 1), 0, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.visible)
+        if parent.internalId() == 0 and parent.column() == 0:
+            return 1 if self._samples.get(self.visible[parent.row()]) else 0
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.visible)
+        if parent.internalId() != 0 or parent.column() != 0:
+            return False
+        row = self.visible[parent.row()]
+        if row in self._samples:
+            return self._samples[row] is not None
+        return self._is_dir(row)
+
+    def canFetchMore(self, parent):
+        row = self.row_of(parent)
+        return row is not None and row not in self._samples and self._is_dir(row)
+
+    def fetchMore(self, parent):
+        """При раскрытии папки ищет пример содержимого (первый файл в папке)."""
+        row = self.row_of(parent)
+        if row is None:
+            return
+        sample_path = None
+        try:
+            for root_dir, _, files in os.walk(self.results.path(row)):
+                if files:
+                    sample_path = os.path.join(root_dir, files[0])
+                    break
+        except Exception:
+            pass
+        if sample_path:
+            self._positions[row] = parent.row()
+            self.beginInsertRows(parent, 0, 0)
+            self._samples[row] = sample_path
+            self.endInsertRows()
+        else:
+            self._samples[row] = None
+            self.layoutChanged.emit()  # Индикатор раскрытия больше не нужен
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if index.internalId() != 0:
+            if role == Qt.ItemDataRole.DisplayRole:
+                sample_path = self._samples.get(index.internalId() - 1)
+                return ["... (Пример содержимого)", sample_path, 'Внутри папки', '?', ''][column]
+            return None
+
+        row = self.visible[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            display = self.display(row)
+            return (display.name, display.path, display.category, display.size_text, display.count_text)[column]
+        if role == Qt.ItemDataRole.CheckStateRole and column == 0:
+            return Qt.CheckState.Checked if self.selection.is_selected(row) else Qt.CheckState.Unchecked
+        if role == Qt.ItemDataRole.ToolTipRole and column == 3:
+            return self.display(row).size_tip
+        if role == Qt.ItemDataRole.UserRole:
+            return row
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        row = self.row_of(index)
+        if row is None or role != Qt.ItemDataRole.CheckStateRole or index.column() != 0:
+            return False
+        checked = Qt.CheckState(value) == Qt.CheckState.Checked
+        if self.selection.set(row, checked):
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+            self.checks_changed.emit()
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        if index.internalId() != 0:
+            return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsUserCheckable
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+
+class CleanerApp(QMainWindow):
+    def __init__(self, processes=None, throttle=None):
+        super().__init__()
+        self.setWindowTitle("Smart File Cleaner (PyQt6)")
+        self.setGeometry(100, 100, 1500, 900)
+        self.setStyleSheet(STYLE_SHEET)
+
+        self.model = ResultsModel(self)  # найденное (ResultSet), видимые строки и выбор
+        self.model.checks_changed.connect(self.update_selection_count)
+        self._load_generation = 0   # номер фоновой загрузки кэша (устаревшие события игнорируются)
+        self.scanner_thread = None
+        self.scanner_worker = None
+        self.scan_processes = processes
+        # Параметры щадящего режима: регулятор создаётся заново для каждого сканирования
+        self.throttle_config = throttle.config() if throttle is not None else {}
+        self.throttle_default = throttle is not None
+        self._reevaluate_generation = 0
+        self._reevaluate_lock = threading.Lock()
+        self._cache_floors = False  # Показаны результаты из кэша: пороги размера - фильтром таблицы
+        self._save_generation = 0   # номер последнего запроса сохранения кэша
+        self._save_lock = threading.Lock()
+        self._last_trashed = None   # (записи корзины, удалённые элементы) - для отмены
+
+        self._setup_ui()
+        self._load_data()
+        if TRASH_AUTO_PURGE:
+            self._start_trash_purge()
+
+    @property
+    def results(self):
+        return self.model.results
+
+    @property
+    def selection(self):
+        return self.model.selection
+
+    def _setup_ui(self):
+        """Настройка основного интерфейса."""
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        main_layout = QVBoxLayout(central_widget)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        main_layout.setSpacing(15)
+
+        # Заголовок
+        title_label = QLabel("Smart File Cleaner")
+        title_label.setObjectName("TitleLabel")
+        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        main_layout.addWidget(title_label)
+
+        # Панель управления (Кнопки + Прогресс)
+        control_frame = QFrame()
+        control_layout = QHBoxLayout(control_frame)
+        control_layout.setSpacing(15)
+
+        self.scan_btn = QPushButton("Начать сканирование")
+        self.scan_btn.clicked.connect(self.start_scan)
+
+        self.stop_btn = QPushButton("Стоп")
+        self.stop_btn.setObjectName("StopButton")
+        self.stop_btn.clicked.connect(self.stop_scan)
+        self.stop_btn.setEnabled(False)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFixedHeight(25)
+        self.progress_bar.setVisible(False)
+
+        self.status_label = QLabel("Готов к сканированию")
+        self.status_label.setFixedWidth(300)
+
+        control_layout.addWidget(self.scan_btn)
+        control_layout.addWidget(self.stop_btn)
+        control_layout.addWidget(self.progress_bar)
+        control_layout.addWidget(self.status_label)
+        control_layout.setStretch(2, 1) # Прогресс-бар занимает больше места
+
+        self.export_btn = QPushButton("Экспорт...")
+        self.export_btn.clicked.connect(self.export_report)
+        control_layout.addWidget(self.export_btn)
+
+        self.growth_btn = QPushButton("Рост...")
+        self.growth_btn.setToolTip("Что выросло или появилось с прошлого сканирования")
+        self.growth_btn.clicked.connect(self.show_growth)
+        control_layout.addWidget(self.growth_btn)
+
+        main_layout.addWidget(control_frame)
+
+        # Фильтры и Поиск
+        filter_frame = QFrame()
+        filter_layout = QHBoxLayout(filter_frame)
+        filter_layout.setContentsMargins(0, 0, 0, 0)
+        filter_layout.setSpacing(10)
+
+        # Поиск
+        filter_layout.addWidget(QLabel("Поиск:"))
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Фильтрация по имени или пути...")
+        self.search_input.textChanged.connect(self.filter_tree)
+        filter_layout.addWidget(self.search_input)
+
+        # Расширения
+        filter_layout.addWidget(QLabel("Расширения (через пробел):"))
+        self.ext_input = QLineEdit()
+        self.ext_input.setPlaceholderText(".zip .iso")
+        self.ext_input.setFixedWidth(150)
+        self.ext_input.textChanged.connect(self.filter_tree)
+        filter_layout.addWidget(self.ext_input)
+
+        # Чекбокс для мусорных расширений
+        self.trash_ext_checkbox = QCheckBox("Вкл. мусорные (.log, .tmp, etc.)")
+        self.trash_ext_checkbox.setChecked(True)
+        self.trash_ext_checkbox.stateChanged.connect(self.filter_tree)
+        filter_layout.addWidget(self.trash_ext_checkbox)
+
+        main_layout.addWidget(filter_frame)
+
+        # Пороги отбора: меняются без пересканирования (по данным последнего скана в памяти)
+        settings_frame = QFrame()
+        settings_layout = QHBoxLayout(settings_frame)
+        settings_layout.setContentsMargins(0, 0, 0, 0)
+        settings_layout.setSpacing(10)
+
+        self.days_spin = self._make_spin(settings_layout, "Старше (дней):", 1, 3650, DAYS_OLD)
+        self.min_size_spin = self._make_spin(settings_layout, "Мин. размер (MB):", 0, 1024 * 1024, MIN_ITEM_SIZE // (1024 * 1024))
+        self.merge_spin = self._make_spin(settings_layout, "Папка целиком от (% старых):", 10, 100, round(MERGE_RATIO * 100))
+        self.merge_temp_spin = self._make_spin(settings_layout, "для временных (%):", 10, 100, round(MERGE_RATIO_TEMP * 100))
+        self.trash_dir_spin = self._make_spin(settings_layout, "Мусорные папки от (MB):", 0, 1024 * 1024, TRASH_DIR_MIN_SIZE // (1024 * 1024))
+        self.appdata_dir_spin = self._make_spin(settings_layout, "AppData от (MB):", 0, 1024 * 1024, APPDATA_DIR_MIN_SIZE // (1024 * 1024))
+        settings_layout.addStretch(1)
+
+        self.throttle_checkbox = QCheckBox("Щадящий режим")
+        self.throttle_checkbox.setChecked(self.throttle_default)
+        self.throttle_checkbox.setToolTip("Низкий приоритет CPU и диска, замедление при нагрузке на диск")
+        settings_layout.addWidget(self.throttle_checkbox)
+
+        # Пересчёт запускается после паузы во вводе, чтобы не считать на каждый шаг спинбокса
+        self._reevaluate_timer = QTimer(self)
+        self._reevaluate_timer.setSingleShot(True)
+        self._reevaluate_timer.setInterval(250)
+        self._reevaluate_timer.timeout.connect(self.reevaluate_results)
+
+        main_layout.addWidget(settings_frame)
+
+        # Таблица: представление над ResultsModel (строки читаются, только когда видны)
+        self.tree = QTreeView()
+        self.tree.setModel(self.model)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setSortingEnabled(False) # Отключаем стандартную сортировку
+        self.tree.header().setSectionsClickable(True)
+        self.tree.header().setSortIndicatorShown(True)
+
+        # *** ИСПОЛЬЗУЕМ РУЧНУЮ СОРТИРОВКУ ***
+        self.tree.header().sectionClicked.connect(self.on_header_clicked)
+        self.current_sort_column = 3 # Сортировка по размеру по умолчанию
+        self.current_sort_order = Qt.SortOrder.DescendingOrder
+
+        self.tree.header().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.tree.header().setStretchLastSection(False)
+
+        # Установка ширины колонок
+        self.tree.columnWidths = [300, 450, 180, 120, 80]
+        for i, width in enumerate(self.tree.columnWidths):
+            self.tree.setColumnWidth(i, width)
+
+        self.tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.tree.customContextMenuRequested.connect(self._show_tree_menu)
+        self.tree.doubleClicked.connect(self.toggle_item_check)
+
+        # Вкладки: список найденного и карта занятого места
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.tree, "Найденное")
+        self.usage_view = UsageView()
+        self.tabs.addTab(self.usage_view, "Занятое место")
+        main_layout.addWidget(self.tabs)
+
+        # Нижняя панель с кнопками действий и статистикой
+        action_frame = QFrame()
+        action_layout = QHBoxLayout(action_frame)
+        action_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.select_all_btn = QPushButton("Выделить всё")
+        self.select_all_btn.clicked.connect(lambda: self._set_selection_state(True))
+
+        self.unselect_all_btn = QPushButton("Снять всё")
+        self.unselect_all_btn.clicked.connect(lambda: self._set_selection_state(False))
+
+        self.preview_btn = QPushButton("Предпросмотр")
+        self.preview_btn.setObjectName("PreviewButton")
+        self.preview_btn.clicked.connect(self.show_preview_dialog)
+
+        self.delete_btn = QPushButton("Удалить выбранное")
+        self.delete_btn.setObjectName("DeleteButton")
+        self.delete_btn.clicked.connect(self.delete_selected_items)
+        self.delete_btn.setEnabled(False) # Изначально отключена
+
+        # Режим удаления: перенос в корзину (мгновенно, можно отменить) или окончательное удаление
+        self.compress_btn = QPushButton("Сжать")
+        self.compress_btn.setToolTip("Сжать выбранные файлы и папки на месте вместо удаления (для холодных данных)")
+        self.compress_btn.clicked.connect(self.compress_selected_items)
+        self.compress_btn.setEnabled(False)
+
+        self.trash_checkbox = QCheckBox("В корзину")
+        self.trash_checkbox.setChecked(USE_TRASH)
+        self.trash_checkbox.setToolTip(
+            f"Перенос в корзину без копирования; окончательно удаляется через {TRASH_RETENTION_DAYS} дн. "
+            f"при очистке (--purge-trash{' или автоматически' if TRASH_AUTO_PURGE else ''})")
+
+        self.undo_btn = QPushButton("Отменить удаление")
+        self.undo_btn.clicked.connect(self.undo_last_trash)
+        self.undo_btn.setEnabled(False)
+
+        self.selection_status_label = QLabel("Выбрано: 0 | Общий размер: 0 B")
+        self.selection_status_label.setFont(QFont("Inter", 10, QFont.Weight.Bold))
+        self.selection_status_label.setMinimumWidth(300)
+
+        action_layout.addWidget(self.select_all_btn)
+        action_layout.addWidget(self.unselect_all_btn)
+        action_layout.addSpacing(30)
+        action_layout.addWidget(self.preview_btn)
+        action_layout.addWidget(self.delete_btn)
+        action_layout.addWidget(self.compress_btn)
+        action_layout.addWidget(self.trash_checkbox)
+        action_layout.addWidget(self.undo_btn)
+        action_layout.addStretch(1)
+        action_layout.addWidget(self.selection_status_label)
+
+        main_layout.addWidget(action_frame)
+
+    def _make_spin(self, layout, label, minimum, maximum, value):
+        """Спинбокс порога с подписью; изменение запускает отложенный пересчёт."""
+        layout.addWidget(QLabel(label))
+        spin = QSpinBox()
+        spin.setRange(minimum, maximum)
+        spin.setValue(value)
+        spin.valueChanged.connect(lambda _: self._reevaluate_timer.start())
+        layout.addWidget(spin)
+        return spin
+
+    def _scan_settings(self):
+        """Текущие пороги из панели настроек (в единицах Scanner)."""
+        return {
+            'days_old': self.days_spin.value(),
+            'min_size': self.min_size_spin.value() * 1024 * 1024,
+            'merge_ratio': self.merge_spin.value() / 100,
+            'merge_ratio_temp': self.merge_temp_spin.value() / 100,
+            'trash_dir_min_size': self.trash_dir_spin.value() * 1024 * 1024,
+            'appdata_dir_min_size': self.appdata_dir_spin.value() * 1024 * 1024,
+        }
+
+    def reevaluate_results(self):
+        """Пересчёт результатов с новыми порогами по данным последнего сканирования (без обхода диска)."""
+        scanner = self.scanner_worker.scanner if self.scanner_worker else None
+        if self._cache_floors:
+            self._apply_cache_floors()
+            return
+        if scanner is None or not (scanner.old_tree or scanner.trash_candidates) or not self.scan_btn.isEnabled():
+            self.status_label.setText("Новые пороги применятся при следующем сканировании.")
+            return
+
+        settings = self._scan_settings()
+        self._reevaluate_generation += 1
+        generation = self._reevaluate_generation
+
+        def reevaluate_worker():
+            # Пересчёты выполняются по очереди: Scanner хранит состояние последней переоценки
+            with self._reevaluate_lock:
+                if generation != self._reevaluate_generation:
+                    return # Пороги уже поменялись ещё раз
+                started = time.perf_counter()
+                results = scanner.reevaluate(**settings)
+                elapsed = time.perf_counter() - started
+            QApplication.instance().postEvent(self, ReevaluateCompleteEvent(generation, results, elapsed))
+
+        threading.Thread(target=reevaluate_worker, daemon=True).start()
+
+    def _apply_cache_floors(self):
+        """
+        Результаты из кэша: дерева пачек для переоценки нет, но размеры, категории и число файлов
+        есть, поэтому пороги размера применяются фильтром таблицы (кэш не меняется). Для возраста
+        и долей объединения нужны даты файлов и дерево папок - их в кэше нет.
+        """
+        self.filter_tree()
+        self.status_label.setText(
+            f"Пороги размера применены к кэшу: показано {len(self.model.visible)} из {self.results.live_count}. "
+            "Возраст и доли объединения применятся при следующем сканировании (в кэше нет дат файлов).")
+
+    def _on_reevaluate_complete(self, event):
+        if event.generation != self._reevaluate_generation:
+            return
+        self._load_generation += 1 # Результаты кэша больше не актуальны
+        self.model.set_results(ResultSet(items=event.results))
+        self._save_results()
+        self.filter_tree()
+        self.status_label.setText(f"Пересчитано: {len(self.results)} элементов за {event.elapsed * 1000:.0f} мс")
+
+    def _save_results(self, retain=False, index=None):
+        """
+        Сохраняет кэш (и индекс каталогов) в фоновом потоке: запись JSON и снимка не блокирует
+        интерфейс. Сохранения выполняются по очереди; если пока одно ждало, результаты изменились
+        ещё раз, его пропускаем - следующее запишет более свежие данные.
+        """
+        self._save_generation += 1
+        generation = self._save_generation
+        results = self.results.copy()
+
+        def save_worker():
+            with self._save_lock:
+                if index is not None:
+                    save_index(index, retain=True)
+                if retain or generation == self._save_generation:
+                    save_cache(results, retain=retain)
+
+        # Не daemon: при выходе из программы запись кэша дописывается, а не обрывается
+        threading.Thread(target=save_worker).start()
+
+    def _load_data(self):
+        """Фоновая загрузка кэша и индекса: окно показывается сразу, данные приходят событиями."""
+        self._load_generation += 1
+        generation = self._load_generation
+        self._cache_floors = True
+        self.status_label.setText("Загрузка кэша...")
+
+        def cache_loader():
+            app = QApplication.instance()
+            try:
+                # Свежий бинарный снимок открывается целиком (строки читаются из mmap по мере показа)
+                results = open_cached_results()
+            except Exception as e:
+                logging.error(f"Ошибка открытия снимка кэша: {e}")
+                results = None
+            if results is not None:
+                app.postEvent(self, ResultsLoadedEvent(generation, results))
+            else:
+                try:
+                    for chunk in iter_cache_chunks():
+                        if generation != self._load_generation:
+                            return
+                        app.postEvent(self, CacheChunkEvent(generation, chunk))
+                except Exception as e:
+                    logging.error(f"Ошибка загрузки кэша: {e}")
+                app.postEvent(self, CacheChunkEvent(generation, {}, done=True))
+
+            # Тёплый индекс (от фоновой службы или прошлого скана) - для карты диска, после строк таблицы
+            try:
+                index = load_index()
+            except Exception as e:
+                logging.error(f"Ошибка загрузки индекса: {e}")
+                index = None
+            if index is not None:
+                app.postEvent(self, IndexLoadedEvent(index))
+
+        threading.Thread(target=cache_loader, daemon=True).start()
+
+    def _on_index_loaded(self, event):
+        # Сканирование могло завершиться раньше - его индекс свежее сохранённого
+        if self.usage_view.index is None:
+            self.usage_view.set_index(event.index)
+
+    def _on_results_loaded(self, event):
+        """Результаты из снимка кэша: таблица показывает их без разбора строк."""
+        if event.generation != self._load_generation:
+            return
+        self.model.set_results(event.results)
+        self.model.set_visible(self._filter_rows(self.results.rows()))
+        self._finish_cache_load(event.generation)
+
+    def _on_cache_chunk(self, event):
+        """Добавляет пачку строк из кэша, не перестраивая всю таблицу."""
+        if event.generation != self._load_generation:
+            return # Пока грузился кэш, пользователь запустил новое сканирование
+
+        if event.items:
+            rows = self.results.extend(event.items.items())
+            self.model.append_visible(self._filter_rows(rows))
+            self.status_label.setText(f"Загрузка кэша... {len(self.results)}")
+
+        if event.done:
+            self._finish_cache_load(event.generation)
+
+    def _finish_cache_load(self, generation):
+        if self.results.live_count:
+            self.status_label.setText(f"Загружено {self.results.live_count} из кэша. Нажмите 'Сканировать' для обновления.")
+            # При загрузке кэша сразу сортируем по размеру
+            self.current_sort_column = 3
+            self.current_sort_order = Qt.SortOrder.DescendingOrder
+            self._apply_sort()
+            self.update_selection_count()
+            self._start_cache_validation(generation)
+        else:
+            # Автоматический запуск при первом запуске
+            self.start_scan()
+
+    def _start_cache_validation(self, generation):
+        """Фоновая проверка существования путей из кэша; пропавшие строки убираются пачками."""
+        results = self.results
+        rows = list(results.rows())
+
+        def validator():
+            app = QApplication.instance()
+            stale = []
+            for i, row in enumerate(rows):
+                if generation != self._load_generation:
+                    return
+                if not os.path.exists(results.path(row)):
+                    stale.append(row)
+                if stale and (len(stale) >= 500 or i % 5000 == 0):
+                    app.postEvent(self, StaleItemsEvent(generation, stale))
+                    stale = []
+            if stale:
+                app.postEvent(self, StaleItemsEvent(generation, stale))
+
+        threading.Thread(target=validator, daemon=True).start()
+
+    def _on_stale_items(self, event):
+        """Удаляет из таблицы элементы, которых уже нет на диске."""
+        if event.generation != self._load_generation:
+            return
+        self.model.remove_rows(event.rows)
+        logging.info(f"Из кэша убрано устаревших элементов: {len(event.rows)}")
+        self.update_selection_count()
+
+    # === МЕТОДЫ ДЛЯ ТАБЛИЦЫ ===
+    def on_header_clicked(self, index):
+        """Обработка клика по заголовку для ручной сортировки."""
+
+        # 1. Определяем порядок сортировки
+        if self.current_sort_column == index:
+            self.current_sort_order = Qt.SortOrder.DescendingOrder if self.current_sort_order == Qt.SortOrder.AscendingOrder else Qt.SortOrder.AscendingOrder
+        else:
+            self.current_sort_column = index
+            self.current_sort_order = Qt.SortOrder.AscendingOrder
+
+        self._apply_sort()
+
+    def _apply_sort(self):
+        """Пересортировка строк по текущей колонке и порядку (без переключения порядка)."""
+        index = self.current_sort_column
+        self.tree.header().setSortIndicator(index, self.current_sort_order)
+        is_desc = self.current_sort_order == Qt.SortOrder.DescendingOrder
+
+        # Ключи берутся из набора результатов по номеру строки, без разбора текста ячеек
+        results = self.results
+        if index == 3:
+            sort_key = results.size
+        elif index == 4:
+            sort_key = results.count
+        elif index == 0:
+            sort_key = lambda row: _display_name(results.path(row), results.category(row))
+        elif index == 1:
+            sort_key = results.path
+        else:
+            sort_key = results.category
+
+        self.model.set_visible(sorted(self.model.visible, key=sort_key, reverse=is_desc))
+
+    def _current_filters(self):
+        """Текущий поисковый запрос и набор расширений из панели фильтров."""
+        query = self.search_input.text().lower().strip()
+
+        # Фильтры расширений
+        ext_filter_str = self.ext_input.text().lower().strip()
+        custom_ext_filter = {e.strip() for e in ext_filter_str.split() if e.startswith('.')} if ext_filter_str else None
+
+        if self.trash_ext_checkbox.isChecked():
+            # Объединяем пользовательские фильтры с системным мусором
+            custom_ext_filter = (custom_ext_filter or set()) | TRASH_EXT
+
+        return query, custom_ext_filter
+
+    def _filter_rows(self, rows):
+        """Номера строк, проходящих фильтр по поиску, расширениям и (для кэша) порогам размера."""
+        query, custom_ext_filter = self._current_filters()
+        floors = self._scan_settings() if self._cache_floors else None
+        if not query and not custom_ext_filter and floors is None:
+            return list(rows)
+
+        results = self.results
+        matched = []
+        for row in rows:
+            path = results.path(row)
+            # 1. Фильтр по поисковому запросу (имя - суффикс пути, поэтому достаточно пути)
+            if query and query not in path.lower():
+                continue
+            # 2. Фильтр по расширениям (только для файлов)
+            if (custom_ext_filter and results.item_type(row) in ('file', 'trash_file') and
+                    os.path.splitext(path)[1].lower() not in custom_ext_filter):
+                continue
+            # 3. Пороги размера для результатов из кэша (см. _apply_cache_floors)
+            if floors is not None and not self._passes_floors(row, floors):
+                continue
+            matched.append(row)
+        return matched
+
+    def _passes_floors(self, row, floors):
+        results = self.results
+        size, item_type = results.size(row), results.item_type(row)
+        if item_type in ('trash_dir', 'trash_file') and not passes_trash_floor(
+                item_type, results.category(row), size, results.count(row),
+                floors['trash_dir_min_size'], floors['appdata_dir_min_size']):
+            return False
+        return size >= floors['min_size']
+
+    def filter_tree(self):
+        """Фильтрация данных в таблице по поиску и расширениям."""
+        rows = self._filter_rows(self.results.rows())
+        self.model.set_visible(rows)
+
+        # Выбор сохраняется для строк, которые остаются видимыми
+        visible = set(rows)
+        self.selection.set_rows([row for row in self.selection.selected_rows() if row not in visible], False)
+
+        # После фильтрации применяем текущую сортировку
+        if self.current_sort_column != -1:
+            self._apply_sort()
+
+        self.update_selection_count()
+
+    def update_selection_count(self):
+        """Обновляет статистику по выбранным элементам (счётчики ведёт Selection, обход таблицы не нужен)."""
+        self.selection_status_label.setText(f"Выбрано: {self.selection.count} | Общий размер: {human(self.selection.total)}")
+        self.delete_btn.setEnabled(self.selection.count > 0)
+        self.compress_btn.setEnabled(self.selection.count > 0)
+
+    def toggle_item_check(self, index):
+        """Двойной клик по строке переключает её чекбокс (Selection обновит модель)."""
+        row = self.model.row_of(index)
+        if row is not None: # Только для корневых элементов
+            new_state = Qt.CheckState.Unchecked if self.selection.is_selected(row) else Qt.CheckState.Checked
+            self.model.setData(index.siblingAtColumn(0), new_state, Qt.ItemDataRole.CheckStateRole)
+
+    def _set_selection_state(self, checked):
+        """Выделяет/снимает выделение со всех видимых элементов."""
+        results = self.results
+        if checked and len(self.model.visible) == results.live_count:
+            # Видны все строки (фильтр ничего не скрыл) - одна операция над флагами и столбцом размеров
+            self.selection.select_all(results.live_mask(), results.size_column())
+        elif checked:
+            self.selection.set_rows(self.model.visible, True)
+        else:
+            self.selection.clear()
+        self._sync_check_states()
+
+    def _set_category_state(self, category, checked):
+        """Выделяет/снимает выделение со всех видимых элементов категории."""
+        results = self.results
+        self.selection.set_rows([row for row in self.model.visible if results.category(row) == category], checked)
+        self._sync_check_states()
+
+    def _sync_check_states(self):
+        """Перерисовывает чекбоксы после массового изменения выбора (одним сигналом модели)."""
+        self.model.refresh_rows()
+        self.update_selection_count()
+
+    def _show_tree_menu(self, pos):
+        """Контекстное меню таблицы: выбор по категории строки и по результату фильтра."""
+        menu = QMenu(self)
+        row = self.model.row_of(self.tree.indexAt(pos))
+        if row is not None:
+            category = self.results.category(row)
+            menu.addAction(f"Выделить категорию «{category}»", lambda: self._set_category_state(category, True))
+            menu.addAction(f"Снять категорию «{category}»", lambda: self._set_category_state(category, False))
+            menu.addSeparator()
+        menu.addAction("Выделить всё по фильтру", lambda: self._set_selection_state(True))
+        menu.addAction("Снять всё", lambda: self._set_selection_state(False))
+        menu.exec(self.tree.viewport().mapToGlobal(pos))
+
+    # === МЕТОДЫ УПРАВЛЕНИЯ СКАНИРОВАНИЕМ ===
+
+    def start_scan(self):
+        """Запуск сканирования в отдельном потоке."""
+        if self.scanner_thread and self.scanner_thread.isRunning():
+            return
+
+        self._load_generation += 1 # Останавливаем фоновую загрузку/проверку кэша
+        self._cache_floors = False
+        self.model.set_results(ResultSet())
+        # Сбрасываем сортировку
+        self.tree.header().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.current_sort_column = -1
+
+        self.scanner_thread = QThread()
+        settings = self._scan_settings()
+        throttle = None
+        if self.throttle_checkbox.isChecked():
+            from .throttle import ScanThrottle
+            throttle = ScanThrottle(**self.throttle_config)
+        self.scanner_worker = ScanWorker(settings.pop('days_old'), self.scan_processes, throttle)
+        for name, value in settings.items():
+            setattr(self.scanner_worker.scanner, name, value)
+        self.scanner_worker.moveToThread(self.scanner_thread)
+
+        self.scanner_thread.started.connect(self.scanner_worker.run_scan)
+        self.scanner_worker.scan_complete.connect(self.on_scan_complete)
+        self.scanner_worker.index_ready.connect(self.usage_view.set_index)
+        self.scanner_worker.progress_update.connect(self.status_label.setText)
+        self.scanner_thread.finished.connect(self.scanner_thread.deleteLater)
+        self.scanner_worker.destroyed.connect(self.scanner_thread.quit)
+
+        self.scan_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0) # Индикатор неопределенного прогресса
+
+        self.scanner_thread.start()
+
+    def stop_scan(self):
+        """Остановка сканирования."""
+        if self.scanner_worker:
+            self.scanner_worker.stop()
+        self.status_label.setText("Остановка...")
+
+    def on_scan_complete(self, results):
+        """Обработка результатов сканирования."""
+        if self.scanner_thread:
+            self.scanner_thread.quit()
+            
+        self.scan_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.progress_bar.setVisible(False)
+
+        self.model.set_results(ResultSet(items=results))
+        # Снимок в историю - только для завершённого сканирования (иначе сравнение покажет "исчезновения")
+        completed = self.scanner_worker is not None and self.scanner_worker.dir_index is not None
+        self._save_results(retain=completed, index=self.scanner_worker.dir_index if completed else None)
+        self.filter_tree()
+
+        if not self.results.live_count:
+             self.status_label.setText("Сканирование завершено. Ничего не найдено.")
+        else:
+             self.status_label.setText(f"Сканирование завершено. Найдено {self.results.live_count}.")
+             # Сортировка по размеру после завершения сканирования
+             self.on_header_clicked(3) # Колонка 3 - Размер
+
+
+    # === МЕТОДЫ ДЕЙСТВИЙ (Удаление/Предпросмотр) ===
+
+    def show_preview_dialog(self):
+        """Показывает диалоговое окно с элементами, которые будут удалены."""
+        rows, total_size = self._get_selected_rows()
+
+        if not rows:
+            QMessageBox.information(self, "Предпросмотр", "Сначала выберите элементы для удаления.")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Предпросмотр удаления")
+        dialog.setGeometry(200, 200, 800, 600)
+        dialog.setStyleSheet(STYLE_SHEET)
+
+        layout = QVBoxLayout(dialog)
+
+        use_trash = self.trash_checkbox.isChecked()
+        if use_trash:
+            label = QLabel("Следующие элементы (папки/файлы) будут перемещены в корзину (удаление можно отменить):")
+        else:
+            label = QLabel("Следующие элементы (папки/файлы) будут удалены НАВСЕГДА:")
+        label.setFont(QFont("Inter", 10, QFont.Weight.Bold))
+        label.setStyleSheet("color: #66fcf1;")
+        layout.addWidget(label)
+
+        # Объяснение по удалению
+        explanation = QLabel(
+            "Внимание: При выборе элемента (папки) удаляется <b>именно эта папка</b> со всем ее содержимым. "
+            "Например, при удалении C:\\...\\AppData\\Local\\Temp будет удалена папка Temp и все внутри."
+        )
+        explanation.setWordWrap(True)
+        explanation.setStyleSheet("color: #f2f2f2; background-color: #4a5a6b; padding: 10px; border-radius: 6px;")
+        layout.addWidget(explanation)
+
+        list_widget = QListWidget()
+        list_widget.setStyleSheet("QListWidget { background-color: #2c3846; border: 1px solid #4a5a6b; } QListWidget::item { padding: 5px; }")
+
+        for row in rows:
+            path, info = self.results.path(row), self.results.info(row)
+            size = info.get('size', 0)
+            count = info.get('count', 1)
+            item_type = 'Папка' if info.get('type', '').endswith('dir') else 'Файл'
+
+            display = f"[{human(size):<10}] [{item_type}] {path}"
+            if count > 1 and item_type == 'Папка':
+                display += f" ({count} файлов внутри)"
+
+            list_item = QListWidgetItem(display)
+            list_widget.addItem(list_item)
+
+        list_widget.addItem(QListWidgetItem(""))
+        total_item = QListWidgetItem(f"ИТОГО: {human(total_size)} ({len(rows)} элементов)")
+        total_item.setForeground(QColor("#66fcf1"))
+        total_item.setFont(QFont("Inter", 11, QFont.Weight.Bold))
+        list_widget.addItem(total_item)
+
+        layout.addWidget(list_widget)
+
+        # Кнопки
+        button_frame = QFrame()
+        button_layout = QHBoxLayout(button_frame)
+
+        delete_btn = QPushButton("В корзину" if use_trash else "Удалить НАВСЕГДА")
+        delete_btn.setObjectName("DeleteButton")
+        delete_btn.clicked.connect(lambda: [dialog.accept(), self.delete_selected_items(confirm=False)]) # Пропускаем подтверждение
+
+        cancel_btn = QPushButton("Отмена")
+        cancel_btn.clicked.connect(dialog.reject)
+
+        button_layout.addWidget(delete_btn)
+        button_layout.addWidget(cancel_btn)
+        layout.addWidget(button_frame)
+
+        dialog.exec()
+
+    def _get_selected_rows(self):
+        """Возвращает номера выбранных строк и общий размер выбранных элементов."""
+        return self.selection.selected_rows(), self.selection.total
+
+    def delete_selected_items(self, confirm=True):
+        """Удаляет выбранные элементы с диска."""
+        rows, total_size = self._get_selected_rows()
+        results = self.results
+        row_of = {results.path(row): row for row in rows}
+        paths_to_delete = list(row_of)
+
+        if not paths_to_delete:
+            QMessageBox.information(self, "Удаление", "Сначала выберите элементы.")
+            return
+
+        use_trash = self.trash_checkbox.isChecked()
+        if confirm:
+            action = "переместить в корзину" if use_trash else "навсегда удалить"
+            reply = QMessageBox.question(self, 'Подтверждение удаления',
+                f"Вы уверены, что хотите {action} {len(paths_to_delete)} элементов общим размером {human(total_size)}?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+
+            if reply == QMessageBox.StandardButton.No:
+                return
+        
+        # Если мы здесь, либо confirm=False (из предпросмотра), либо пользователь нажал Yes
+        from .deletion import delete_paths, move_to_trash
+
+        # Используем отдельный поток для удаления, чтобы UI не зависал
+        def deletion_worker():
+            # Удалённые (и уже отсутствующие) строки уберёт из результатов поток GUI
+            removed = []
+            def on_removed(path):
+                removed.append(row_of[path])
+
+            entries = None
+            if use_trash:
+                deleted_count, failed_paths, entries = move_to_trash(paths_to_delete, on_removed=on_removed)
+            else:
+                deleted_count, failed_paths = delete_paths(paths_to_delete, on_removed=on_removed)
+
+            # Обновляем UI после завершения
+            QApplication.instance().postEvent(self, DeleteCompleteEvent(deleted_count, failed_paths, entries, removed, results))
+
+        threading.Thread(target=deletion_worker, daemon=True).start()
+
+        self.status_label.setText("Удаление...")
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.delete_btn.setEnabled(False)
+        self.scan_btn.setEnabled(False)
+        self.preview_btn.setEnabled(False)
+        self.undo_btn.setEnabled(False)
+
+    def compress_selected_items(self):
+        """Сжимает выбранные элементы на месте (папки - пофайлово) в нескольких процессах."""
+        rows, total_size = self._get_selected_rows()
+        results = self.results
+        row_of = {results.path(row): row for row in rows}
+        paths_to_compress = list(row_of)
+        if not paths_to_compress:
+            QMessageBox.information(self, "Сжатие", "Сначала выберите элементы.")
+            return
+
+        from .compress import default_codec
+        codec = default_codec()
+        reply = QMessageBox.question(self, 'Подтверждение сжатия',
+            f"Сжать ({codec}) {len(paths_to_compress)} элементов общим размером {human(total_size)}?\n"
+            f"Каждый файл заменяется проверенным архивом; несжимаемые файлы остаются как есть.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.No:
+            return
+
+        processes = self.scan_processes or None
+
+        def compress_worker():
+            from .compress import compress_paths
+            try:
+                report, error = compress_paths(paths_to_compress, codec=codec, processes=processes), None
+            except Exception as e:
+                logging.error(f"Ошибка сжатия: {e}")
+                report, error = {}, str(e)
+            QApplication.instance().postEvent(self, CompressCompleteEvent(codec, report, error, row_of, results))
+
+        threading.Thread(target=compress_worker, daemon=True).start()
+
+        self.status_label.setText("Сжатие...")
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.compress_btn.setEnabled(False)
+        self.delete_btn.setEnabled(False)
+        self.scan_btn.setEnabled(False)
+
+    def _on_compress_complete(self, event):
+        self.progress_bar.setVisible(False)
+        self.scan_btn.setEnabled(True)
+        self.update_selection_count()
+        if event.error:
+            self.status_label.setText("Ошибка сжатия.")
+            QMessageBox.warning(self, "Ошибка сжатия", event.error)
+            return
+
+        # Сжатые файлы заменены архивами - убираем их из результатов; папки уменьшаются на экономию
+        lines = []
+        saved_total = failed = 0
+        gone, changed = [], []
+        current = event.results is self.results # Иначе таблица уже перестроена сканированием
+        for path, (files, before, after, errors) in event.report.items():
+            saved_total += before - after
+            failed += errors
+            if files:
+                lines.append(f"{human(before - after):>11}  {files:>6} файлов  {path}")
+            row = event.rows.get(path)
+            if not current or row is None or not self.results.is_live(row):
+                continue
+            if not os.path.lexists(path):
+                gone.append(row)
+            elif files:
+                info = dict(self.results.info(row))
+                info['size'] = max(0, info['size'] - (before - after))
+                # Выбранная строка пересчитывается в Selection с новым размером
+                selected = self.selection.set(row, False)
+                self.results.update(row, info)
+                if selected:
+                    self.selection.set(row, True)
+                changed.append(row)
+        if current:
+            self.model.remove_rows(gone)
+            self.model.refresh_rows(changed)
+            self._save_results()
+            self.filter_tree()
+
+        self.status_label.setText(f"Сжато ({event.codec}): сэкономлено {human(saved_total)}" +
+                                  (f". Ошибок: {failed}" if failed else ""))
+        QMessageBox.information(self, "Сжатие",
+            f"Сэкономлено {human(saved_total)}" + (f", ошибок: {failed} (см. журнал)" if failed else "") + "\n\n" +
+            ("\n".join(lines[:20]) + ("\n..." if len(lines) > 20 else "") if lines else "Ни один файл не удалось уменьшить."))
+
+    def undo_last_trash(self):
+        """Возвращает из корзины элементы последнего удаления."""
+        if not self._last_trashed:
+            return
+        entries, removed = self._last_trashed
+        self._last_trashed = None
+        self.undo_btn.setEnabled(False)
+
+        from .deletion import restore_from_trash
+
+        def restore_worker():
+            restored, failed_paths = restore_from_trash(entries)
+            QApplication.instance().postEvent(self, RestoreCompleteEvent(restored, failed_paths, removed))
+
+        threading.Thread(target=restore_worker, daemon=True).start()
+        self.status_label.setText("Восстановление...")
+
+    def _on_restore_complete(self, event):
+        # Возвращаем в результаты всё, что снова есть на диске (включая вложенные элементы восстановленных папок)
+        self.results.extend((path, data) for path, data in event.removed.items()
+                            if data is not None and os.path.lexists(path))
+        self._save_results()
+        self.filter_tree()
+
+        if event.failed_paths:
+            self.status_label.setText(f"Восстановлено {len(event.restored)}. Ошибок: {len(event.failed_paths)}")
+            QMessageBox.warning(self, "Ошибка восстановления",
+                f"Не удалось восстановить {len(event.failed_paths)} элементов:\n\n" +
+                "\n".join(event.failed_paths[:10]) + ("\n..." if len(event.failed_paths) > 10 else "")
+            )
+        else:
+            self.status_label.setText(f"Восстановлено {len(event.restored)} элементов.")
+
+    def export_report(self):
+        """
+        Экспорт результатов, агрегатов по папкам и изменений с прошлого сканирования
+        (те же, что в окне "Рост") в JSONL/CSV/Parquet в фоновом потоке.
+        """
+        if not self.results.live_count:
+            QMessageBox.information(self, "Экспорт", "Нет результатов для экспорта.")
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Экспорт отчёта", "cleaner_report.jsonl.gz",
+            "JSON Lines (*.jsonl *.jsonl.gz);;CSV (*.csv *.csv.gz);;Parquet (*.parquet)"
+        )
+        if not path:
+            return
+
+        items = self.results.copy() # Снимок: удаление может менять результаты параллельно
+        index = self.usage_view.index
+        scan_time = self.scanner_worker.scanner.scan_time if self.scanner_worker else None
+
+        def export_worker():
+            from .export import export_results
+            try:
+                count = export_results(items, path, index=index, scan_time=scan_time,
+                                       deltas=('items', 'dirs') if index is not None else ('items',))
+                error = None
+            except Exception as e:
+                logging.error(f"Ошибка экспорта: {e}")
+                count, error = 0, str(e)
+            QApplication.instance().postEvent(self, ExportCompleteEvent(path, count, error))
+
+        threading.Thread(target=export_worker, daemon=True).start()
+        self.export_btn.setEnabled(False)
+        self.status_label.setText("Экспорт...")
+
+    def _on_export_complete(self, event):
+        self.export_btn.setEnabled(True)
+        if event.error:
+            self.status_label.setText("Ошибка экспорта.")
+            QMessageBox.warning(self, "Ошибка экспорта", event.error)
+        else:
+            self.status_label.setText(f"Экспортировано {event.count} записей в {event.path}")
+
+    def show_growth(self):
+        """Сравнение двух последних сканирований (по снимкам из истории) в фоновом потоке."""
+        from .diff import latest_pair
+
+        pair = latest_pair()
+        if pair is None:
+            QMessageBox.information(self, "Рост", "Нужно хотя бы два завершённых сканирования.")
+            return
+
+        def diff_worker():
+            from .diff import compare_files, format_diff
+            try:
+                text, error = format_diff(compare_files(*pair)), None
+            except Exception as e:
+                logging.error(f"Ошибка сравнения сканирований: {e}")
+                text, error = None, str(e)
+            QApplication.instance().postEvent(self, DiffCompleteEvent(text, error))
+
+        threading.Thread(target=diff_worker, daemon=True).start()
+        self.growth_btn.setEnabled(False)
+        self.status_label.setText("Сравнение с прошлым сканированием...")
+
+    def _on_diff_complete(self, event):
+        self.growth_btn.setEnabled(True)
+        if event.error:
+            self.status_label.setText("Ошибка сравнения.")
+            QMessageBox.warning(self, "Ошибка сравнения", event.error)
+            return
+        self.status_label.setText("Сравнение готово.")
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Рост с прошлого сканирования")
+        dialog.setGeometry(200, 200, 900, 600)
+        dialog.setStyleSheet(STYLE_SHEET)
+        layout = QVBoxLayout(dialog)
+
+        list_widget = QListWidget()
+        list_widget.setFont(QFont("Monospace", 9))
+        list_widget.addItems(event.text.splitlines())
+        layout.addWidget(list_widget)
+
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(dialog.accept)
+        layout.addWidget(close_btn)
+        dialog.exec()
+
+    def _start_trash_purge(self):
+        """Фоновая очистка своих записей корзины старше срока хранения (низкий приоритет CPU и диска)."""
+        def purge_worker():
+            from .deletion import purge_trash
+            purge_trash(TRASH_RETENTION_DAYS)
+
+        threading.Thread(target=purge_worker, daemon=True).start()
+
+    def customEvent(self, event):
+        """Обрабатывает кастомные события фоновых потоков (кэш, удаление)."""
+        if event.type() == CacheChunkEvent.EVENT_TYPE:
+            self._on_cache_chunk(event)
+        elif event.type() == StaleItemsEvent.EVENT_TYPE:
+            self._on_stale_items(event)
+        elif event.type() == ReevaluateCompleteEvent.EVENT_TYPE:
+            self._on_reevaluate_complete(event)
+        elif event.type() == RestoreCompleteEvent.EVENT_TYPE:
+            self._on_restore_complete(event)
+        elif event.type() == ExportCompleteEvent.EVENT_TYPE:
+            self._on_export_complete(event)
+        elif event.type() == DiffCompleteEvent.EVENT_TYPE:
+            self._on_diff_complete(event)
+        elif event.type() == CompressCompleteEvent.EVENT_TYPE:
+            self._on_compress_complete(event)
+        elif event.type() == IndexLoadedEvent.EVENT_TYPE:
+            self._on_index_loaded(event)
+        elif event.type() == ResultsLoadedEvent.EVENT_TYPE:
+            self._on_results_loaded(event)
+        elif event.type() == DeleteCompleteEvent.EVENT_TYPE:
+            self.progress_bar.setVisible(False)
+            self.scan_btn.setEnabled(True)
+            self.delete_btn.setEnabled(True)
+            self.preview_btn.setEnabled(True)
+
+            # Удалённые строки убираем из результатов, запоминая данные для отмены
+            removed = self.model.remove_rows(event.removed) if event.results is self.results else {}
+            if event.entries:
+                self._last_trashed = (event.entries, removed)
+                self.undo_btn.setEnabled(True)
+            self._save_results()
+
+            if event.failed_paths:
+                self.status_label.setText(f"Удалено {event.deleted_count}. Ошибок: {len(event.failed_paths)}")
+                QMessageBox.warning(self, "Ошибка удаления",
+                    f"Не удалось удалить {len(event.failed_paths)} элементов (возможно, они заняты другим процессом):\n\n" +
+                    "\n".join(event.failed_paths[:10]) + ("\n..." if len(event.failed_paths) > 10 else "")
+                )
+            elif event.entries is not None:
+                self.status_label.setText(f"Перемещено в корзину {event.deleted_count} элементов.")
+            else:
+                self.status_label.setText(f"Удалено {event.deleted_count} элементов.")
+            
+            self.update_selection_count()
+
+class TreemapLayoutEvent(QEvent):
+    """Кастомное событие с готовой раскладкой карты диска."""
+    EVENT_TYPE = QEvent.Type(QEvent.Type.User + 2)
+
+    def __init__(self, generation, items):
+        super().__init__(self.EVENT_TYPE)
+        self.generation = generation
+        self.items = items
+
+class CacheChunkEvent(QEvent):
+    """Кастомное событие с очередной пачкой строк из кэша."""
+    EVENT_TYPE = QEvent.Type(QEvent.Type.User + 3)
+
+    def __init__(self, generation, items, done=False):
+        super().__init__(self.EVENT_TYPE)
+        self.generation = generation
+        self.items = items
+        self.done = done
+
+class StaleItemsEvent(QEvent):
+    """Кастомное событие с номерами строк из кэша, которых уже нет на диске."""
+    EVENT_TYPE = QEvent.Type(QEvent.Type.User + 4)
+
+    def __init__(self, generation, rows):
+        super().__init__(self.EVENT_TYPE)
+        self.generation = generation
+        self.rows = rows
+
+class ReevaluateCompleteEvent(QEvent):
+    """Кастомное событие с результатами пересчёта по новым порогам."""
+    EVENT_TYPE = QEvent.Type(QEvent.Type.User + 5)
+
+    def __init__(self, generation, results, elapsed):
+        super().__init__(self.EVENT_TYPE)
+        self.generation = generation
+        self.results = results
+        self.elapsed = elapsed
+
+class DeleteCompleteEvent(QEvent):
+    """Кастомное событие для уведомления UI о завершении удаления."""
+    EVENT_TYPE = QEvent.Type(QEvent.Type.User + 1)
+
+    def __init__(self, count, failed_paths, entries=None, removed=None, results=None):
+        super().__init__(self.EVENT_TYPE)
+        self.deleted_count = count
+        self.failed_paths = failed_paths
+        self.entries = entries      # Записи корзины (None - удалено окончательно)
+        self.removed = removed or []  # Номера удалённых строк в results
+        self.results = results
+
+
+class RestoreCompleteEvent(QEvent):
+    """Кастомное событие о завершении восстановления из корзины."""
+    EVENT_TYPE = QEvent.Type(QEvent.Type.User + 6)
+
+    def __init__(self, restored, failed_paths, removed):
+        super().__init__(self.EVENT_TYPE)
+        self.restored = restored
+        self.failed_paths = failed_paths
+        self.removed = removed
+
+
+class ExportCompleteEvent(QEvent):
+    """Кастомное событие о завершении экспорта отчёта."""
+    EVENT_TYPE = QEvent.Type(QEvent.Type.User + 7)
+
+    def __init__(self, path, count, error=None):
+        super().__init__(self.EVENT_TYPE)
+        self.path = path
+        self.count = count
+        self.error = error
+
+
+class DiffCompleteEvent(QEvent):
+    """Кастомное событие о завершении сравнения сканирований."""
+    EVENT_TYPE = QEvent.Type(QEvent.Type.User + 8)
+
+    def __init__(self, text, error=None):
+        super().__init__(self.EVENT_TYPE)
+        self.text = text
+        self.error = error
+
+
+class CompressCompleteEvent(QEvent):
+    """Кастомное событие о завершении сжатия: экономия по каждому элементу."""
+    EVENT_TYPE = QEvent.Type(QEvent.Type.User + 9)
+
+    def __init__(self, codec, report, error=None, rows=None, results=None):
+        super().__init__(self.EVENT_TYPE)
+        self.codec = codec
+        self.report = report    # элемент -> [сжато файлов, занято до, занято после, ошибок]
+        self.error = error
+        self.rows = rows or {}  # элемент -> номер строки в results
+        self.results = results
+
+
+class IndexLoadedEvent(QEvent):
+    """Кастомное событие с индексом каталогов, загруженным в фоне при запуске."""
+    EVENT_TYPE = QEvent.Type(QEvent.Type.User + 10)
+
+    def __init__(self, index):
+        super().__init__(self.EVENT_TYPE)
+        self.index = index
+
+
+class ResultsLoadedEvent(QEvent):
+    """Кастомное событие с результатами, открытыми из бинарного снимка кэша."""
+    EVENT_TYPE = QEvent.Type(QEvent.Type.User + 11)
+
+    def __init__(self, generation, results):
+        super().__init__(self.EVENT_TYPE)
+        self.generation = generation
+        self.results = results
+
+
+def main(processes=None, throttle=None):
+    """Запуск графического интерфейса."""
+    app = QApplication(sys.argv)
+    app.setStyle("Fusion")
+
+    # Настраиваем палитру для лучшего Dark Mode
+    palette = QPalette()
+    palette.setColor(QPalette.ColorRole.Window, QColor("#1f2833"))
+    palette.setColor(QPalette.ColorRole.WindowText, QColor("#f2f2f2"))
+    palette.setColor(QPalette.ColorRole.Base, QColor("#344354"))
+    palette.setColor(QPalette.ColorRole.Text, QColor("#f2f2f2"))
+    palette.setColor(QPalette.ColorRole.Highlight, QColor("#0b7c7c"))
+    palette.setColor(QPalette.ColorRole.HighlightedText, QColor("#ffffff"))
+    app.setPalette(palette)
+
+    window = CleanerApp(processes, throttle)
+    window.show()
+    return app.exec()
@@ -0,0 +1,258 @@
+"""
+Политики автоматической очистки.
+
+Политики описываются в POLICY_FILE (JSON-список), например:
+
+    [
+      {"name": "Python кэш", "root": "~", "match": ["__pycache__", "*.pyc"], "older_than_days": 7},
+      {"name": "Лимит ~/.cache", "root": "~/.cache", "max_size": "5 GB", "evict_by": "atime"}
+    ]
+
+  - "older_than_days": файлы (имя или любая папка на пути совпадает с шаблоном из "match")
+    старше N дней - возраст считается как в сканере, по max(atime, mtime, ctime),
+    или только по "age_by": "mtime" / "atime";
+  - "max_size": если папка root больше лимита, вытесняются давно не использованные
+    файлы (по atime или mtime), пока размер не уложится в лимит;
+  - "action": "trash" или "delete" (по умолчанию - как USE_TRASH; у политик с "max_size" -
+    всегда "delete": перенос в корзину на той же ФС не освобождает место, и лимит
+    не был бы выдержан).
+
+build_plan() строит детерминированный план (dry-run) с точными размерами по индексу
+каталогов последнего сканирования: какие папки обходить, берётся из индекса, а размер
+root для лимита - из его агрегатов. execute_plan() выполняет план без участия пользователя,
+пропуская файлы, которые изменились после построения плана.
+"""
+import os
+import json
+import time
+import heapq
+import logging
+from fnmatch import fnmatch
+
+from .core import POLICY_FILE, USE_TRASH, human, size_to_bytes, is_system_or_skip
+from .stats import allocated_size
+
+ACTIONS = ('trash', 'delete')
+
+
+def load_policies(path=POLICY_FILE):
+    """Список политик из файла ([] если файла нет)."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        policies = json.load(f)
+
+    for policy in policies:
+        policy.setdefault('name', policy.get('root', '?'))
+        policy['root'] = os.path.abspath(os.path.expanduser(policy.get('root', '~')))
+        if is_system_or_skip(policy['root']) or os.path.dirname(policy['root']) == policy['root']:
+            raise ValueError(f"Политика '{policy['name']}': системная папка или корень диска {policy['root']}")
+        if 'max_size' in policy and isinstance(policy['max_size'], str):
+            policy['max_size'] = size_to_bytes(policy['max_size'])
+        if 'older_than_days' not in policy and 'max_size' not in policy:
+            raise ValueError(f"Политика '{policy['name']}': нужен older_than_days или max_size")
+        if policy.get('action', ACTIONS[0]) not in ACTIONS:
+            raise ValueError(f"Политика '{policy['name']}': неизвестное действие {policy['action']!r} "
+                             f"(допустимо: {', '.join(ACTIONS)})")
+        if 'max_size' in policy and policy.get('action') == 'trash':
+            raise ValueError(f"Политика '{policy['name']}': лимит max_size не выдержать переносом в корзину, "
+                             f"нужно действие delete")
+    return policies
+
+
+# === ОБХОД ===
+
+def _dirs_under(root, index):
+    """
+    Папки поддерева root: из индекса последнего сканирования, иначе обходом диска.
+    Системные и исключённые папки (is_system_or_skip) не попадают в план ни в одном из случаев.
+    """
+    if index is not None and root in index.ids:
+        prefix = root.rstrip(os.sep) + os.sep
+        return sorted(path for path in index.ids
+                      if (path == root or path.startswith(prefix)) and not is_system_or_skip(path))
+
+    dirs = []
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not os.path.islink(os.path.join(dirpath, d))
+                       and not is_system_or_skip(os.path.join(dirpath, d))]
+        dirs.append(dirpath)
+    return sorted(dirs)
+
+
+def _iter_files(dirs):
+    """(путь, lstat) обычных файлов в перечисленных папках (без рекурсии - папки уже все перечислены)."""
+    for dirpath in dirs:
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    try:
+                        if entry.is_file(follow_symlinks=False):
+                            yield entry.path, entry.stat(follow_symlinks=False)
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+
+
+def _root_size(root, index):
+    """Место на диске, занятое поддеревом root: из индекса, если он там есть, иначе подсчётом."""
+    if index is not None and root in index.ids:
+        return index.total_sizes[index.ids[root]]
+    return sum(allocated_size(st) for _, st in _iter_files(_dirs_under(root, None)))
+
+
+# === ПОСТРОЕНИЕ ПЛАНА ===
+
+def _entry(policy, path, st, action):
+    return {'policy': policy['name'], 'path': path, 'size': st.st_size, 'disk': allocated_size(st),
+            'mtime': st.st_mtime, 'action': action}
+
+
+def _plan_age(policy, index, now, action):
+    """Файлы, подходящие под шаблоны и старше older_than_days."""
+    threshold = now - policy['older_than_days'] * 86400
+    patterns = policy.get('match') or ['*']
+    root = policy['root']
+    age_by = policy.get('age_by')
+
+    dirs = _dirs_under(root, index)
+    entries = []
+    for path, st in _iter_files(dirs):
+        if age_by in ('mtime', 'atime'):
+            age = getattr(st, 'st_' + age_by)
+        else:
+            age = max(st.st_atime, st.st_mtime, st.st_ctime)
+        if age >= threshold:
+            continue
+        # Совпадение по имени файла или по любой папке на пути внутри root
+        relative = os.path.relpath(path, root).split(os.sep)
+        if any(fnmatch(part, pattern) for part in relative for pattern in patterns):
+            entries.append(_entry(policy, path, st, action))
+    return entries
+
+
+def _plan_cap(policy, index, action):
+    """
+    Вытеснение давно не использованных файлов, пока root не уложится в max_size.
+    Нужно найти самые старые файлы общим объёмом не меньше превышения: куча хранит
+    только текущих кандидатов (память O(k), а не O(n) по всем файлам поддерева) -
+    новейший кандидат выбрасывается, как только остальные уже покрывают превышение.
+    """
+    root = policy['root']
+    excess = _root_size(root, index) - policy['max_size']
+    if excess <= 0:
+        return []
+
+    key_attr = 'st_mtime' if policy.get('evict_by') == 'mtime' else 'st_atime'
+    heap = []      # (-время, путь, stat): вершина - самый "свежий" из кандидатов
+    selected = 0   # Место на диске, которое освободят кандидаты
+    for path, st in _iter_files(_dirs_under(root, index)):
+        heapq.heappush(heap, (-getattr(st, key_attr), path, st))
+        selected += allocated_size(st)
+        while heap and selected - allocated_size(heap[0][2]) >= excess:
+            selected -= allocated_size(heapq.heappop(heap)[2])
+
+    # Порядок вытеснения: от самых старых
+    candidates = sorted(heap, key=lambda item: (-item[0], item[1]))
+    return [_entry(policy, path, st, action) for _, path, st in candidates]
+
+
+def build_plan(policies, index=None, now=None):
+    """
+    План очистки: {'created', 'entries': [{policy, path, size, disk, mtime, action}], 'total', 'trashed'}.
+    size - видимый размер (для проверки, что файл не изменился), disk - место на диске;
+    total - место, которое освободится сразу (удаляемые файлы), trashed - место файлов,
+    переносимых в корзину (освободится только после её очистки).
+    Записи упорядочены (по политике, затем по порядку удаления), файл попадает в план
+    не более одного раза - по первой подходящей политике.
+    """
+    now = now if now is not None else time.time()
+    default_action = 'trash' if USE_TRASH else 'delete'
+    entries = []
+    seen = set()
+
+    for policy in policies:
+        if 'max_size' in policy:
+            policy_entries = _plan_cap(policy, index, 'delete')
+        else:
+            action = policy.get('action', default_action)
+            policy_entries = sorted(_plan_age(policy, index, now, action), key=lambda e: e['path'])
+
+        for entry in policy_entries:
+            if entry['path'] not in seen:
+                seen.add(entry['path'])
+                entries.append(entry)
+
+    return {
+        'created': now,
+        'entries': entries,
+        'total': sum(e['disk'] for e in entries if e['action'] == 'delete'),
+        'trashed': sum(e['disk'] for e in entries if e['action'] == 'trash'),
+    }
+
+
+def format_plan(plan, limit=20):
+    """Текстовое описание плана (dry-run)."""
+    per_policy = {}
+    for entry in plan['entries']:
+        count, size = per_policy.get(entry['policy'], (0, 0))
+        per_policy[entry['policy']] = (count + 1, size + entry['disk'])
+
+    lines = [f"План очистки: {len(plan['entries'])} файлов, освободится {human(plan['total'])} ({plan['total']} байт)"]
+    if plan.get('trashed'):
+        lines.append(f"  в корзину: {human(plan['trashed'])} - место освободится после очистки корзины")
+    for name, (count, size) in per_policy.items():
+        lines.append(f"  {name}: {count} файлов, {human(size)}")
+    for entry in plan['entries'][:limit]:
+        lines.append(f"    {entry['action']:>6}  {human(entry['disk']):>12}  {entry['path']}")
+    if len(plan['entries']) > limit:
+        lines.append(f"    ... и ещё {len(plan['entries']) - limit}")
+    return "\n".join(lines)
+
+
+# === ВЫПОЛНЕНИЕ ===
+
+def execute_plan(plan):
+    """
+    Выполняет план через модуль удаления. Файлы, изменившиеся после построения плана
+    (размер или mtime), пропускаются; записи с неизвестным действием не выполняются
+    и попадают в ошибки. Возвращает (удалено, освобождено байт, пропущено, ошибки);
+    перенесённое в корзину в освобождённое не входит.
+    """
+    from .deletion import delete_paths, move_to_trash
+
+    by_action = {action: [] for action in ACTIONS}
+    sizes = {}
+    skipped = 0
+    for entry in plan['entries']:
+        try:
+            st = os.lstat(entry['path'])
+        except OSError:
+            skipped += 1
+            continue
+        if st.st_size != entry['size'] or st.st_mtime != entry['mtime']:
+            skipped += 1
+            continue
+        by_action.setdefault(entry['action'], []).append(entry['path'])
+        if entry['action'] == 'delete':
+            sizes[entry['path']] = entry['disk']
+
+    done = []
+    failed_paths = []
+    for action, paths in by_action.items():
+        if not paths:
+            continue
+        if action == 'trash':
+            _, failed, _ = move_to_trash(paths, on_removed=done.append)
+        elif action == 'delete':
+            _, failed = delete_paths(paths, on_removed=done.append)
+        else:
+            logging.error(f"Политики: неизвестное действие {action!r}, пропущено {len(paths)} файлов")
+            failed = paths
+        failed_paths.extend(failed)
+
+    freed = sum(sizes.get(path, 0) for path in done)
+    logging.info(f"Политики: удалено {len(done)} файлов (освобождено {human(freed)}), "
+                 f"пропущено {skipped}, ошибок {len(failed_paths)}")
+    return len(done), freed, skipped, failed_paths
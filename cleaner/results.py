@@ -0,0 +1,164 @@
+"""
+Набор результатов для таблицы GUI: строки пронумерованы, а данные строки читаются по номеру.
+
+Результаты из кэша не разбираются в словарь: ResultSet открывает снимок (snapshot.py) и
+читает путь и поля строки из mmap, когда таблица их запрашивает. В памяти держатся только
+изменения поверх снимка - удалённые строки (по байту на строку), изменённые записи и строки,
+добавленные после загрузки (новое сканирование, пересчёт, восстановление из корзины).
+Не зависит от Qt.
+"""
+import time
+from array import array
+
+from .core import CACHE_FILE, CACHE_MAX_AGE, CACHE_SNAPSHOT_FILE
+
+
+class ResultSet:
+    """
+    Результаты: строки снимка [0, base) по убыванию размера, затем добавленные строки.
+    Номер строки не меняется, пока существует набор; удалённые строки только помечаются.
+    Поддерживает items() и values(), как словарь путь -> info (для save_cache и экспорта).
+    """
+
+    def __init__(self, snapshot=None, items=None):
+        self.snapshot = snapshot
+        self._base = snapshot.count if snapshot is not None else 0
+        self._paths = []        # Пути добавленных строк
+        self._infos = []        # info добавленных строк
+        self._changed = {}      # Номер строки снимка -> изменённый info
+        self.removed = bytearray(self._base)
+        self.live_count = self._base
+        self._sizes = None      # Столбец размеров (size_column), строится при первом запросе
+        if items:
+            self.extend(items.items() if hasattr(items, 'items') else items)
+
+    def __len__(self):
+        return self._base + len(self._paths)
+
+    # --- Чтение строки ---
+
+    def path(self, row):
+        if row >= self._base:
+            return self._paths[row - self._base]
+        return self.snapshot.path(row)
+
+    def info(self, row):
+        """info строки в том же виде, что в кэше (для строк снимка - новый dict при каждом вызове)."""
+        if row >= self._base:
+            return self._infos[row - self._base]
+        info = self._changed.get(row)
+        if info is None:
+            _, info = self.snapshot.item(row)
+        return info
+
+    def _labels(self, row):
+        """(размер, категория, тип, число файлов) строки без построения info."""
+        if row >= self._base or row in self._changed:
+            info = self.info(row)
+            return info['size'], info.get('category', 'Неизвестно'), info['type'], info.get('count', 0)
+        size, _, count, _, category_id, type_id = self.snapshot.record(row)
+        return size, self.snapshot.labels[category_id], self.snapshot.labels[type_id], count
+
+    def size(self, row):
+        return self._labels(row)[0]
+
+    def category(self, row):
+        return self._labels(row)[1]
+
+    def item_type(self, row):
+        return self._labels(row)[2]
+
+    def count(self, row):
+        return self._labels(row)[3]
+
+    def is_live(self, row):
+        return not self.removed[row]
+
+    def live_mask(self):
+        """bytearray по числу строк: 1 - строка не удалена (маска для Selection.select_all)."""
+        return self.removed.translate(_FLIP)
+
+    def size_column(self):
+        """Размеры всех строк по номеру (array 'q'); дальше поддерживается при изменениях."""
+        if self._sizes is None:
+            sizes = self.snapshot.size_column() if self.snapshot is not None else array('q')
+            for row, info in self._changed.items():
+                sizes[row] = info['size']
+            sizes.extend(info['size'] for info in self._infos)
+            self._sizes = sizes
+        return self._sizes
+
+    # --- Изменения ---
+
+    def extend(self, pairs):
+        """Добавляет строки (путь, info); возвращает range их номеров."""
+        start = len(self)
+        for path, info in pairs:
+            self._paths.append(path)
+            self._infos.append(info)
+            if self._sizes is not None:
+                self._sizes.append(info['size'])
+        added = len(self) - start
+        self.removed.extend(bytes(added))
+        self.live_count += added
+        return range(start, len(self))
+
+    def remove(self, row):
+        """Помечает строку удалённой; возвращает её (путь, info) или None, если она уже удалена."""
+        if self.removed[row]:
+            return None
+        item = self.path(row), self.info(row)
+        self.removed[row] = 1
+        self.live_count -= 1
+        return item
+
+    def update(self, row, info):
+        """Заменяет info строки (например, папка уменьшилась после сжатия)."""
+        if row >= self._base:
+            self._infos[row - self._base] = info
+        else:
+            self._changed[row] = info
+        if self._sizes is not None:
+            self._sizes[row] = info['size']
+
+    # --- Обход ---
+
+    def rows(self):
+        """Номера неудалённых строк по возрастанию."""
+        removed = self.removed
+        return (row for row in range(len(self)) if not removed[row])
+
+    def items(self):
+        """(путь, info) неудалённых строк - как dict.items()."""
+        return ((self.path(row), self.info(row)) for row in self.rows())
+
+    def values(self):
+        return (self.info(row) for row in self.rows())
+
+    def copy(self):
+        """Независимая копия для фоновых потоков (снимок общий, он только читается)."""
+        other = ResultSet(self.snapshot)
+        other._paths = list(self._paths)
+        other._infos = list(self._infos)
+        other._changed = dict(self._changed)
+        other.removed = bytearray(self.removed)
+        other.live_count = self.live_count
+        return other
+
+
+_FLIP = bytes([1, 0]) + bytes(254)  # Таблица для bytes.translate: 0 -> 1, 1 -> 0
+
+
+def open_cached_results():
+    """
+    Результаты из свежего бинарного снимка кэша или None (снимка нет, он старее JSON-кэша
+    или кэш устарел - тогда кэш читается обычным путём, см. core.iter_cache_chunks).
+    """
+    from .snapshot import open_snapshot, KIND_ITEMS
+    snapshot = open_snapshot(CACHE_SNAPSHOT_FILE, CACHE_FILE)
+    if snapshot is None:
+        return None
+    if snapshot.kind != KIND_ITEMS or time.time() - snapshot.created > CACHE_MAX_AGE:
+        snapshot.close()
+        return ResultSet()
+    return ResultSet(snapshot)
@@ -0,0 +1,734 @@
+"""Сканер мусора и старых файлов. Не зависит от Qt: прогресс передаётся через колбэк."""
+import os
+import sys
+import time
+import logging
+import threading
+from array import array
+
+from .core import (
+    DirIndex, SCAN_ROOT, SCAN_PROCESSES, TEMP_KEYWORDS, TRASH_EXT, TRASH_DIR_MIN_SIZE,
+    APPDATA_DIR_MIN_SIZE, MERGE_RATIO, MERGE_RATIO_TEMP, MIN_ITEM_SIZE, is_system_or_skip,
+    process_pool_context
+)
+from .stats import StatBatch, InodeSet, allocated_size, reclaimable_size
+from .errors import ScanErrors, retry_transient, walk
+
+# Категория подпапок AppData, которые отбираются по отдельному порогу размера
+APPDATA_CATEGORY = "Мусор (Кэш Приложений)"
+
+# === ЛОГИКА СКАНИРОВАНИЯ (Рабочий поток) ===
+
+class Scanner:
+    """
+    Сканирование мусора и старых файлов. Запускается в отдельном потоке
+    (в GUI через ScanWorker) или напрямую фоновой службой.
+    """
+
+    def __init__(self, days_old, on_progress=None, processes=None, throttle=None):
+        self.days_old = days_old
+        self.on_progress = on_progress or (lambda message: None)
+        self.stop_event = threading.Event()
+        self.dir_index = None
+        self.errors = ScanErrors()  # Ошибки обхода и известные проблемные папки (errors.ScanErrors)
+        self.inodes = InodeSet()    # Жёсткие ссылки, уже учтённые в текущей фазе сканирования
+
+        # Щадящий режим (throttle.ScanThrottle): None - обход на полной скорости
+        self.throttle = throttle
+        if throttle is not None and throttle.stop_event is None:
+            throttle.stop_event = self.stop_event
+
+        # Пороги отбора; после сканирования их можно поменять через reevaluate()
+        self.min_size = MIN_ITEM_SIZE
+        self.trash_dir_min_size = TRASH_DIR_MIN_SIZE
+        self.appdata_dir_min_size = APPDATA_DIR_MIN_SIZE
+        self.merge_ratio = MERGE_RATIO
+        self.merge_ratio_temp = MERGE_RATIO_TEMP
+
+        # Данные последнего сканирования в памяти - для переоценки без обхода диска
+        self.scan_time = 0
+        self.trash_candidates = {}  # Мусор без учёта порогов размера
+        self.old_tree = {}          # Путь -> узел с пачкой StatBatch
+        self.old_root = None
+
+        # Многопроцессный режим: поддеревья верхнего уровня раздаются по процессам
+        processes = SCAN_PROCESSES if processes is None else processes
+        self.processes = processes if processes > 0 else (os.cpu_count() or 1)
+
+    def stop(self):
+        """Установка флага остановки."""
+        self.stop_event.set()
+
+    def run_scan(self):
+        """Основной метод запуска сканирования. Возвращает найденные элементы ({} при остановке)."""
+        self.stop_event.clear()
+        self.scan_time = time.time()
+        self.errors = ScanErrors.load()
+        if self.throttle is not None:
+            self.throttle.start()
+
+        # --- ФАЗА 1: Быстрое системное сканирование мусора (C:\) ---
+        self.on_progress("Фаза 1/2: Быстрое сканирование мусора (C:\\)...")
+        self.quick_trash_scan(SCAN_ROOT)
+
+        if self.stop_event.is_set():
+            return {}
+
+        # --- ФАЗА 2: Глубокое сканирование "старых" файлов (~Home) ---
+        self.on_progress(f"Фаза 2/2: Глубокое сканирование старых файлов ({self.days_old}+ дней)...")
+        home_dir = os.path.expanduser('~')
+
+        # Интеллектуальное группирование старых файлов
+        old_proposals = self.intelligent_grouping_old_files(home_dir)
+
+        all_found_items = self._compose_results(old_proposals)
+        if self.throttle is not None:
+            logging.info(f"Щадящий режим: ожидание {self.throttle.waited:.1f} с за сканирование")
+
+        message = f"Сканирование завершено. Найдено: {len(all_found_items)} уникальных элементов."
+        errors = self.errors.summary()
+        if errors:
+            logging.info(f"Ошибки обхода: {errors}")
+            message += f" Ошибки доступа/чтения: {errors}."
+        if not self.stop_event.is_set():
+            self.errors.save()
+        self.on_progress(message)
+        return all_found_items
+
+    def reevaluate(self, days_old=None, min_size=None, merge_ratio=None, merge_ratio_temp=None,
+                   trash_dir_min_size=None, appdata_dir_min_size=None):
+        """
+        Пересчёт результатов с другими порогами по данным последнего сканирования, без обхода диска.
+        Возраст переоценивается по отсортированным пачкам (StatBatch.count_older), затем заново
+        выполняются группировка и отбор по размеру.
+        """
+        if not self.old_tree and not self.trash_candidates:
+            return {}
+
+        if min_size is not None:
+            self.min_size = min_size
+        if merge_ratio is not None:
+            self.merge_ratio = merge_ratio
+        if merge_ratio_temp is not None:
+            self.merge_ratio_temp = merge_ratio_temp
+        if trash_dir_min_size is not None:
+            self.trash_dir_min_size = trash_dir_min_size
+        if appdata_dir_min_size is not None:
+            self.appdata_dir_min_size = appdata_dir_min_size
+        if days_old is not None and days_old != self.days_old:
+            self.days_old = days_old
+            _reclassify_old_tree(self.old_tree, self._threshold())
+
+        proposals = {}
+        if self.old_root in self.old_tree:
+            self._merge_recursive_old(self.old_tree[self.old_root], self.old_root, proposals, self._threshold())
+        return self._compose_results(proposals)
+
+    def release_scan_data(self):
+        """
+        Освобождает данные последнего сканирования для переоценки (дерево пачек StatBatch,
+        кандидаты в мусор, учтённые жёсткие ссылки). reevaluate после этого возвращает {}.
+        """
+        self.old_tree = {}
+        self.old_root = None
+        self.trash_candidates = {}
+        self.inodes = InodeSet()
+
+    def _threshold(self):
+        """Граница "старости" относительно момента сканирования."""
+        return self.scan_time - self.days_old * 86400
+
+    def _compose_results(self, old_proposals):
+        """Итоговые элементы: мусор с учётом порогов + предложения по старым файлам."""
+        now = time.time()
+        all_found_items = self._apply_trash_floors(self.trash_candidates)
+
+        for p, (item_type, size, count, apparent) in old_proposals.items():
+            if p not in all_found_items and size > 0:
+                all_found_items[p] = {
+                    'type': item_type,
+                    'size': size,
+                    'apparent_size': apparent,
+                    'count': count,
+                    'category': f"Старый Файл ({self.days_old}+)",
+                    'last_scan': now
+                }
+
+        if self.min_size > 0:
+            all_found_items = {p: info for p, info in all_found_items.items() if info['size'] >= self.min_size}
+        return all_found_items
+
+    def _apply_trash_floors(self, candidates):
+        """Отбор кандидатов в мусор по порогам размера."""
+        return {
+            path: info for path, info in candidates.items()
+            if passes_trash_floor(info['type'], info['category'], info['size'], info['count'],
+                                  self.trash_dir_min_size, self.appdata_dir_min_size)
+        }
+
+    # === ВНУТРЕННИЕ АЛГОРИТМЫ СКАНИРОВАНИЯ ===
+
+    def quick_trash_scan(self, root_dir):
+        """
+        Быстрое сканирование по ключевым словам и расширениям.
+        Разбивает большие папки AppData/Roaming на подпапки для лучшего контроля.
+        Все кандидаты сохраняются в trash_candidates, пороги размера применяются к результату.
+        """
+        self.inodes = InodeSet()
+        if self.processes > 1:
+            self.trash_candidates = self._collect_trash_parallel(root_dir)
+        else:
+            self.trash_candidates = self._collect_trash_candidates(root_dir)
+        return self._apply_trash_floors(self.trash_candidates)
+
+    def _collect_trash_candidates(self, root_dir, top_root=None):
+        """
+        Обход сверху вниз: все кандидаты в мусор без порогов размера.
+        top_root - корень всего сканирования, если root_dir лишь его поддерево (процесс-воркер).
+        """
+        top_root = top_root or root_dir
+        trash_items = {}
+
+        for dirpath, dirnames, filenames in walk(root_dir, onerror=self.errors.on_walk_error):
+            if self.stop_event.is_set():
+                return trash_items
+            self.errors.succeeded(dirpath)
+            self._trash_dir_step(dirpath, dirnames, filenames, top_root, trash_items)
+            self.errors.prune(dirpath, dirnames)
+            self._pace(len(filenames) + 1)
+
+        return trash_items
+
+    def _pace(self, ops, nbytes=0):
+        """Притормаживает обход в щадящем режиме (ops - число stat, nbytes - просмотренный объём)."""
+        if self.throttle is not None:
+            self.throttle.pace(ops, nbytes)
+
+    def _trash_dir_step(self, dirpath, dirnames, filenames, top_root, trash_items):
+        """Обработка одной папки при обходе сверху вниз. Обрезает dirnames, если ветку не нужно обходить."""
+        # 1. Проверка на системную папку
+        if is_system_or_skip(dirpath):
+            dirnames[:] = []
+            return
+
+        dir_name = os.path.basename(dirpath).lower()
+
+        # --- Логика деления AppData/Roaming/Local ---
+        is_appdata_root = any(name in dir_name for name in ['local', 'roaming', 'locallow'])
+
+        # 2. Быстрая проверка на Папку-Мусор (по ключевым словам)
+        found_keyword = next((kw for kw in TEMP_KEYWORDS if kw in dir_name), None)
+
+        if found_keyword and dirpath != top_root:
+            category = TEMP_KEYWORDS[found_keyword]
+            # Группируем как одну папку для удаления (порог размера - в _apply_trash_floors)
+            measured = self._measure_dir(dirpath)
+            if measured is not None and measured[0] > 0:
+                size, count, _, apparent = measured
+                trash_items[dirpath] = {
+                    'type': 'trash_dir',
+                    'size': size,
+                    'apparent_size': apparent,
+                    'count': count,
+                    'category': f"Мусор ({category})",
+                    'last_scan': time.time()
+                }
+
+            # Если нашли мусор, дальше по этой ветке не идем (ошибка учтена в ScanErrors,
+            # папка повторится по очереди повторов)
+            dirnames[:] = []
+            return
+
+        # Если это папка AppData/Local или Roaming, ищем мусор в её непосредственных подпапках
+        if is_appdata_root and 'appdata' in os.path.normcase(dirpath):
+            # Начинаем сканирование каждого подкаталога как отдельного элемента
+            for dirname in list(dirnames):
+                subdirpath = os.path.join(dirpath, dirname)
+                if self.stop_event.is_set(): return
+
+                # Ищем мусорные ключевые слова в имени подпапки
+                if any(kw in dirname.lower() for kw in TEMP_KEYWORDS):
+                    continue # Пропустим, если она сама по себе является мусором, чтобы не дублировать
+
+                # Размер и число мусорных файлов (по расширению) - за один обход
+                measured = self._measure_dir(subdirpath)
+
+                # Порог размера и наличие мусора проверяются в _apply_trash_floors
+                if measured is not None and measured[0] > 0:
+                    size, _, trash_files_in_subdir, apparent = measured
+                    trash_items[subdirpath] = {
+                        'type': 'trash_dir',
+                        'size': size,
+                        'apparent_size': apparent,
+                        'count': trash_files_in_subdir,
+                        'category': APPDATA_CATEGORY,
+                        'last_scan': time.time()
+                    }
+
+            # После сканирования подпапок, все равно продолжаем обход, чтобы поймать мусорные файлы
+
+        # 3. Поиск Мусорных Файлов (по расширению)
+        for fn in filenames:
+            ext = os.path.splitext(fn)[1].lower()
+            if ext in TRASH_EXT:
+                fp = os.path.join(dirpath, fn)
+                try:
+                    st = retry_transient(os.lstat, fp)
+                    size = reclaimable_size(st, self.inodes)
+                    if size > 0:
+                        trash_items[fp] = {
+                            'type': 'trash_file',
+                            'size': size,
+                            'apparent_size': st.st_size,
+                            'count': 1,
+                            'category': "Мусор (Файл/Лог)",
+                            'last_scan': time.time()
+                        }
+                except OSError as e:
+                    self.errors.record(fp, e)
+
+    def _collect_trash_parallel(self, root_dir):
+        """Фаза 1 в нескольких процессах: корень - здесь, подпапки верхнего уровня - в воркерах."""
+        trash_items = {}
+        try:
+            dirpath, dirnames, filenames = next(walk(root_dir))
+        except StopIteration:
+            return trash_items
+
+        self._trash_dir_step(dirpath, dirnames, filenames, root_dir, trash_items)
+        self.errors.prune(dirpath, dirnames)
+        subtrees = [os.path.join(root_dir, d) for d in dirnames if not os.path.islink(os.path.join(root_dir, d))]
+
+        for packed in self._run_in_processes(_trash_subtree_packed, subtrees, root_dir):
+            _unpack_trash_items(packed[:3], trash_items)
+            self.errors.merge(packed[3])
+        return trash_items
+
+    def _measure_dir(self, dirpath):
+        """
+        _calculate_dir_size_and_count с учётом ошибок. Кратковременные ошибки повторяются внутри
+        (walk и lstat через retry_transient; весь подсчёт не повторяется - жёсткие ссылки уже
+        отмечены в self.inodes), прочие записываются в ScanErrors как ошибка папки: доступ и
+        сбои ввода-вывода попадают в очередь пропуска/повтора. None - папку измерить не удалось.
+        """
+        try:
+            return self._calculate_dir_size_and_count(dirpath)
+        except Exception as e:
+            if not isinstance(e, OSError):
+                logging.error(f"Ошибка подсчёта размера {dirpath}: {e}")
+            self.errors.record(dirpath, e, is_dir=True)
+            return None
+
+    def _calculate_dir_size_and_count(self, dirpath):
+        """
+        Быстрый подсчет размера на диске, количества файлов, мусорных (по расширению) файлов
+        и видимого размера папки. Символические ссылки не разыменовываются, жёсткие ссылки,
+        уже учтённые в этой фазе, не добавляют размера (столько и освободит удаление).
+        """
+        total_size = 0
+        total_count = 0
+        trash_count = 0
+        apparent = 0
+        for root, dirnames, files in walk(dirpath, onerror=self.errors.on_walk_error):
+            self.errors.succeeded(root)
+            self.errors.prune(root, dirnames)
+            size_before = total_size
+            for f in files:
+                fp = os.path.join(root, f)
+                try:
+                    st = retry_transient(os.lstat, fp)
+                    total_size += reclaimable_size(st, self.inodes)
+                    apparent += st.st_size
+                    total_count += 1
+                    if os.path.splitext(f)[1].lower() in TRASH_EXT:
+                        trash_count += 1
+                except OSError as e:
+                    self.errors.record(fp, e)
+            self._pace(len(files) + 1, total_size - size_before)
+        return total_size, total_count, trash_count, apparent
+
+    # --- АЛГОРИТМЫ СТАРЫХ ФАЙЛОВ (для Фазы 2) ---
+
+    def intelligent_grouping_old_files(self, root_dir):
+        """Интеллектуальный поиск и группировка старых файлов."""
+
+        # 1. Построение дерева с информацией о старых файлах
+        tree = self._build_old_tree(root_dir)
+        if self.stop_event.is_set():
+            return {}
+
+        # Дерево остаётся в памяти для переоценки, агрегаты по папкам - для карты диска
+        self.old_tree = tree
+        self.old_root = root_dir
+        self.dir_index = DirIndex.from_tree(tree)
+
+        # 2. Интеллектуальный мерджинг папок: путь -> (тип, размер, число старых файлов)
+        proposals = {}
+        if root_dir in tree:
+            self._merge_recursive_old(tree[root_dir], root_dir, proposals, self._threshold())
+        return proposals
+
+    def _build_old_tree(self, root_dir):
+        """Строит дерево каталогов, считая 'старые' файлы."""
+        tree = {}
+        threshold = self._threshold()
+        self.inodes = InodeSet()
+
+        # Только для Home/Documents/Downloads
+        scan_folders = [root_dir]
+        if sys.platform.startswith('win'):
+            # Добавляем Documents, Downloads, Pictures
+            import getpass # Нужен только на Windows
+            user = getpass.getuser()
+            doc_paths = [
+                os.path.join('C:\\Users', user, 'Documents'),
+                os.path.join('C:\\Users', user, 'Downloads'),
+                os.path.join('C:\\Users', user, 'Pictures'),
+            ]
+            for p in doc_paths:
+                if os.path.exists(p) and p not in scan_folders:
+                    scan_folders.append(p)
+
+        for r_dir in scan_folders:
+            if self.processes > 1:
+                completed = self._build_old_tree_parallel(r_dir, threshold, tree)
+            else:
+                completed = _walk_old_tree(r_dir, threshold, tree, self.stop_event, self.throttle, self.errors, self.inodes)
+            if not completed:
+                return {}
+
+        return tree
+
+    def _build_old_tree_parallel(self, root_dir, threshold, tree):
+        """Фаза 2 в нескольких процессах: поддеревья считают воркеры, корень достраивается здесь."""
+        try:
+            _, dirnames, filenames = next(walk(root_dir))
+        except StopIteration:
+            return True
+
+        self.errors.prune(root_dir, dirnames)
+        subtrees = [os.path.join(root_dir, d) for d in dirnames]
+        subtrees = [p for p in subtrees if not os.path.islink(p) and not is_system_or_skip(p)]
+
+        for packed in self._run_in_processes(_old_subtree_packed, subtrees, threshold):
+            _unpack_old_tree(packed[:7], threshold, tree, self.inodes)
+            self.errors.merge(packed[7])
+        if self.stop_event.is_set():
+            return False
+
+        if not is_system_or_skip(root_dir):
+            _old_tree_node(root_dir, dirnames, _stat_batch(root_dir, filenames, self.errors, self.inodes), threshold, tree)
+        return True
+
+    def _run_in_processes(self, worker, subtrees, *args):
+        """
+        Раздаёт поддеревья по процессам и отдаёт упакованные результаты по мере готовности.
+        При остановке незапущенные задачи отменяются.
+        """
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        throttle_config = self.throttle.config() if self.throttle is not None else None
+        pool = ProcessPoolExecutor(
+            max_workers=self.processes, mp_context=process_pool_context(), initializer=_init_worker,
+            initargs=(throttle_config, self.processes, self.errors.known)
+        )
+        try:
+            futures = [pool.submit(worker, subtree, *args) for subtree in subtrees]
+            for future in as_completed(futures):
+                if self.stop_event.is_set():
+                    return
+                try:
+                    yield future.result()
+                except Exception as e:
+                    logging.error(f"Ошибка в процессе сканирования: {e}")
+        finally:
+            pool.shutdown(wait=not self.stop_event.is_set(), cancel_futures=True)
+
+    def _merge_recursive_old(self, node, path, proposals, threshold):
+        """Рекурсивно объединяет папки с высоким содержанием старых файлов."""
+        if self.stop_event.is_set(): return 0, 0
+
+        old_count = node['total_old_count']
+        total_real_size = node['total_real_size']
+
+        # 1. Сначала рекурсивно обрабатываем подкаталоги
+        for subdir, subnode in node['subdirs'].items():
+            subpath = os.path.join(path, subdir)
+            self._merge_recursive_old(subnode, subpath, proposals, threshold)
+
+        # 2. Логика объединения для текущей папки
+
+        # Процент старых файлов в текущей папке + подпапках
+        total_files = node['file_count'] + sum(subnode['file_count'] for subnode in node['subdirs'].values())
+        old_ratio = old_count / total_files if total_files > 0 else 0
+
+        # Правила: Если папка содержит 85% старых файлов ИЛИ это системная папка с 60%+
+        is_temp_or_system = any(kw in path.lower() for kw in TEMP_KEYWORDS) or 'appdata' in os.path.normcase(path)
+
+        merge_threshold = self.merge_ratio if not is_temp_or_system else self.merge_ratio_temp
+
+        should_merge = (old_ratio >= merge_threshold and old_count > 5)
+
+        if should_merge and total_real_size > 0:
+            # Предлагаем папку целиком
+            proposals[path] = ('dir', total_real_size, old_count, node['total_apparent_size'])
+        elif node['old_count']:
+            # Если папку не объединяем, предлагаем только отдельные старые файлы в ней.
+            # Размеры берём из пачки - повторный stat не нужен
+            batch = node['files']
+            if node['old_ids'] is None:
+                node['old_ids'] = batch.classify(threshold)[0]
+            for i in node['old_ids']:
+                if batch.sizes[i] > 0:
+                    proposals[os.path.join(path, batch.names[i])] = ('file', batch.sizes[i], 1, batch.apparent[i])
+
+        return old_count, total_real_size
+
+
+# === ОБХОД ДЕРЕВА СТАРЫХ ФАЙЛОВ (общий для потока и процессов-воркеров) ===
+
+def _walk_bottom_up(root_dir, errors=None):
+    """
+    Папки поддерева снизу вверх, как os.walk(topdown=False), но сам обход идёт сверху вниз:
+    так системные папки и известные проблемные папки (errors.prune) отсекаются до входа в них.
+    Папка выдаётся, когда обход вышел из её поддерева.
+    """
+    onerror = errors.on_walk_error if errors is not None else None
+    pending = []  # Стек ещё не выданных папок: (путь, подпапки, файлы)
+    for dirpath, dirnames, filenames in walk(root_dir, onerror=onerror):
+        while pending and not dirpath.startswith(pending[-1][0].rstrip(os.sep) + os.sep):
+            yield pending.pop()
+        if is_system_or_skip(dirpath):
+            dirnames[:] = []  # Системный корень обхода: не входим и не учитываем
+            continue
+        dirnames[:] = [d for d in dirnames if not is_system_or_skip(os.path.join(dirpath, d))]
+        if errors is not None:
+            errors.succeeded(dirpath)
+            errors.prune(dirpath, dirnames)
+        pending.append((dirpath, dirnames, filenames))
+    while pending:
+        yield pending.pop()
+
+def _walk_old_tree(root_dir, threshold, tree, stop_event=None, throttle=None, errors=None, seen=None, links=None):
+    """
+    Обход снизу вверх с подсчётом старых файлов. Возвращает False, если обход остановлен.
+    seen (InodeSet) - учтённые жёсткие ссылки; links - словарь папка -> учтённые здесь
+    файлы с несколькими ссылками (для процессов-воркеров, см. _stat_batch).
+    """
+    for dirpath, dirnames, filenames in _walk_bottom_up(root_dir, errors):
+        if stop_event is not None and stop_event.is_set():
+            return False
+        dir_links = links.setdefault(dirpath, []) if links is not None else None
+        batch = _stat_batch(dirpath, filenames, errors, seen, dir_links)
+        node = _old_tree_node(dirpath, dirnames, batch, threshold, tree)
+        if throttle is not None:
+            throttle.pace(len(filenames) + 1, node['real_size'])
+    return True
+
+def _stat_batch(dirpath, filenames, errors=None, seen=None, links=None):
+    """
+    Собирает lstat всех файлов папки в одну пачку. Символические ссылки не разыменовываются:
+    их цель (возможно, вне дерева или уже учтённая) не добавляет размера. Повторная жёсткая
+    ссылка (по seen) входит в пачку с нулевым размером на диске; первые ссылки на файлы с
+    несколькими ссылками добавляются в links как (номер в пачке, st_dev, st_ino).
+    """
+    batch = StatBatch()
+    for fn in filenames:
+        path = os.path.join(dirpath, fn)
+        try:
+            st = retry_transient(os.lstat, path)
+        except OSError as e:
+            if errors is not None:
+                errors.record(path, e)
+            continue
+        counted = seen is None or seen.first_seen(st)
+        if counted and links is not None and st.st_nlink > 1:
+            links.append((len(batch), st.st_dev, st.st_ino))
+        batch.add(fn, st, allocated_size(st) if counted else 0)
+    return batch
+
+def _old_tree_node(dirpath, dirnames, batch, threshold, tree):
+    """
+    Узел дерева для одной папки; подпапки к этому моменту уже должны быть в tree.
+    Старые файлы определяются одной операцией над пачкой, а не по одному.
+    """
+    old_ids, old_size = batch.classify(threshold)
+    node = {
+        'files': batch,
+        'old_ids': old_ids,  # Индексы старых файлов в пачке (None - пересчитать при надобности)
+        'file_count': len(batch),
+        'old_count': len(old_ids),
+        'old_size': old_size,
+        'real_size': batch.total_size(),               # Место на диске (без повторных жёстких ссылок)
+        'apparent_size': batch.total_apparent_size(),  # Сумма st_size
+        'subdirs': {}, 'total_old_count': 0, 'total_real_size': 0, 'total_apparent_size': 0
+    }
+    tree[dirpath] = node
+
+    for subdir in dirnames:
+        subpath = os.path.join(dirpath, subdir)
+        if subpath in tree:
+            subnode = tree[subpath]
+            node['subdirs'][subdir] = subnode
+            node['total_old_count'] += subnode['total_old_count']
+            node['total_real_size'] += subnode['total_real_size']
+            node['total_apparent_size'] += subnode['total_apparent_size']
+
+    node['total_old_count'] += node['old_count']
+    node['total_real_size'] += node['real_size']
+    node['total_apparent_size'] += node['apparent_size']
+    return node
+
+def passes_trash_floor(item_type, category, size, count, trash_dir_min_size, appdata_dir_min_size):
+    """
+    Проходит ли кандидат в мусор порог размера своего вида. Нужна и для результатов из кэша:
+    пороги размера применяются к ним без данных сканирования.
+    """
+    if item_type == 'trash_file':
+        return size > 0
+    if category == APPDATA_CATEGORY:
+        return count > 0 and size > appdata_dir_min_size
+    return size > trash_dir_min_size
+
+def _depth(path):
+    """Глубина пути: у подпапки на 1 больше, чем у родителя (и для корня вида C:\\ или /)."""
+    return len(path.rstrip(os.sep).split(os.sep))
+
+def _reclassify_old_tree(tree, threshold):
+    """
+    Переоценка возраста по новому порогу без stat: O(log n) на папку по отсортированной пачке.
+    Узлы обходятся от глубоких к мелким, поэтому итоги подпапок уже готовы. Порядку вставки
+    в tree не доверяем: папка, повторно добавленная при обходе следующей из scan_folders,
+    остаётся на своём старом месте.
+    """
+    for _, node in sorted(tree.items(), key=lambda entry: _depth(entry[0]), reverse=True):
+        node['old_count'], node['old_size'] = node['files'].count_older(threshold)
+        node['old_ids'] = None
+        node['total_old_count'] = node['old_count'] + sum(sub['total_old_count'] for sub in node['subdirs'].values())
+
+# === ПРОЦЕССЫ-ВОРКЕРЫ (компактная передача результатов) ===
+# Воркер возвращает не словари, а строки, склеенные через '\0', и array('q') с числами:
+# такие данные сериализуются почти без накладных расходов и быстро разбираются в родителе.
+
+_ITEM_TYPES = ('trash_dir', 'trash_file', 'dir', 'file')
+
+# Регулятор щадящего режима в процессе-воркере (бюджет делится между процессами)
+_worker_throttle = None
+# Известные проблемные папки (errors.ScanErrors.known) - общие для задач процесса
+_worker_known_errors = {}
+
+def _init_worker(throttle_config, processes, known_errors=None):
+    global _worker_throttle, _worker_known_errors
+    _worker_known_errors = known_errors or {}
+    if throttle_config is not None:
+        from .throttle import ScanThrottle
+        _worker_throttle = ScanThrottle.for_worker(throttle_config, processes)
+        _worker_throttle.start()
+
+def _pack_strings(strings):
+    return '\0'.join(strings).encode('utf-8', 'surrogateescape')
+
+def _unpack_strings(blob):
+    return blob.decode('utf-8', 'surrogateescape').split('\0') if blob else []
+
+def _trash_subtree_packed(subtree, top_root):
+    """
+    Воркер фазы 1: кандидаты в поддереве -> (пути, записи [размер, видимый размер, число, тип,
+    категория], категории, ошибки обхода ScanErrors.pack()). Жёсткие ссылки учитываются
+    в пределах поддерева воркера.
+    """
+    scanner = Scanner(0, processes=1, throttle=_worker_throttle)
+    scanner.errors = ScanErrors(_worker_known_errors)
+    items = scanner._collect_trash_candidates(subtree, top_root=top_root)
+    categories = sorted({info['category'] for info in items.values()})
+    category_ids = {c: i for i, c in enumerate(categories)}
+
+    records = array('q')
+    for info in items.values():
+        records.extend((info['size'], info['apparent_size'], info['count'],
+                        _ITEM_TYPES.index(info['type']), category_ids[info['category']]))
+    return _pack_strings(items), records.tobytes(), _pack_strings(categories), scanner.errors.pack()
+
+def _unpack_trash_items(packed, trash_items):
+    paths_blob, records_blob, categories_blob = packed
+    categories = _unpack_strings(categories_blob)
+    records = array('q')
+    records.frombytes(records_blob)
+    now = time.time()
+
+    for i, path in enumerate(_unpack_strings(paths_blob)):
+        size, apparent, count, type_id, category_id = records[5 * i:5 * i + 5]
+        trash_items[path] = {
+            'type': _ITEM_TYPES[type_id],
+            'size': size,
+            'apparent_size': apparent,
+            'count': count,
+            'category': categories[category_id],
+            'last_scan': now
+        }
+
+def _old_subtree_packed(subtree, threshold):
+    """
+    Воркер фазы 2: пачки файлов поддерева -> (пути папок, число файлов в каждой папке,
+    имена файлов, размеры на диске 'q', возрасты 'd', видимые размеры 'q', жёсткие ссылки 'Q',
+    ошибки обхода). Классификацию выполняет родитель, поэтому пачки можно переоценивать
+    по другим порогам без пересканирования. Жёсткие ссылки - тройки (номер файла в общем
+    списке, st_dev, st_ino): родитель обнуляет размер ссылок, уже учтённых в других поддеревьях.
+    """
+    tree = {}
+    links = {}
+    errors = ScanErrors(_worker_known_errors)
+    _walk_old_tree(subtree, threshold, tree, throttle=_worker_throttle, errors=errors, seen=InodeSet(), links=links)
+
+    counts = array('q')
+    names = []
+    sizes = array('q')
+    ages = array('d')
+    apparent = array('q')
+    link_records = array('Q')
+    for path, node in tree.items():
+        batch = node['files']
+        for i, dev, ino in links.get(path, ()):
+            link_records.extend((len(names) + i, dev, ino))
+        counts.append(len(batch))
+        names.extend(batch.names)
+        sizes.extend(batch.sizes)
+        ages.extend(batch.ages)
+        apparent.extend(batch.apparent)
+    return (_pack_strings(tree), counts.tobytes(), _pack_strings(names), sizes.tobytes(), ages.tobytes(),
+            apparent.tobytes(), link_records.tobytes(), errors.pack())
+
+def _unpack_old_tree(packed, threshold, tree, seen=None):
+    """
+    Вливает результат воркера в общее дерево (папки приходят снизу вверх, как в os.walk).
+    seen (InodeSet) - жёсткие ссылки, уже учтённые в других поддеревьях.
+    """
+    paths_blob, counts_blob, names_blob, sizes_blob, ages_blob, apparent_blob, links_blob = packed
+    paths = _unpack_strings(paths_blob)
+    names = _unpack_strings(names_blob)
+    counts, sizes, ages, apparent, links = array('q'), array('q'), array('d'), array('q'), array('Q')
+    counts.frombytes(counts_blob)
+    sizes.frombytes(sizes_blob)
+    ages.frombytes(ages_blob)
+    apparent.frombytes(apparent_blob)
+    links.frombytes(links_blob)
+
+    if seen is not None:
+        for k in range(0, len(links), 3):
+            if not seen.add(links[k + 1], links[k + 2]):
+                sizes[links[k]] = 0
+
+    # Имена подпапок каждой папки в пределах поддерева
+    received = set(paths)
+    child_names = {}
+    for path in paths:
+        parent = os.path.dirname(path)
+        if parent in received:
+            child_names.setdefault(parent, []).append(os.path.basename(path))
+
+    pos = 0
+    for path, n in zip(paths, counts):
+        batch = StatBatch(names[pos:pos + n], sizes[pos:pos + n], ages[pos:pos + n], apparent[pos:pos + n])
+        pos += n
+        # Корень поддерева привяжет к себе родитель
+        _old_tree_node(path, child_names.get(path, ()), batch, threshold, tree)
@@ -0,0 +1,70 @@
+"""Выбор строк результатов: флаги по номерам строк и накопленный размер. Не зависит от Qt."""
+from itertools import compress
+
+
+class Selection:
+    """
+    Выбранные строки по номерам строк ResultSet. Выбор хранится в bytearray флагов
+    (байт на строку, пути не хранятся), а число и суммарный размер выбранного обновляются
+    при каждом изменении, поэтому счётчик в статусной строке не требует обхода таблицы.
+    size_of(номер) - размер строки; читается только при изменении флага.
+    """
+
+    def __init__(self, size_of=None):
+        self.reset(0, size_of)
+
+    def reset(self, rows=0, size_of=None):
+        """Новый набор из rows строк, ни одна не выбрана."""
+        if size_of is not None:
+            self.size_of = size_of
+        elif not hasattr(self, 'size_of'):
+            self.size_of = lambda row: 0
+        self.bits = bytearray(rows)     # 1 - строка выбрана
+        self.count = 0                  # выбрано строк
+        self.total = 0                  # размер выбранного
+
+    def grow(self, rows):
+        """Набор вырос до rows строк (добавленные строки не выбраны)."""
+        if rows > len(self.bits):
+            self.bits.extend(bytes(rows - len(self.bits)))
+
+    def set(self, row, checked):
+        """Выбирает/снимает одну строку. Возвращает True, если состояние изменилось."""
+        flag = 1 if checked else 0
+        if self.bits[row] == flag:
+            return False
+        self.bits[row] = flag
+        size = self.size_of(row)
+        if flag:
+            self.count += 1
+            self.total += size
+        else:
+            self.count -= 1
+            self.total -= size
+        return True
+
+    def set_rows(self, rows, checked):
+        """Выбирает/снимает перечисленные строки. Возвращает номера строк, которые изменились."""
+        return [row for row in rows if self.set(row, checked)]
+
+    def select_all(self, mask, sizes):
+        """
+        Выбирает все строки, отмеченные в mask (bytearray, 1 - строку можно выбрать), одной
+        операцией над флагами; размер выбранного суммируется по маске из sizes (array 'q',
+        размер по номеру строки), без чтения строк по одной.
+        """
+        self.bits = bytearray(mask)
+        self.count = self.bits.count(1)
+        self.total = sum(compress(sizes, self.bits))
+
+    def clear(self):
+        """Снимает выбор со всех строк за одну операцию над флагами."""
+        self.bits = bytearray(len(self.bits))
+        self.count, self.total = 0, 0
+
+    def is_selected(self, row):
+        return row < len(self.bits) and self.bits[row] == 1
+
+    def selected_rows(self):
+        """Номера выбранных строк по возрастанию."""
+        return list(compress(range(len(self.bits)), self.bits))
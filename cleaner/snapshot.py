@@ -0,0 +1,480 @@
+"""
+Бинарные снимки результатов и индекса каталогов для мгновенного холодного старта.
+
+JSON-кэш перед показом нужно разобрать целиком, построив словарь на каждый элемент.
+Снимок открывается через mmap: при открытии читается только заголовок, а строки
+разбираются по номеру, когда их запрашивают, - память расходуется только на
+просмотренные строки. Формат (little-endian):
+
+    заголовок   HEADER: сигнатура, версия, вид, число строк, смещения разделов, время записи
+    смещения    count + 1 чисел 'Q' - начало пути строки i в таблице строк (индекс смещений)
+    записи      count записей фиксированной ширины, по убыванию размера
+    порядок     count чисел 'I' - номера строк по возрастанию пути (байтов UTF-8)
+    дерево      только у папок: count + 2 чисел 'I' - начало списка детей узла i
+                (узел count - корни), затем count номеров детей по убыванию размера
+    метки       категории и типы элементов через '\\0' (в записях - их номера)
+    строки      пути подряд в UTF-8 (surrogateescape)
+
+Виды снимков: найденные элементы (ITEM_RECORD: size, apparent_size, count, last_scan,
+категория, тип) и агрегаты папок (DIR_RECORD: свой размер, полный размер, родитель).
+Снимок папок открывается как SnapshotDirIndex - индекс каталогов без построения DirIndex.
+
+Снимки полных сканирований хранятся в SNAPSHOT_DIR (не больше SNAPSHOT_KEEP каждого вида),
+чтобы diff.py мог сравнить два сканирования одним проходом по порядку путей.
+
+Снимок, открытый через mmap (GUI держит снимок кэша всю сессию), на Windows нельзя заменить
+или переименовать. Тогда новый снимок записывается рядом как версия <снимок>.<время в нс>,
+читатели открывают самую свежую версию (current_snapshot), а старые удаляются, когда их
+больше никто не держит открытыми.
+"""
+import os
+import sys
+import mmap
+import time
+import struct
+import logging
+import tempfile
+from array import array
+
+MAGIC = b'CLNSNAP\0'
+VERSION = 3
+KIND_ITEMS = 0
+KIND_DIRS = 1
+
+# сигнатура, версия, вид, число строк, начало смещений / записей / порядка / дерева / меток / строк, время записи
+HEADER = struct.Struct('<8sHHQQQQQQQd')
+ITEM_RECORD = struct.Struct('<qqqdHH4x')  # size, apparent_size, count, last_scan, категория, тип
+DIR_RECORD = struct.Struct('<qqi4x')      # свой размер, полный размер, строка родителя (-1 - корень)
+_OFFSET = struct.Struct('<Q')             # смещение в таблице строк
+_SPAN = struct.Struct('<QQ')              # начало и конец пути в таблице строк
+_ORDER = struct.Struct('<I')              # номер строки в порядке путей
+_CHILD_SPAN = struct.Struct('<II')        # начало и конец списка детей узла
+
+
+# === ЗАПИСЬ ===
+
+def _encode(path):
+    return path.encode('utf-8', 'surrogateescape')
+
+
+def _write(path, kind, rows, record, labels=(), tree=b''):
+    """
+    Пишет снимок: rows - уже упорядоченные пары (путь, поля записи), tree - раздел дерева
+    (только у папок). Запись атомарная, поэтому читатель никогда не увидит наполовину
+    записанный файл.
+    """
+    encoded = [_encode(row_path) for row_path, _ in rows]
+    offsets = array('Q', [0])
+    running = 0
+    for blob in encoded:
+        running += len(blob)
+        offsets.append(running)
+    order = array('I', sorted(range(len(encoded)), key=encoded.__getitem__))
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+        order.byteswap()
+    labels_blob = '\0'.join(labels).encode('utf-8')
+
+    count = len(rows)
+    offsets_pos = HEADER.size
+    records_pos = offsets_pos + _OFFSET.size * (count + 1)
+    order_pos = records_pos + record.size * count
+    tree_pos = order_pos + _ORDER.size * count
+    labels_pos = tree_pos + len(tree)
+    strings_pos = labels_pos + len(labels_blob)
+
+    # Уникальное имя: GUI и фоновая служба могут записывать снимок одновременно
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, kind, count, offsets_pos, records_pos, order_pos, tree_pos, labels_pos,
+                                strings_pos, time.time()))
+            f.write(offsets.tobytes())
+            f.write(b''.join(record.pack(*fields) for _, fields in rows))
+            f.write(order.tobytes())
+            f.write(tree)
+            f.write(labels_blob)
+            f.write(b''.join(encoded))
+        _publish(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
+
+
+def _versions(path):
+    """Файлы снимка path: сам path и его версии path.<число> (см. _publish)."""
+    directory, name = os.path.split(os.path.abspath(path))
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    prefix = name + '.'
+    return [os.path.join(directory, other) for other in names
+            if other == name or (other.startswith(prefix) and other[len(prefix):].isdigit())]
+
+
+def current_snapshot(path):
+    """Самая свежая версия снимка path или None, если снимка нет."""
+    newest, newest_key = None, None
+    for version in _versions(path):
+        try:
+            key = (os.path.getmtime(version), version != path, version)
+        except OSError:
+            continue  # Версию удалили между листингом и stat
+        if newest_key is None or key > newest_key:
+            newest, newest_key = version, key
+    return newest
+
+
+def _publish(tmp_path, path):
+    """
+    Делает записанный tmp_path текущим снимком path: os.replace поверх path, а если path
+    открыт через mmap и не заменяется (Windows) - новой версией path.<нс>. Версии старше
+    записанной удаляются; те, что ещё открыты, останутся до следующей записи.
+    Возвращает путь, под которым записан снимок.
+    """
+    try:
+        os.replace(tmp_path, path)
+        target = path
+    except PermissionError:
+        target = f"{path}.{time.time_ns()}"
+        os.replace(tmp_path, target)
+        logging.info(f"Снимок {path} открыт другим окном, записана версия {target}")
+
+    written = os.path.getmtime(target)
+    for version in _versions(path):
+        if version == target:
+            continue
+        try:
+            if os.path.getmtime(version) <= written:
+                os.remove(version)
+        except OSError:
+            pass  # Версия открыта (Windows) или уже удалена
+    return target
+
+
+def write_items_snapshot(items, path):
+    """Снимок найденных элементов (dict путь -> info), по убыванию размера."""
+    labels = sorted({info.get('category', 'Неизвестно') for info in items.values()} |
+                    {info['type'] for info in items.values()})
+    label_ids = {label: i for i, label in enumerate(labels)}
+
+    rows = []
+    for item_path, info in sorted(items.items(), key=lambda kv: -kv[1]['size']):
+        rows.append((item_path, (
+            info['size'],
+            info.get('apparent_size', info['size']),
+            info.get('count', 1),
+            info.get('last_scan', 0),
+            label_ids[info.get('category', 'Неизвестно')],
+            label_ids[info['type']],
+        )))
+    return _write(path, KIND_ITEMS, rows, ITEM_RECORD, labels)
+
+
+def write_dirs_snapshot(index, path):
+    """
+    Снимок агрегатов DirIndex (без удалённых папок), по убыванию полного размера, с деревом:
+    родитель в записи и списки детей, уже упорядоченные по размеру.
+    """
+    live = [i for i in range(len(index)) if index.paths[i] in index.ids]
+    live.sort(key=lambda i: -index.total_sizes[i])
+    row_of = {node_id: row for row, node_id in enumerate(live)}
+    parents = [row_of.get(index.parents[i], -1) for i in live]
+    rows = [(index.paths[i], (index.own_sizes[i], index.total_sizes[i], parent)) for i, parent in zip(live, parents)]
+
+    # Списки детей подряд (узел count - корни); строки идут по убыванию размера, поэтому
+    # и дети каждого узла получаются упорядоченными
+    count = len(live)
+    starts = array('I', [0]) * (count + 2)
+    for parent in parents:
+        starts[(parent if parent >= 0 else count) + 1] += 1
+    for node in range(count + 1):
+        starts[node + 1] += starts[node]
+    children = array('I', [0]) * count
+    filled = array('I', starts[:-1])
+    for row, parent in enumerate(parents):
+        node = parent if parent >= 0 else count
+        children[filled[node]] = row
+        filled[node] += 1
+    if sys.byteorder == 'big':
+        starts.byteswap()
+        children.byteswap()
+    return _write(path, KIND_DIRS, rows, DIR_RECORD, tree=starts.tobytes() + children.tobytes())
+
+
+# === ЧТЕНИЕ ===
+
+class Snapshot:
+    """
+    Открытый через mmap снимок. Строки читаются по номеру (0 - самая большая) без разбора
+    остальных; файл закрывается через close() или выход из with.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, self.kind, self.count, self._offsets_pos, self._records_pos,
+             self._order_pos, self._tree_pos, labels_pos, self._strings_pos, self.created) = HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path}: не снимок или неподдерживаемая версия")
+            self._record = ITEM_RECORD if self.kind == KIND_ITEMS else DIR_RECORD
+            strings_size = _OFFSET.unpack_from(self._mm, self._offsets_pos + _OFFSET.size * self.count)[0]
+            if self._strings_pos + strings_size > len(self._mm):
+                raise ValueError(f"{path}: снимок обрезан")
+            labels_blob = self._mm[labels_pos:self._strings_pos]
+            self.labels = labels_blob.decode('utf-8').split('\0') if labels_blob else []
+        except BaseException:
+            self._mm.close()
+            raise
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mm.close()
+
+    def path_bytes(self, i):
+        """Путь строки i в UTF-8 (без декодирования - для сравнения путей)."""
+        start, end = _SPAN.unpack_from(self._mm, self._offsets_pos + _OFFSET.size * i)
+        return self._mm[self._strings_pos + start:self._strings_pos + end]
+
+    def path(self, i):
+        """Путь строки i."""
+        return self.path_bytes(i).decode('utf-8', 'surrogateescape')
+
+    def size(self, i):
+        """Размер строки i: size элемента или полный размер папки."""
+        return self.record(i)[0 if self.kind == KIND_ITEMS else 1]
+
+    def _ordered(self, k):
+        """Номер строки, k-й по возрастанию пути."""
+        return _ORDER.unpack_from(self._mm, self._order_pos + _ORDER.size * k)[0]
+
+    def iter_sorted(self):
+        """(путь в UTF-8, номер строки) по возрастанию пути - для слияния двух снимков."""
+        for k in range(self.count):
+            i = self._ordered(k)
+            yield self.path_bytes(i), i
+
+    def find(self, path):
+        """Номер строки пути path или None - двоичный поиск по порядку путей, без разбора строк."""
+        target = _encode(path)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.path_bytes(self._ordered(mid)) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            i = self._ordered(lo)
+            if self.path_bytes(i) == target:
+                return i
+        return None
+
+    def children(self, i):
+        """Подпапки строки i по убыванию размера (i = count - корни); только для снимков папок."""
+        start, end = _CHILD_SPAN.unpack_from(self._mm, self._tree_pos + _ORDER.size * i)
+        base = self._tree_pos + _ORDER.size * (self.count + 2)
+        kids = array('I', self._mm[base + _ORDER.size * start:base + _ORDER.size * end])
+        if sys.byteorder == 'big':
+            kids.byteswap()
+        return kids
+
+    def size_column(self):
+        """
+        Размеры всех строк (как size(i)) одним array 'q': записи лежат подряд, а размер - поле
+        'q' на постоянном месте, поэтому столбец вырезается срезом с шагом, без разбора записей.
+        """
+        stride = self._record.size // 8
+        column = array('q', self._mm[self._records_pos:self._records_pos + self._record.size * self.count])
+        column = column[0 if self.kind == KIND_ITEMS else 1::stride]
+        if sys.byteorder == 'big':
+            column.byteswap()
+        return column
+
+    def record(self, i):
+        """Поля записи строки i (кортеж по ITEM_RECORD или DIR_RECORD)."""
+        return self._record.unpack_from(self._mm, self._records_pos + self._record.size * i)
+
+    def item(self, i):
+        """(путь, info) найденного элемента - в том же виде, что в кэше результатов."""
+        size, apparent, count, last_scan, category_id, type_id = self.record(i)
+        return self.path(i), {
+            'type': self.labels[type_id],
+            'size': size,
+            'apparent_size': apparent,
+            'count': count,
+            'category': self.labels[category_id],
+            'last_scan': last_scan,
+        }
+
+    def items(self, start=0, stop=None):
+        """Элементы строк [start, stop) по убыванию размера."""
+        for i in range(start, self.count if stop is None else min(stop, self.count)):
+            yield self.item(i)
+
+    def chunks(self, chunk_size, max_age=None):
+        """Пачки (dict путь -> info) по убыванию размера; max_age - пропуск устаревших записей."""
+        now = time.time()
+        for start in range(0, self.count, chunk_size):
+            chunk = {}
+            for path, info in self.items(start, start + chunk_size):
+                if max_age is None or now - info['last_scan'] <= max_age:
+                    chunk[path] = info
+            if chunk:
+                yield chunk
+
+    def dir_entries(self):
+        """(путь, свой размер, полный размер) для DirIndex.from_entries."""
+        for i in range(self.count):
+            own_size, total_size, _ = self.record(i)
+            yield self.path(i), own_size, total_size
+
+
+class _Column:
+    """Столбец снимка как последовательность: значение строки читается при обращении."""
+
+    def __init__(self, count, getter):
+        self._count = count
+        self._getter = getter
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return self._getter(i)
+
+    def __iter__(self):
+        return map(self._getter, range(self._count))
+
+
+class _PathIds:
+    """Путь -> номер строки снимка (двоичный поиск, как словарь DirIndex.ids, но без словаря)."""
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+
+    def __len__(self):
+        return self._snapshot.count
+
+    def __contains__(self, path):
+        return self._snapshot.find(path) is not None
+
+    def get(self, path, default=None):
+        i = self._snapshot.find(path)
+        return default if i is None else i
+
+    def __getitem__(self, path):
+        i = self._snapshot.find(path)
+        if i is None:
+            raise KeyError(path)
+        return i
+
+    def __iter__(self):
+        for blob, _ in self._snapshot.iter_sorted():
+            yield blob.decode('utf-8', 'surrogateescape')
+
+
+class SnapshotDirIndex:
+    """
+    Индекс каталогов только для чтения поверх снимка папок: тот же интерфейс, что у DirIndex
+    (paths, ids, parents, own_sizes, total_sizes, children, roots, children_of), но пути,
+    размеры и дети читаются из mmap при обращении. Память - только на просмотренные узлы,
+    сколько бы папок ни было в индексе.
+    """
+
+    def __init__(self, snapshot):
+        if snapshot.kind != KIND_DIRS:
+            raise ValueError("Нужен снимок папок")
+        self.snapshot = snapshot
+        count = snapshot.count
+        self.paths = _Column(count, snapshot.path)
+        self.own_sizes = _Column(count, lambda i: snapshot.record(i)[0])
+        self.total_sizes = _Column(count, lambda i: snapshot.record(i)[1])
+        self.parents = _Column(count, lambda i: snapshot.record(i)[2])
+        self.children = _Column(count, snapshot.children)
+        self.ids = _PathIds(snapshot)
+        self.roots = list(snapshot.children(count))
+
+    def __len__(self):
+        return self.snapshot.count
+
+    def name_of(self, node_id):
+        path = self.paths[node_id]
+        return os.path.basename(path) or path
+
+    def children_of(self, node_id):
+        """Подпапки по убыванию размера (порядок записан в снимке)."""
+        return self.snapshot.children(node_id)
+
+    def live_entries(self):
+        """(путь, свой размер, полный размер) всех папок."""
+        return self.snapshot.dir_entries()
+
+
+def open_snapshot(path, source_path=None):
+    """
+    Самая свежая версия снимка path или None, если его нет, он повреждён или старее исходного
+    файла source_path (например, JSON-кэш записан позже, а снимок записать не удалось).
+    """
+    try:
+        path = current_snapshot(path)
+        if path is None:
+            return None
+        if source_path is not None and os.path.exists(source_path) and os.path.getmtime(path) < os.path.getmtime(source_path):
+            return None
+        return Snapshot(path)
+    except (OSError, ValueError, struct.error) as e:
+        logging.error(f"Ошибка открытия снимка {path}: {e}")
+        return None
+
+
+# === ИСТОРИЯ СНИМКОВ ===
+
+def history(directory, prefix):
+    """Сохранённые снимки вида prefix ('items' или 'dirs') - от старых к новым."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith(prefix + '-') and name.endswith('.snap')
+    )
+
+
+def retain_snapshot(path, directory, prefix, keep):
+    """
+    Сохраняет текущий снимок path в историю (жёсткой ссылкой, если можно: снимок всегда
+    заменяется через os.replace, поэтому сохранённая версия не меняется) и удаляет
+    самые старые снимки сверх keep. Возвращает путь сохранённого снимка.
+    """
+    path = current_snapshot(path) or path
+    os.makedirs(directory, exist_ok=True)
+    now = time.time()
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now)) + f'.{int(now * 1000) % 1000:03d}'
+    target = os.path.join(directory, f"{prefix}-{stamp}.snap")
+    try:
+        os.link(path, target)
+    except OSError:
+        import shutil
+        shutil.copyfile(path, target)
+
+    for old_path in history(directory, prefix)[:-keep]:
+        try:
+            os.remove(old_path)
+        except OSError as e:
+            logging.error(f"Не удалось удалить старый снимок {old_path}: {e}")
+    return target
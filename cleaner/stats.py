@@ -0,0 +1,163 @@
+"""
+Пакетная классификация файлов папки по возрасту и размеру (NumPy - если установлен)
+и учёт места на диске: занятые блоки вместо видимого размера, жёсткие ссылки - один раз.
+"""
+from array import array
+from bisect import bisect_left
+
+# NumPy необязателен и заметно замедляет импорт, поэтому подгружается при первой большой пачке
+NUMPY_MIN_BATCH = 64  # Меньшие пачки быстрее посчитать чистым Python
+_numpy_module = None
+_numpy_checked = False
+
+
+def _numpy():
+    """Модуль numpy или None, если он не установлен."""
+    global _numpy_module, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            _numpy_module = numpy
+        except ImportError:
+            _numpy_module = None
+    return _numpy_module
+
+
+# === УЧЁТ МЕСТА НА ДИСКЕ ===
+
+def allocated_size(st):
+    """Место, которое файл занимает на диске (st_blocks); где st_blocks нет (Windows) - видимый размер."""
+    blocks = getattr(st, 'st_blocks', None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+class InodeSet:
+    """
+    Файлы с несколькими жёсткими ссылками, уже учтённые за сканирование: устройство -> set inode.
+    Место такого файла освобождается один раз, поэтому и считается только по первой ссылке.
+    Файлы с одной ссылкой не запоминаются (дважды их не встретить), так что набор остаётся маленьким.
+    """
+
+    __slots__ = ('_seen',)
+
+    def __init__(self):
+        self._seen = {}
+
+    def __len__(self):
+        return sum(len(inodes) for inodes in self._seen.values())
+
+    def add(self, dev, ino):
+        """Отмечает inode учтённым. False - он уже был учтён раньше."""
+        inodes = self._seen.get(dev)
+        if inodes is None:
+            inodes = self._seen[dev] = set()
+        elif ino in inodes:
+            return False
+        inodes.add(ino)
+        return True
+
+    def first_seen(self, st):
+        """True, если место файла ещё не учтено (и отмечает его учтённым)."""
+        if st.st_nlink <= 1 or not st.st_ino:
+            return True  # Единственная ссылка или ФС без номеров inode
+        return self.add(st.st_dev, st.st_ino)
+
+
+def reclaimable_size(st, seen=None):
+    """Сколько места освободит удаление файла: занятые блоки, 0 - если жёсткая ссылка уже учтена."""
+    if seen is not None and not seen.first_seen(st):
+        return 0
+    return allocated_size(st)
+
+
+class StatBatch:
+    """
+    Файлы одной папки в плотных массивах: имена, размеры на диске (array 'q'), видимые
+    размеры st_size (array 'q') и "возраст" - max(atime, mtime, ctime) (array 'd').
+    Классификация по порогу выполняется одной векторной операцией; после prepare()
+    любой порог считается за O(log n).
+    """
+
+    __slots__ = ('names', 'sizes', 'apparent', 'ages', '_sorted_ages', '_cum_sizes')
+
+    def __init__(self, names=None, sizes=None, ages=None, apparent=None):
+        self.names = names if names is not None else []
+        self.sizes = sizes if sizes is not None else array('q')
+        self.ages = ages if ages is not None else array('d')
+        self.apparent = apparent if apparent is not None else array('q', self.sizes)
+        self._sorted_ages = None
+        self._cum_sizes = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, st, size=None):
+        """
+        Добавляет файл по результату os.lstat. size - место на диске, если оно уже посчитано
+        (0 для повторной жёсткой ссылки); по умолчанию - занятые блоки файла.
+        """
+        self.names.append(name)
+        self.sizes.append(allocated_size(st) if size is None else size)
+        self.apparent.append(st.st_size)
+        self.ages.append(max(st.st_atime, st.st_mtime, st.st_ctime))
+        self._sorted_ages = None
+
+    def _np(self):
+        return _numpy() if len(self.names) >= NUMPY_MIN_BATCH else None
+
+    def total_size(self):
+        np = self._np()
+        if np is not None:
+            return int(np.frombuffer(self.sizes, dtype=np.int64).sum())
+        return sum(self.sizes)
+
+    def total_apparent_size(self):
+        """Сумма видимых размеров (st_size)."""
+        np = self._np()
+        if np is not None:
+            return int(np.frombuffer(self.apparent, dtype=np.int64).sum())
+        return sum(self.apparent)
+
+    def classify(self, threshold):
+        """Старые файлы (возраст < threshold): (список индексов, суммарный размер)."""
+        np = self._np()
+        if np is not None:
+            ages = np.frombuffer(self.ages, dtype=np.float64)
+            old_ids = np.flatnonzero(ages < threshold)
+            old_size = int(np.frombuffer(self.sizes, dtype=np.int64)[old_ids].sum())
+            return old_ids.tolist(), old_size
+
+        sizes = self.sizes
+        old_ids = [i for i, age in enumerate(self.ages) if age < threshold]
+        return old_ids, sum(sizes[i] for i in old_ids)
+
+    def prepare(self):
+        """Сортирует возрасты и накапливает размеры - для быстрой переоценки по разным порогам."""
+        if self._sorted_ages is not None:
+            return
+        np = self._np()
+        if np is not None:
+            ages = np.frombuffer(self.ages, dtype=np.float64)
+            order = np.argsort(ages, kind='stable')
+            self._sorted_ages = ages[order]
+            self._cum_sizes = np.concatenate(([0], np.cumsum(np.frombuffer(self.sizes, dtype=np.int64)[order])))
+            return
+
+        order = sorted(range(len(self.ages)), key=self.ages.__getitem__)
+        self._sorted_ages = array('d', (self.ages[i] for i in order))
+        cum_sizes = array('q', [0])
+        running = 0
+        for i in order:
+            running += self.sizes[i]
+            cum_sizes.append(running)
+        self._cum_sizes = cum_sizes
+
+    def count_older(self, threshold):
+        """(число, размер) файлов старше порога без прохода по всем файлам."""
+        self.prepare()
+        if isinstance(self._sorted_ages, array):
+            k = bisect_left(self._sorted_ages, threshold)
+        else:
+            k = int(self._sorted_ages.searchsorted(threshold, side='left'))
+        return k, int(self._cum_sizes[k])
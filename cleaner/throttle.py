@@ -0,0 +1,169 @@
+"""
+Щадящий режим сканирования: бюджет операций/байт в секунду (token bucket), пониженный
+приоритет (nice/ionice), адаптивное замедление при росте задержки stat и ожидание простоя.
+Не зависит от Qt.
+"""
+import os
+import sys
+import time
+import logging
+
+from .core import (
+    SCAN_LATENCY_HIGH, SCAN_LATENCY_LOW, SCAN_IDLE_LOAD, SCAN_IDLE_IO_PRESSURE,
+    SCAN_IDLE_CHECK_INTERVAL, lower_thread_priority
+)
+
+MIN_DUTY = 1 / 16       # Минимальная доля времени, которую сканер может занимать диск
+DUTY_DECREASE = 0.5     # Во сколько раз снижается доля при высокой задержке
+DUTY_INCREASE = 0.05    # На сколько растёт доля при низкой задержке
+LATENCY_EWMA = 0.3      # Вес нового замера в скользящем среднем задержки
+
+
+class TokenBucket:
+    """Ведро токенов: rate единиц в секунду, запас не больше burst (по умолчанию - секунда работы)."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def consume(self, amount):
+        """Списывает amount и возвращает, сколько секунд нужно подождать до погашения долга."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class ScanThrottle:
+    """
+    Регулятор скорости обхода. Сканер вызывает pace() после каждой папки, передавая
+    число выполненных stat и суммарный размер просмотренных файлов.
+
+    ops_per_sec / bytes_per_sec - бюджеты (0 - без ограничения);
+    low_priority - nice 19 и ionice idle для потока сканирования (Linux);
+    adaptive - при росте средней задержки stat выше SCAN_LATENCY_HIGH сканер
+    уступает диск: после каждой папки спит пропорционально времени работы
+    (доля занятости снижается вдвое, а при задержке ниже SCAN_LATENCY_LOW - плавно растёт);
+    idle_only - работа только при простое системы (load average и давление на диск).
+    """
+
+    def __init__(self, ops_per_sec=0, bytes_per_sec=0, low_priority=True, adaptive=True,
+                 idle_only=False, stop_event=None):
+        self.ops_per_sec = ops_per_sec
+        self.bytes_per_sec = bytes_per_sec
+        self.low_priority = low_priority
+        self.adaptive = adaptive
+        self.idle_only = idle_only
+        self.stop_event = stop_event
+
+        self._ops_bucket = TokenBucket(ops_per_sec) if ops_per_sec > 0 else None
+        self._bytes_bucket = TokenBucket(bytes_per_sec) if bytes_per_sec > 0 else None
+        self.duty = 1.0         # Доля времени, которую сканер занимает диск
+        self.latency = 0.0      # Скользящее среднее задержки одной операции (сек)
+        self.waited = 0.0       # Сколько всего сканер проспал (для статистики)
+        self._idle_checked_at = 0.0
+        self._last = None
+
+    def config(self):
+        """Параметры для воссоздания регулятора в процессе-воркере."""
+        return {
+            'ops_per_sec': self.ops_per_sec, 'bytes_per_sec': self.bytes_per_sec,
+            'low_priority': self.low_priority, 'adaptive': self.adaptive, 'idle_only': self.idle_only,
+        }
+
+    @classmethod
+    def for_worker(cls, config, processes):
+        """Регулятор одного из processes воркеров: бюджеты делятся поровну."""
+        config = dict(config)
+        config['ops_per_sec'] /= processes
+        config['bytes_per_sec'] /= processes
+        return cls(**config)
+
+    def start(self):
+        """Вызывается в потоке сканирования перед обходом."""
+        if self.low_priority:
+            lower_thread_priority()
+        self._last = time.monotonic()
+        if self.idle_only:
+            self._wait_idle()
+
+    def pace(self, ops, nbytes=0):
+        """Учитывает работу с прошлого вызова и при необходимости притормаживает обход."""
+        now = time.monotonic()
+        if self._last is None:
+            self._last = now
+            return
+        work_time = now - self._last
+
+        delay = 0.0
+        if self._ops_bucket is not None:
+            delay = max(delay, self._ops_bucket.consume(ops))
+        if self._bytes_bucket is not None and nbytes:
+            delay = max(delay, self._bytes_bucket.consume(nbytes))
+
+        if self.adaptive and ops > 0:
+            self._adapt(work_time / ops)
+            if self.duty < 1.0:
+                delay = max(delay, work_time * (1.0 - self.duty) / self.duty)
+
+        if delay > 0:
+            self._sleep(delay)
+        if self.idle_only and time.monotonic() - self._idle_checked_at >= SCAN_IDLE_CHECK_INTERVAL:
+            self._wait_idle()
+        self._last = time.monotonic()
+
+    def _adapt(self, latency):
+        self.latency = latency if self.latency == 0.0 else (1 - LATENCY_EWMA) * self.latency + LATENCY_EWMA * latency
+        if self.latency > SCAN_LATENCY_HIGH:
+            duty = max(MIN_DUTY, self.duty * DUTY_DECREASE)
+            if duty < self.duty:
+                logging.debug(f"Задержка stat {self.latency * 1000:.1f} мс: доля сканирования {duty:.0%}")
+            self.duty = duty
+        elif self.latency < SCAN_LATENCY_LOW:
+            self.duty = min(1.0, self.duty + DUTY_INCREASE)
+
+    def _sleep(self, seconds):
+        self.waited += seconds
+        if self.stop_event is not None:
+            self.stop_event.wait(seconds)
+        else:
+            time.sleep(seconds)
+
+    def _wait_idle(self):
+        """Ждёт, пока система не станет простаивать (или не будет запрошена остановка)."""
+        logged = False
+        while not system_is_idle():
+            if self.stop_event is not None and self.stop_event.is_set():
+                break
+            if not logged:
+                logging.info("Сканирование приостановлено до простоя системы")
+                logged = True
+            self._sleep(SCAN_IDLE_CHECK_INTERVAL)
+        self._idle_checked_at = time.monotonic()
+
+
+def _io_pressure():
+    """Доля времени (%), когда задачи ждали диск за последние 10 с (Linux PSI), или None."""
+    try:
+        with open('/proc/pressure/io', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('some '):
+                    return float(line.split('avg10=', 1)[1].split()[0])
+    except (OSError, IndexError, ValueError):
+        pass
+    return None
+
+
+def system_is_idle():
+    """Система простаивает: load average на ядро и давление на диск ниже порогов."""
+    if hasattr(os, 'getloadavg'):
+        if os.getloadavg()[0] / (os.cpu_count() or 1) > SCAN_IDLE_LOAD:
+            return False
+    if sys.platform.startswith('linux'):
+        pressure = _io_pressure()
+        if pressure is not None and pressure > SCAN_IDLE_IO_PRESSURE:
+            return False
+    return True
@@ -0,0 +1,19 @@
+"""Общие фикстуры: всё, что тесты пишут на диск, лежит во временной папке теста."""
+import pytest
+
+
+@pytest.fixture
+def trash(tmp_path, monkeypatch):
+    """Домашняя корзина (через XDG_DATA_HOME) и журнал корзины во временной папке."""
+    from cleaner import deletion
+
+    monkeypatch.setenv('XDG_DATA_HOME', str(tmp_path / 'share'))
+    monkeypatch.setattr(deletion, 'TRASH_LEDGER_FILE', str(tmp_path / 'cleaner_trash.json'))
+    monkeypatch.setattr(deletion, '_trash_dir_cache', {})
+    return tmp_path / 'share' / 'Trash'
+
+
+def make_file(path, data=b'x'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
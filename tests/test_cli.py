@@ -0,0 +1,56 @@
+import json
+import sys
+
+import pytest
+
+from cleaner import __main__ as cli
+
+
+@pytest.mark.parametrize('args', [
+    [],
+    ['--processes', '4', '--daemon'],
+    ['--daemon', '--policy', 'p.json'],
+    ['--export', 'r.jsonl', '--scan', '--dirs', '--diff'],
+    ['--diff', '--dirs', '--top', '5'],
+    ['--purge-trash'],
+    ['--purge-trash', '30'],
+    ['--throttle', '--idle', '--daemon'],
+    ['--throttle', '500', '--throttle-bytes', '0'],
+    ['--compress', 'a', 'b', '--codec', 'xz', '--level', '9'],
+    ['--policy', '--dry-run'],
+])
+def test_valid_command_lines(args):
+    assert cli._check_args(args) is None
+
+
+@pytest.mark.parametrize('args, message', [
+    (['--dry-rn'], 'неизвестная опция'),
+    (['stray'], 'лишний аргумент'),
+    (['--export'], 'нужно значение'),
+    (['--processes', 'abc', '--daemon'], 'целым числом'),
+    (['--throttle', 'abc'], 'целым числом'),
+    (['--purge-trash', '7d'], 'целым числом'),
+    (['--fleet', 'dir', '--top', '0'], 'не меньше 1'),
+    (['--processes', '-2'], 'не меньше 0'),
+    (['--level', '2.5', '--compress', 'x'], 'целым числом'),
+    (['--purge-trash', '--policy'], 'несовместимы'),
+    (['--export', 'r.csv', '--fleet', 'dir'], 'несовместимы'),
+    (['--daemon', '--compress', 'x'], 'несовместимы'),
+])
+def test_invalid_command_lines(args, message):
+    assert message in cli._check_args(args)
+
+
+def test_main_rejects_bad_number_with_usage(monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['cleaner', '--processes', 'abc', '--daemon'])
+
+    assert cli.main() == 2
+    assert 'python -m cleaner' in capsys.readouterr().err
+
+
+def test_daemon_with_invalid_policies_exits_2(tmp_path, monkeypatch):
+    policies = tmp_path / 'policies.json'
+    policies.write_text(json.dumps([{'root': str(tmp_path), 'older_than_days': 1, 'action': 'shred'}]))
+    monkeypatch.setattr(sys, 'argv', ['cleaner', '--daemon', '--policy', str(policies)])
+
+    assert cli.main() == 2
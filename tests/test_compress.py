@@ -0,0 +1,139 @@
+import gzip
+import os
+
+from cleaner import compress
+from cleaner.compress import COMPRESSED, FAILED, SKIPPED, compress_file
+
+from conftest import make_file
+
+DATA = b'2024-01-01 INFO request handled\n' * 4000
+
+
+def _tmp_files(directory):
+    return [name for name in os.listdir(directory) if '.tmp' in name]
+
+
+def test_compress_replaces_original(tmp_path):
+    path = make_file(tmp_path / 'app.log', DATA)
+    os.utime(path, (1_000_000_000, 1_000_000_000))
+
+    status, target, before, after, reason = compress_file(str(path), 'gzip')
+
+    assert (status, reason) == (COMPRESSED, None)
+    assert target == str(path) + '.gz'
+    assert not path.exists()
+    assert 0 < after < before
+    with gzip.open(target, 'rb') as f:
+        assert f.read() == DATA
+    assert os.stat(target).st_mtime == 1_000_000_000  # Архив остаётся "старым"
+    assert _tmp_files(tmp_path) == []
+
+
+def test_verify_failure_keeps_original(tmp_path, monkeypatch):
+    path = make_file(tmp_path / 'app.log', DATA)
+    stream = compress._stream
+    # Сжатие проходит, а проверка видит другие данные
+    monkeypatch.setattr(compress, '_stream', lambda src, dst=None: stream(src, dst) if dst else (b'', 0))
+
+    status, target, _, _, reason = compress_file(str(path), 'gzip')
+
+    assert (status, target) == (FAILED, None)
+    assert reason
+    assert path.read_bytes() == DATA
+    assert os.listdir(tmp_path) == ['app.log']
+
+
+def test_error_mid_stream_removes_tmp(tmp_path, monkeypatch):
+    path = make_file(tmp_path / 'app.log', DATA)
+
+    def broken(src, dst=None):
+        dst.write(src.read(1024))
+        raise OSError(28, 'No space left on device')
+    monkeypatch.setattr(compress, '_stream', broken)
+
+    status, _, _, _, reason = compress_file(str(path), 'gzip')
+
+    assert status == FAILED
+    assert 'No space' in reason
+    assert path.read_bytes() == DATA
+    assert os.listdir(tmp_path) == ['app.log']
+
+
+def test_existing_tmp_file_is_not_touched(tmp_path):
+    path = make_file(tmp_path / 'app.log', DATA)
+    foreign = make_file(tmp_path / f'.app.log.gz.tmp{os.getpid()}', b'not ours')
+
+    status, _, _, _, _ = compress_file(str(path), 'gzip')
+
+    assert status == FAILED
+    assert foreign.read_bytes() == b'not ours'
+    assert path.read_bytes() == DATA
+
+
+def test_skips(tmp_path):
+    small = make_file(tmp_path / 'small.log', b'x' * 100)
+    packed = make_file(tmp_path / 'old.zip', DATA)
+    clash = make_file(tmp_path / 'clash.log', DATA)
+    make_file(tmp_path / 'clash.log.gz', b'')
+
+    for path in (small, packed, clash):
+        status, target, _, _, reason = compress_file(str(path), 'gzip')
+        assert (status, target) == (SKIPPED, None)
+        assert reason
+        assert path.read_bytes() in (DATA, b'x' * 100)
+
+
+def test_incompressible_file_is_kept(tmp_path):
+    path = make_file(tmp_path / 'random.bin', os.urandom(64 * 1024))
+
+    status, _, _, _, _ = compress_file(str(path), 'gzip')
+
+    assert status == SKIPPED
+    assert path.exists()
+    assert _tmp_files(tmp_path) == []
+
+
+def test_archive_is_synced_before_original_is_removed(tmp_path, monkeypatch):
+    path = make_file(tmp_path / 'app.log', DATA)
+    events = []
+    fsync, remove = os.fsync, os.remove
+    monkeypatch.setattr(compress.os, 'fsync', lambda fd: (events.append('fsync'), fsync(fd))[1])
+    monkeypatch.setattr(compress.os, 'remove', lambda p: (events.append(('remove', p)), remove(p))[1])
+
+    status, _, _, _, _ = compress_file(str(path), 'gzip')
+
+    assert status == COMPRESSED
+    # Архив и запись о переименовании в папке - на диске раньше, чем удалён оригинал
+    assert events == ['fsync', 'fsync', ('remove', str(path))]
+
+
+def test_crashed_worker_is_counted_as_failure(tmp_path, monkeypatch):
+    import multiprocessing
+
+    crash = make_file(tmp_path / 'crash.log', DATA)
+    others = [make_file(tmp_path / f'{i}.log', DATA) for i in range(6)]
+    compress_file = compress.compress_file
+
+    def crashing(path, codec, level):
+        if path == str(crash):
+            os._exit(1)  # Как воркер, убитый при нехватке памяти
+        return compress_file(path, codec, level)
+
+    # fork: дочерние процессы видят подменённую функцию
+    monkeypatch.setattr(compress, 'process_pool_context', lambda: multiprocessing.get_context('fork'))
+    monkeypatch.setattr(compress, 'compress_file', crashing)
+    seen = []
+
+    items = [str(crash)] + [str(path) for path in others]
+    report = compress.compress_paths(items, 'gzip', processes=1,
+                                     on_file=lambda item, path, status, saved: seen.append((path, status)))
+
+    assert report[str(crash)][3] == 1
+    assert crash.read_bytes() == DATA
+    assert len(seen) == len(items)
+    # Задачи сломанного пула - ошибки (оригиналы на месте), остальное сжал новый пул
+    for path in others:
+        files, _, _, errors = report[str(path)]
+        assert files + errors == 1
+        assert path.exists() == bool(errors)
+    assert report[str(others[-1])][0] == 1
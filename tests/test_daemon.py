@@ -0,0 +1,111 @@
+import os
+
+from cleaner import daemon as daemon_module
+from cleaner.core import DirIndex
+from cleaner.daemon import ScanDaemon
+from cleaner.stats import allocated_size
+
+from conftest import make_file
+
+OLD = 1_000_000_000  # mtime старого файла
+
+
+def _old_file(path, size):
+    make_file(path, b'x' * size)
+    os.utime(path, (OLD, OLD))
+    return str(path)
+
+
+def _dir_size(path):
+    return sum(allocated_size(os.lstat(os.path.join(d, f))) for d, _, files in os.walk(path) for f in files)
+
+
+def _daemon(tmp_path, items):
+    """Служба после "полного сканирования" tmp_path: индекс по текущему диску, кэш - items."""
+    service = ScanDaemon()
+    service.scanner.min_size = 1
+    service.index = DirIndex.from_entries([(d, service._own_size(d), _dir_size(d)) for d, _, _ in os.walk(tmp_path)])
+    service._set_items(items)
+    return service
+
+
+def test_events_refresh_results(tmp_path):
+    grown = _old_file(tmp_path / 'logs' / 'grown.log', 5000)
+    gone = _old_file(tmp_path / 'logs' / 'gone.log', 5000)
+    touched = _old_file(tmp_path / 'logs' / 'touched.log', 5000)
+    _old_file(tmp_path / 'old' / 'sub' / 'a.bin', 5000)
+    old_dir = str(tmp_path / 'old')
+    items = {path: {'type': 'file', 'size': 5000, 'apparent_size': 5000, 'count': 1} for path in (grown, gone, touched)}
+    items[old_dir] = {'type': 'dir', 'size': _dir_size(old_dir), 'count': 1}
+    service = _daemon(tmp_path, items)
+
+    with open(grown, 'ab') as f:
+        f.write(b'x' * 20000)
+    os.utime(grown, (OLD, OLD))
+    os.remove(gone)
+    with open(touched, 'ab') as f:
+        f.write(b'x')  # Изменён сейчас - уже не старый
+    make_file(tmp_path / 'old' / 'sub' / 'new.bin', b'y' * 70000)
+    for path in (tmp_path / 'logs', tmp_path / 'old' / 'sub'):
+        service._mark_dirty(str(path))
+    service._flush()
+
+    assert sorted(service.items) == sorted([grown, old_dir])
+    assert service.items[grown]['size'] == allocated_size(os.lstat(grown))
+    assert service.items[grown]['apparent_size'] == 25000
+    assert service.items[old_dir]['size'] == _dir_size(old_dir)
+    assert service.items_changed
+
+
+def test_removed_dir_drops_its_items(tmp_path):
+    inner = _old_file(tmp_path / 'a' / 'b' / 'c.log', 5000)
+    kept = _old_file(tmp_path / 'ab.log', 5000)
+    items = {path: {'type': 'file', 'size': 5000} for path in (inner, kept)}
+    items[str(tmp_path / 'a' / 'b')] = {'type': 'dir', 'size': 5000}
+    service = _daemon(tmp_path, items)
+
+    os.remove(inner)
+    os.rmdir(tmp_path / 'a' / 'b')
+    os.rmdir(tmp_path / 'a')
+    service._mark_dirty(str(tmp_path / 'a'))
+    service._flush()
+
+    assert list(service.items) == [kept]
+
+
+def test_cold_poll_sees_growth_in_unchanged_dir(tmp_path):
+    path = _old_file(tmp_path / 'data' / 'db.bin', 5000)
+    service = _daemon(tmp_path, {})
+    service._add_cold(str(tmp_path / 'data'))
+    dir_mtime = os.stat(tmp_path / 'data').st_mtime
+
+    with open(path, 'ab') as f:
+        f.write(b'x' * 50000)
+    os.utime(tmp_path / 'data', (dir_mtime, dir_mtime))  # mtime папки не изменился
+    service._poll_cold()
+
+    assert service.dirty == {str(tmp_path / 'data')}
+    service._flush()
+    data = service.index.ids[str(tmp_path / 'data')]
+    assert service.index.own_sizes[data] == allocated_size(os.lstat(path))
+
+
+def test_full_scan_releases_stat_batches(tmp_path, monkeypatch):
+    service = ScanDaemon()
+    index = DirIndex.from_entries([(str(tmp_path), 0, 0)])
+    items = {str(tmp_path / 'x.log'): {'type': 'file', 'size': 5000}}
+
+    def run_scan():
+        service.scanner.old_tree = {str(tmp_path): {'files': object()}}
+        service.scanner.dir_index = index
+        return items
+    monkeypatch.setattr(service.scanner, 'run_scan', run_scan)
+    monkeypatch.setattr(service, '_setup_watches', lambda: None)
+    for name in ('save_cache', 'save_index'):
+        monkeypatch.setattr(daemon_module, name, lambda *args, **kwargs: None)
+
+    service.full_scan()
+
+    assert service.scanner.old_tree == {}
+    assert service.index is index
+    assert service.items is items
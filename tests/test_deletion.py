@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+
+import pytest
+
+from cleaner import deletion
+from cleaner.deletion import move_to_trash, restore_from_trash, purge_trash, load_ledger
+
+from conftest import make_file
+
+
+def _age_ledger(days):
+    """Сдвигает время переноса всех записей журнала на days дней назад."""
+    ledger = load_ledger()
+    for entry in ledger:
+        entry[3] -= days * 86400
+    with open(deletion.TRASH_LEDGER_FILE, 'w', encoding='utf-8') as f:
+        json.dump(ledger, f)
+
+
+def _foreign_entry(trash, name, original):
+    """Запись корзины, созданная не программой (файловым менеджером)."""
+    make_file(trash / 'files' / name, b'foreign')
+    make_file(trash / 'info' / f'{name}.trashinfo',
+              f"[Trash Info]\nPath={original}\nDeletionDate=2000-01-01T00:00:00\n".encode())
+    return trash / 'files' / name
+
+
+def test_move_to_trash_records_ledger(tmp_path, trash):
+    victim = make_file(tmp_path / 'data' / 'old.log')
+    moved, failed, entries = move_to_trash([str(victim)])
+
+    assert (moved, failed) == (1, [])
+    assert not victim.exists()
+    assert [entry[:3] for entry in load_ledger()] == [list(entry) for entry in entries]
+    assert os.path.exists(entries[0][1])
+
+
+def test_purge_deletes_only_own_expired_entries(tmp_path, trash):
+    own = make_file(tmp_path / 'data' / 'old.log')
+    _, _, entries = move_to_trash([str(own)])
+    _age_ledger(40)
+    foreign = _foreign_entry(trash, 'photo.jpg', '/home/u/photo.jpg')
+
+    purged, failed = purge_trash(30, low_priority=False)
+
+    assert (purged, failed) == (1, [])
+    assert not os.path.lexists(entries[0][1])
+    assert not os.path.exists(entries[0][2])
+    assert foreign.exists()  # Чужая запись корзины не тронута, хоть она и старше срока
+    assert (trash / 'info' / 'photo.jpg.trashinfo').exists()
+    assert load_ledger() == []
+
+
+def test_purge_keeps_recent_entries(tmp_path, trash):
+    own = make_file(tmp_path / 'data' / 'new.log')
+    _, _, entries = move_to_trash([str(own)])
+
+    assert purge_trash(30, low_priority=False) == (0, [])
+    assert os.path.exists(entries[0][1])
+    assert len(load_ledger()) == 1
+
+
+def test_purge_skips_info_name_reused_by_someone_else(tmp_path, trash):
+    own = make_file(tmp_path / 'data' / 'report.txt')
+    _, _, entries = move_to_trash([str(own)])
+    _age_ledger(40)
+    # Пользователь сам очистил корзину, затем файловый менеджер удалил другой report.txt
+    os.remove(entries[0][1])
+    os.remove(entries[0][2])
+    foreign = _foreign_entry(trash, 'report.txt', '/home/u/другой/report.txt')
+
+    assert purge_trash(0, low_priority=False) == (0, [])
+    assert foreign.exists()
+    assert load_ledger() == []  # Запись, которой больше нет в корзине, убрана из журнала
+
+
+def test_restore_removes_ledger_entry(tmp_path, trash):
+    own = make_file(tmp_path / 'data' / 'keep.txt', b'keep')
+    _, _, entries = move_to_trash([str(own)])
+
+    restored, failed = restore_from_trash(entries)
+
+    assert (restored, failed) == ([str(own)], [])
+    assert own.read_bytes() == b'keep'
+    assert load_ledger() == []
+
+
+def test_purge_stops_on_event(tmp_path, trash):
+    for i in range(3):
+        move_to_trash([str(make_file(tmp_path / 'data' / f'{i}.log'))])
+    _age_ledger(40)
+    stop = threading.Event()
+    stop.set()
+    assert purge_trash(30, stop_event=stop, low_priority=False) == (0, [])
+    assert len(load_ledger()) == 3  # Записи остались для следующей очистки
+
+
+def test_orphan_in_trash_files_is_not_overwritten(tmp_path, trash):
+    orphan = make_file(trash / 'files' / 'a.txt', b'orphan')  # Без info-файла
+    make_file(trash / 'info' / 'placeholder.trashinfo', b'')
+    victim = make_file(tmp_path / 'data' / 'a.txt', b'new')
+
+    moved, failed, entries = move_to_trash([str(victim)])
+
+    assert (moved, failed) == (1, [])
+    assert orphan.read_bytes() == b'orphan'
+    assert entries[0][1] == str(trash / 'files' / 'a.txt.2')
+    assert (trash / 'files' / 'a.txt.2').read_bytes() == b'new'
+    assert not (trash / 'info' / 'a.txt.trashinfo').exists()
+
+
+def test_orphan_directory_is_not_overwritten(tmp_path, trash):
+    make_file(trash / 'files' / 'build' / 'keep.o', b'orphan')
+    (trash / 'info').mkdir(exist_ok=True)
+    victim = make_file(tmp_path / 'data' / 'build' / 'x.o').parent
+
+    moved, _, entries = move_to_trash([str(victim)])
+
+    assert moved == 1
+    assert (trash / 'files' / 'build' / 'keep.o').read_bytes() == b'orphan'
+    assert os.path.exists(os.path.join(entries[0][1], 'x.o'))
+
+
+def test_name_taken_during_move_picks_next(tmp_path, trash, monkeypatch):
+    victim = make_file(tmp_path / 'data' / 'b.txt', b'new')
+    rename_noreplace = deletion._rename_noreplace
+
+    def racing(src, dst):
+        # Другой процесс занимает имя в files/ между проверкой и переносом
+        if dst.endswith(os.sep + 'b.txt'):
+            make_file(trash / 'files' / 'b.txt', b'racer')
+        return rename_noreplace(src, dst)
+    monkeypatch.setattr(deletion, '_rename_noreplace', racing)
+
+    _, _, entries = move_to_trash([str(victim)])
+
+    assert (trash / 'files' / 'b.txt').read_bytes() == b'racer'
+    assert entries[0][1].endswith('b.txt.2')
+    assert sorted(os.listdir(trash / 'info')) == ['b.txt.2.trashinfo']
+
+
+@pytest.mark.parametrize('renameat2', [None, False])  # False - без renameat2 (не Linux, старая glibc)
+def test_rename_noreplace_refuses_existing_target(tmp_path, monkeypatch, renameat2):
+    monkeypatch.setattr(deletion, '_renameat2', renameat2)
+    src = make_file(tmp_path / 'src', b'src')
+    dst = make_file(tmp_path / 'dst', b'dst')
+
+    with pytest.raises(FileExistsError):
+        deletion._rename_noreplace(str(src), str(dst))
+    assert src.read_bytes() == b'src' and dst.read_bytes() == b'dst'
+    deletion._rename_noreplace(str(src), str(tmp_path / 'free'))
+    assert (tmp_path / 'free').read_bytes() == b'src'
+
+
+def test_restore_does_not_overwrite_new_file(tmp_path, trash):
+    own = make_file(tmp_path / 'data' / 'keep.txt', b'old')
+    _, _, entries = move_to_trash([str(own)])
+    make_file(own, b'recreated')
+
+    restored, failed = restore_from_trash(entries)
+
+    assert (restored, failed) == ([], [str(own)])
+    assert own.read_bytes() == b'recreated'
+    assert os.path.exists(entries[0][1])
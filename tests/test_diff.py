@@ -0,0 +1,47 @@
+import pytest
+
+from cleaner.core import DirIndex
+from cleaner.diff import diff_snapshots
+from cleaner.snapshot import Snapshot, write_items_snapshot, write_dirs_snapshot
+
+
+def _item(size, category='Старый файл', item_type='file'):
+    return {'type': item_type, 'size': size, 'category': category}
+
+
+def _diff(tmp_path, old_items, new_items):
+    write_items_snapshot(old_items, str(tmp_path / 'old.snap'))
+    write_items_snapshot(new_items, str(tmp_path / 'new.snap'))
+    with Snapshot(str(tmp_path / 'old.snap')) as old, Snapshot(str(tmp_path / 'new.snap')) as new:
+        return list(diff_snapshots(old, new))
+
+
+def test_grown_appeared_and_vanished(tmp_path):
+    old = {'/a': _item(10), '/b': _item(20), '/c': _item(30), '/d': _item(5)}
+    new = {'/a': _item(10), '/b': _item(25), '/d': _item(1), '/e': _item(7, 'Мусор', 'trash_file')}
+    assert _diff(tmp_path, old, new) == [
+        ('/b', 20, 25, 'Старый файл', 'file'),
+        ('/c', 30, None, 'Старый файл', 'file'),
+        ('/d', 5, 1, 'Старый файл', 'file'),
+        ('/e', None, 7, 'Мусор', 'trash_file'),
+    ]
+
+
+def test_identical_snapshots_have_no_changes(tmp_path):
+    items = {f'/p/{i}': _item(i) for i in range(100)}
+    assert _diff(tmp_path, items, dict(items)) == []
+
+
+def test_paths_compared_bytewise(tmp_path):
+    # Порядок слияния - по байтам UTF-8, а не по порядку строк в снимке (по размеру)
+    old = {'/я': _item(1), '/a b': _item(2), '/a/b': _item(3)}
+    new = {'/я': _item(2), '/a b': _item(2), '/a/b': _item(3), '/a-b': _item(9)}
+    assert [change[0] for change in _diff(tmp_path, old, new)] == ['/a-b', '/я']
+
+
+def test_different_kinds_are_rejected(tmp_path):
+    write_items_snapshot({'/a': _item(1)}, str(tmp_path / 'items.snap'))
+    write_dirs_snapshot(DirIndex.from_entries([('/a', 1, 1)]), str(tmp_path / 'dirs.snap'))
+    with Snapshot(str(tmp_path / 'items.snap')) as items, Snapshot(str(tmp_path / 'dirs.snap')) as dirs:
+        with pytest.raises(ValueError):
+            list(diff_snapshots(items, dirs))
@@ -0,0 +1,105 @@
+import pytest
+
+from cleaner.core import DirIndex, compute_treemap_layout, squarify
+
+ENTRIES = [
+    # (путь, свой размер, полный размер) - как их даёт дерево сканирования, снизу вверх
+    ('/r/a/x', 10, 10),
+    ('/r/a', 5, 15),
+    ('/r/b', 40, 40),
+    ('/r/c', 0, 0),
+    ('/r', 1, 56),
+]
+
+
+def _index():
+    return DirIndex.from_entries(ENTRIES)
+
+
+def _children(index, path):
+    return [index.paths[i] for i in index.children_of(index.ids[path])]
+
+
+def test_from_entries_links_and_sorts():
+    index = _index()
+
+    assert len(index) == 5
+    assert [index.paths[i] for i in index.roots] == ['/r']
+    assert _children(index, '/r') == ['/r/b', '/r/a', '/r/c']
+    assert index.parents[index.ids['/r/a/x']] == index.ids['/r/a']
+    assert index.name_of(index.ids['/r/a/x']) == 'x'
+    assert sorted(index.live_entries()) == sorted(ENTRIES)
+
+
+def test_set_own_size_propagates_to_ancestors_and_resorts():
+    index = _index()
+    before = _children(index, '/r')
+
+    index.set_own_size('/r/a/x', 100)
+
+    assert index.total_sizes[index.ids['/r/a']] == 105
+    assert index.total_sizes[index.ids['/r']] == 146
+    assert _children(index, '/r') == ['/r/a', '/r/b', '/r/c']
+    assert before == ['/r/b', '/r/a', '/r/c']  # Выданный раньше список не изменился
+
+
+def test_add_dir_under_existing_parent():
+    index = _index()
+
+    index.add_dir('/r/c/new', 70)
+
+    assert index.total_sizes[index.ids['/r/c']] == 70
+    assert index.total_sizes[index.ids['/r']] == 126
+    assert _children(index, '/r')[0] == '/r/c'
+    assert _children(index, '/r/c') == ['/r/c/new']
+    assert index.add_dir('/r/c/new') == index.ids['/r/c/new']  # Повторное добавление ничего не меняет
+
+
+def test_remove_dir_drops_subtree():
+    index = _index()
+
+    index.remove_dir('/r/a')
+
+    assert '/r/a' not in index.ids and '/r/a/x' not in index.ids
+    assert index.total_sizes[index.ids['/r']] == 41
+    assert _children(index, '/r') == ['/r/b', '/r/c']
+    assert sorted(path for path, _, _ in index.live_entries()) == ['/r', '/r/b', '/r/c']
+    index.set_own_size('/r/a/x', 5)  # Удалённая папка: изменение игнорируется
+    assert index.total_sizes[index.ids['/r']] == 41
+
+
+@pytest.mark.parametrize('sizes', [[1], [6, 6, 4, 3, 2, 2, 1], [1000, 1, 1, 1], [5] * 50])
+def test_squarify_fills_rectangle(sizes):
+    width, height = 600, 400
+    rects = squarify(sizes, 0, 0, width, height)
+
+    assert len(rects) == len(sizes)
+    total = sum(sizes)
+    for size, (x, y, w, h) in zip(sizes, rects):
+        assert w * h == pytest.approx(size * width * height / total)
+        assert -1e-6 <= x and x + w <= width + 1e-6
+        assert -1e-6 <= y and y + h <= height + 1e-6
+    assert sum(w * h for _, _, w, h in rects) == pytest.approx(width * height)
+
+
+def test_squarify_degenerate():
+    assert squarify([], 0, 0, 10, 10) == []
+    assert squarify([0, 0], 0, 0, 10, 10) == []
+    assert squarify([1], 0, 0, 0, 10) == []
+
+
+def test_treemap_layout_collapses_rest_and_own_files():
+    entries = [('/r', 7, 7 + 60 + 30 + 3 + 2)]
+    entries += [('/r/big', 60, 60), ('/r/mid', 30, 30), ('/r/s1', 3, 3), ('/r/s2', 2, 2), ('/r/empty', 0, 0)]
+    index = DirIndex.from_entries(entries)
+
+    layout = compute_treemap_layout(index, index.ids['/r'], 100, 100, max_items=2)
+
+    labels = [(node_id, label, size) for node_id, label, size, _ in layout]
+    assert labels == [
+        (index.ids['/r/big'], 'big', 60),
+        (index.ids['/r/mid'], 'mid', 30),
+        (-1, 'Файлы в папке', 7),
+        (-1, 'Прочее (3 папок)', 5),
+    ]
+    assert sum(w * h for *_, (_, _, w, h) in layout) == pytest.approx(100 * 100)
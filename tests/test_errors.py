@@ -0,0 +1,163 @@
+import errno
+import os
+import time
+
+import pytest
+
+from cleaner import errors
+from cleaner.errors import IO, PERMISSION, ScanErrors, walk
+from cleaner.scanner import Scanner
+
+from conftest import make_file
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(errors, 'SCAN_RETRY_DELAY', 0)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for path in ('a/one.txt', 'a/b/two.txt', 'a/b/c/three.txt', 'd/four.txt', 'top.txt'):
+        make_file(tmp_path / path)
+    (tmp_path / 'e').mkdir()
+    os.symlink(tmp_path / 'a', tmp_path / 'link')
+    return str(tmp_path)
+
+
+def _normalized(walker):
+    return sorted((dirpath, sorted(dirnames), sorted(filenames)) for dirpath, dirnames, filenames in walker)
+
+
+def test_walk_matches_os_walk(tree):
+    assert _normalized(walk(tree)) == _normalized(os.walk(tree))
+
+
+def test_walk_prunes_like_os_walk(tree):
+    def pruned(walker):
+        for dirpath, dirnames, filenames in walker:
+            dirnames[:] = [d for d in dirnames if d != 'b']
+            yield dirpath, dirnames, filenames
+
+    assert _normalized(pruned(walk(tree))) == _normalized(pruned(os.walk(tree)))
+
+
+def test_walk_retries_transient_errors(tree, monkeypatch):
+    scandir = os.scandir
+    failures = {}
+
+    def flaky(path):
+        # Каждая папка дважды отвечает EINTR/EBUSY, потом читается
+        failures[path] = failures.get(path, 0) + 1
+        if failures[path] <= 2:
+            raise OSError(errno.EBUSY if failures[path] == 1 else errno.EINTR, 'busy', path)
+        return scandir(path)
+    monkeypatch.setattr(errors.os, 'scandir', flaky)
+
+    seen_errors = []
+    assert _normalized(walk(tree, seen_errors.append)) == _normalized(os.walk(tree))
+    assert seen_errors == []
+
+
+def test_walk_reports_persistent_errors(tree, monkeypatch):
+    scandir = os.scandir
+    calls = []
+    bad = os.path.join(tree, 'a', 'b')
+
+    def failing(path):
+        if path == bad:
+            calls.append(path)
+            raise OSError(errno.EIO if len(calls) > 1 else errno.EAGAIN, 'I/O error', path)
+        return scandir(path)
+    monkeypatch.setattr(errors.os, 'scandir', failing)
+
+    seen_errors = []
+    walked = [dirpath for dirpath, _, _ in walk(tree, seen_errors.append)]
+
+    assert bad not in walked and os.path.join(bad, 'c') not in walked
+    assert [e.errno for e in seen_errors] == [errno.EIO]  # EIO не повторяется сразу - только очередь повторов
+    assert len(calls) == 2
+
+
+def test_permission_error_skips_until_ttl(tmp_path):
+    scan = ScanErrors()
+    path = str(tmp_path / 'locked')
+    scan.record(path, PermissionError(errno.EACCES, 'denied', path), is_dir=True)
+
+    assert scan.counts == {PERMISSION: 1}
+    assert scan.known[path][:3] == [PERMISSION, errno.EACCES, 1]
+    assert scan.known[path][3] == pytest.approx(time.time() + errors.ERROR_SKIP_TTL, abs=5)
+
+    dirnames = ['locked', 'open']
+    scan.prune(str(tmp_path), dirnames)
+    assert dirnames == ['open']
+    assert scan.skipped == 1
+
+    scan.known[path][3] = time.time() - 1  # Срок пропуска истёк - папка снова обходится
+    assert not scan.should_skip(path)
+    scan.succeeded(path)
+    assert path not in scan.known
+    assert scan.updates[path] is None
+
+
+def test_io_error_backoff_doubles():
+    scan = ScanErrors()
+    delays = []
+    for _ in range(3):
+        scan.record('/mnt/net', OSError(errno.EIO, 'I/O error'), is_dir=True)
+        delays.append(scan.known['/mnt/net'][3] - time.time())
+
+    assert scan.known['/mnt/net'][:3] == [IO, errno.EIO, 3]
+    assert [round(d / errors.ERROR_RETRY_BASE) for d in delays] == [1, 2, 4]
+
+
+def test_file_errors_are_counted_but_not_scheduled():
+    scan = ScanErrors()
+    scan.record('/x/gone', FileNotFoundError(errno.ENOENT, 'gone'))
+    scan.record('/x/locked.txt', PermissionError(errno.EACCES, 'denied'))
+
+    assert scan.known == {}
+    assert sum(scan.counts.values()) == 2
+    assert [entry[0] for entry in scan.log] == ['/x/gone', '/x/locked.txt']
+
+
+def test_retry_queue_is_bounded(monkeypatch):
+    monkeypatch.setattr(errors, 'ERROR_RETRY_QUEUE_MAX', 3)
+    scan = ScanErrors()
+    for i in range(5):
+        scan.record(f'/d{i}', PermissionError(errno.EACCES, 'denied'), is_dir=True)
+
+    assert list(scan.known) == ['/d2', '/d3', '/d4']
+
+
+def test_save_load_and_merge(tmp_path, monkeypatch):
+    monkeypatch.setattr(errors, 'ERRORS_FILE', str(tmp_path / 'cleaner_errors.json'))
+    scan = ScanErrors()
+    scan.record('/locked', PermissionError(errno.EACCES, 'denied'), is_dir=True)
+    scan.save()
+
+    loaded = ScanErrors.load()
+    assert loaded.known == scan.known
+
+    worker = ScanErrors(dict(loaded.known))
+    worker.succeeded('/locked')
+    worker.record('/net', OSError(errno.ETIMEDOUT, 'timeout'), is_dir=True)
+    loaded.merge(worker.pack())
+    assert list(loaded.known) == ['/net']
+    assert loaded.counts == {IO: 1}
+
+
+def test_trash_dir_failure_is_recorded(tmp_path, monkeypatch):
+    cache = make_file(tmp_path / 'cache' / 'x.bin').parent
+    scanner = Scanner(days_old=30, processes=1)
+
+    def denied(dirpath):
+        raise PermissionError(errno.EACCES, 'denied', dirpath)
+    monkeypatch.setattr(scanner, '_calculate_dir_size_and_count', denied)
+
+    dirnames = ['sub']
+    items = {}
+    scanner._trash_dir_step(str(cache), dirnames, [], str(tmp_path), items)
+
+    assert items == {} and dirnames == []
+    assert scanner.errors.known[str(cache)][0] == PERMISSION
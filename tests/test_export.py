@@ -0,0 +1,119 @@
+import csv
+import gzip
+import json
+import os
+
+import pytest
+
+from cleaner.core import DirIndex
+from cleaner.export import EXPORT_FIELDS, detect_format, export_records, export_results, iter_delta_records
+
+ITEMS = {
+    '/home/u/.cache/pip': {'type': 'trash_dir', 'size': 8192, 'apparent_size': 7000, 'count': 3,
+                           'category': 'Мусор (cache)', 'last_scan': 1700000000.5},
+    '/home/u/old/отчёт.log': {'type': 'trash_file', 'size': 4096, 'category': 'Мусор (Файл/Лог)'},
+}
+INDEX = DirIndex.from_entries([('/home/u/old', 4096, 4096), ('/home/u', 0, 12288)])
+
+
+def _read_jsonl(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def _read_csv(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.parametrize('name', ['report.jsonl', 'report.jsonl.gz'])
+def test_jsonl_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+
+    assert export_results(ITEMS, path, index=INDEX, scan_time=1700000001.0) == 4
+
+    records = _read_jsonl(path)
+    assert all(set(record) == set(EXPORT_FIELDS) for record in records)
+    items = {r['path']: r for r in records if r['kind'] == 'item'}
+    dirs = {r['path']: r for r in records if r['kind'] == 'dir'}
+    assert items['/home/u/.cache/pip']['apparent_size'] == 7000
+    assert items['/home/u/old/отчёт.log']['apparent_size'] == 4096  # Нет в info - равен size
+    assert items['/home/u/old/отчёт.log']['count'] == 1
+    assert dirs['/home/u'] == dict(dirs['/home/u'], size=12288, own_size=0, last_scan=1700000001.0)
+    assert os.listdir(tmp_path) == [name]  # Временный файл переименован
+
+
+@pytest.mark.parametrize('name', ['report.csv', 'report.csv.gz'])
+def test_csv_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+
+    export_results(ITEMS, path)
+
+    rows = _read_csv(path)
+    assert [row['path'] for row in rows] == list(ITEMS)
+    assert rows[0]['size'] == '8192' and rows[0]['category'] == 'Мусор (cache)'
+    assert rows[1]['own_size'] == ''
+
+
+def test_parquet_round_trip(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'report.parquet')
+
+    export_results(ITEMS, path, index=INDEX)
+
+    table = pq.read_table(path).to_pylist()
+    assert [row['path'] for row in table][:2] == list(ITEMS)
+
+
+def test_delta_records():
+    changes = [('/a', 100, 300, 'c', 'file'), ('/b', None, 50, 'c', 'file'), ('/c', 70, None, 'c', 'file')]
+
+    records = list(iter_delta_records(changes, host='h', scan_time=1.0))
+
+    assert [(r['path'], r['size'], r['delta']) for r in records] == [('/a', 300, 200), ('/b', 50, 50), ('/c', 0, -70)]
+    assert {r['kind'] for r in records} == {'delta'}
+
+
+def test_chunking_keeps_all_records(tmp_path):
+    path = str(tmp_path / 'many.jsonl')
+    records = ({field: None for field in EXPORT_FIELDS} | {'path': f'/p{i}', 'kind': 'item'} for i in range(25))
+
+    assert export_records(records, path, chunk_size=7) == 25
+    assert [r['path'] for r in _read_jsonl(path)] == [f'/p{i}' for i in range(25)]
+
+
+def test_failed_export_leaves_nothing(tmp_path):
+    path = str(tmp_path / 'broken.jsonl')
+
+    def records():
+        yield {field: None for field in EXPORT_FIELDS}
+        raise RuntimeError('источник сломался')
+
+    with pytest.raises(RuntimeError):
+        export_records(records(), path, chunk_size=1)
+    assert os.listdir(tmp_path) == []
+
+
+def test_detect_format():
+    assert detect_format('/x/R.NDJSON') == 'jsonl'
+    assert detect_format('r.csv.gz') == 'csv'
+    with pytest.raises(ValueError):
+        detect_format('r.txt')
+
+
+def test_export_includes_latest_deltas(tmp_path, monkeypatch):
+    from cleaner import diff
+    from cleaner.snapshot import write_items_snapshot
+
+    old, new = str(tmp_path / 'items-1.snap'), str(tmp_path / 'items-2.snap')
+    write_items_snapshot({'/home/u/.cache/pip': dict(ITEMS['/home/u/.cache/pip'], size=4096)}, old)
+    write_items_snapshot(ITEMS, new)
+    monkeypatch.setattr(diff, 'latest_pair', lambda prefix='items': (old, new) if prefix == 'items' else None)
+    path = str(tmp_path / 'report.jsonl')
+
+    assert export_results(ITEMS, path, deltas=('items', 'dirs')) == 4
+
+    deltas = {r['path']: r['delta'] for r in _read_jsonl(path) if r['kind'] == 'delta'}
+    assert deltas == {'/home/u/.cache/pip': 4096, '/home/u/old/отчёт.log': 4096}
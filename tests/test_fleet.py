@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from cleaner import fleet
+from cleaner.export import export_results
+from cleaner.fleet import aggregate_reports, find_reports, path_pattern, summarize_report
+
+
+def _items(user, extra=()):
+    items = {
+        f'/home/{user}/.cache/pip': {'type': 'trash_dir', 'size': 1000, 'category': 'Мусор (cache)'},
+        f'/home/{user}/.cache/pip/wheels/x.whl': {'type': 'trash_file', 'size': 300, 'category': 'Мусор (cache)'},
+        f'/home/{user}/proj/node_modules': {'type': 'trash_dir', 'size': 500, 'category': 'Мусор (node_modules)'},
+        f'/home/{user}/old/app.log': {'type': 'trash_file', 'size': 20, 'category': 'Мусор (Файл/Лог)'},
+    }
+    items.update(extra)
+    return items
+
+
+@pytest.fixture
+def reports(tmp_path, monkeypatch):
+    monkeypatch.setattr('socket.gethostname', lambda: 'alpha')
+    export_results(_items('ann'), str(tmp_path / 'alpha.jsonl'))
+    monkeypatch.setattr('socket.gethostname', lambda: 'beta')
+    export_results(_items('bob'), str(tmp_path / 'beta.csv.gz'))
+    # Кэш GUI без имени машины: машина - имя файла
+    (tmp_path / 'gamma.json').write_text(json.dumps(_items('cid')), encoding='utf-8')
+    (tmp_path / 'notes.txt').write_text('не отчёт')
+    return tmp_path
+
+
+def test_aggregate_drops_nested_items_and_merges_hosts(reports):
+    paths = find_reports(str(reports))
+    assert [p.rsplit('/', 1)[1] for p in paths] == ['alpha.jsonl', 'beta.csv.gz', 'gamma.json']
+
+    summary = aggregate_reports(paths, processes=1)
+
+    assert summary['reports'] == 3
+    assert summary['hosts'] == {'alpha', 'beta', 'gamma'}
+    assert summary['items'] == 9  # Файл внутри ~/.cache/pip не считается второй раз
+    assert summary['total'] == 3 * 1520
+    assert summary['patterns']['~/.cache/pip'] == [3000, 3, {'alpha', 'beta', 'gamma'}]
+    assert summary['patterns']['~/proj/node_modules'][0] == 1500
+    assert summary['categories']['Мусор (Файл/Лог)'] == [60, 3, {'alpha', 'beta', 'gamma'}]
+    assert summary['rules']['расширение: .log'][0] == 60
+
+
+def test_parallel_matches_serial(reports):
+    paths = find_reports(str(reports))
+    assert aggregate_reports(paths, processes=2) == aggregate_reports(paths, processes=1)
+
+
+def test_broken_report_is_excluded_entirely(reports):
+    broken = reports / 'delta.jsonl'
+    lines = (reports / 'alpha.jsonl').read_text(encoding='utf-8').splitlines()
+    broken.write_text('\n'.join(lines[:2] + ['{"kind": "item", "path": '] + lines[2:]), encoding='utf-8')
+
+    part = summarize_report(str(broken))
+    assert part == fleet._new_summary()
+
+    summary = aggregate_reports(find_reports(str(reports)), processes=1)
+    assert summary['reports'] == 3
+    assert summary['total'] == 3 * 1520
+
+
+def test_report_failing_midway_adds_nothing(reports, monkeypatch):
+    matched_rule = fleet.matched_rule
+    calls = []
+
+    def failing_rule(path, item_type):
+        # Первые элементы отчёта уже учтены, затем чтение обрывается
+        calls.append(path)
+        if len(calls) == 2:
+            raise OSError('сбой чтения')
+        return matched_rule(path, item_type)
+    monkeypatch.setattr(fleet, 'matched_rule', failing_rule)
+
+    assert summarize_report(str(reports / 'alpha.jsonl')) == fleet._new_summary()
+
+
+def test_sorted_records_external_sort():
+    records = [('h', f'/r/{i % 7}/{i}', '', '', i) for i in range(50)]
+
+    merged = list(fleet._sorted_records(iter(records), chunk_size=8))
+
+    assert merged == sorted(records, key=fleet._sort_key)
+
+
+def test_iter_json_object_small_blocks(tmp_path):
+    data = {'/a': {'size': 12345678901234}, '/б "x"': {'size': 1, 'type': 'file'}, '/c': {}}
+    path = tmp_path / 'cache.json'
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+    with open(path, encoding='utf-8') as f:
+        assert dict(fleet._iter_json_object(f, block_size=3)) == data
+
+
+@pytest.mark.parametrize('path, item_type, pattern', [
+    ('/home/ann/.cache/pip/http', 'trash_dir', '~/.cache/pip'),
+    ('/home/ann/a/b/c/d/e/node_modules', 'trash_dir', '*/node_modules'),
+    ('/home/ann/Downloads/big.iso', 'file', '~/Downloads'),
+    ('C:\\Users\\ann\\AppData\\Local\\Temp', 'trash_dir', '~/AppData/Local/Temp'),
+    ('/opt/jdk-17.0.2/lib', 'dir', '/opt/jdk-*/lib'),
+    ('/home/ann/.m2/3f2a9c1d7b4e8f60/x', 'dir', '~/.m2/*'),
+])
+def test_path_pattern(path, item_type, pattern):
+    assert path_pattern(path, depth=3, item_type=item_type) == pattern
@@ -0,0 +1,69 @@
+import os
+
+from cleaner import scanner as scanner_module
+from cleaner.scanner import Scanner
+from cleaner.stats import InodeSet, allocated_size, reclaimable_size
+
+from conftest import make_file
+
+NOW = 2_000_000_000  # Порог в будущем: все файлы старые
+
+
+def test_inode_set_counts_each_inode_once():
+    seen = InodeSet()
+
+    assert seen.add(1, 100)
+    assert not seen.add(1, 100)
+    assert seen.add(2, 100)  # Тот же номер на другом устройстве - другой файл
+    assert len(seen) == 2
+
+
+def test_first_seen_ignores_single_links(tmp_path):
+    single = make_file(tmp_path / 'single', b'x' * 10000)
+    linked = make_file(tmp_path / 'linked', b'y' * 10000)
+    os.link(linked, tmp_path / 'linked2')
+    seen = InodeSet()
+
+    st = os.lstat(single)
+    assert seen.first_seen(st) and seen.first_seen(st)  # Одна ссылка - не запоминается
+    assert len(seen) == 0
+
+    assert reclaimable_size(os.lstat(linked), seen) == allocated_size(os.lstat(linked))
+    assert reclaimable_size(os.lstat(tmp_path / 'linked2'), seen) == 0
+    assert len(seen) == 1
+
+
+def _hardlinked_tree(tmp_path):
+    root = tmp_path / 'home'
+    data = make_file(root / 'a' / 'data.bin', b'z' * 50000)
+    (root / 'b').mkdir()
+    os.link(data, root / 'b' / 'data.bin')
+    os.symlink(root, root / 'b' / 'loop')               # Петля ссылок
+    os.symlink(data, root / 'b' / 'alias.bin')          # Ссылка на уже учтённый файл
+    return str(root), allocated_size(os.lstat(data))
+
+
+def test_old_tree_counts_hardlinks_once(tmp_path):
+    root, disk = _hardlinked_tree(tmp_path)
+    tree = {}
+
+    assert scanner_module._walk_old_tree(root, NOW, tree, seen=InodeSet())
+
+    top = tree[root]
+    assert len(tree) == 3  # Петля не обходится
+    alias = allocated_size(os.lstat(os.path.join(root, 'b', 'alias.bin')))
+    assert top['total_real_size'] == disk + alias  # Вторая ссылка и цель символической ссылки не учтены
+    assert top['total_apparent_size'] >= 2 * 50000  # Видимый размер - по каждой ссылке
+    assert top['total_real_size'] < top['total_apparent_size']
+
+
+def test_dir_size_counts_hardlinks_once(tmp_path):
+    root, disk = _hardlinked_tree(tmp_path)
+    scanner = Scanner(days_old=30, processes=1)
+
+    size, count, _, apparent = scanner._calculate_dir_size_and_count(root)
+
+    # Ссылка на папку (loop) идёт в подпапки, как в os.walk, и не обходится
+    assert size == disk + allocated_size(os.lstat(os.path.join(root, 'b', 'alias.bin')))
+    assert count == 3
+    assert apparent >= 2 * 50000
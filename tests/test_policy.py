@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+
+from cleaner.deletion import load_ledger
+from cleaner.policy import _entry, execute_plan, load_policies
+
+from conftest import make_file
+
+
+def _plan(*entries):
+    """План из (путь, действие): записи строятся по текущему lstat файла."""
+    policy = {'name': 'тест'}
+    return {'entries': [_entry(policy, str(path), os.lstat(path), action) for path, action in entries]}
+
+
+def test_execute_plan_dispatches_actions(tmp_path, trash):
+    deleted = make_file(tmp_path / 'data' / 'a.log', b'a' * 5000)
+    trashed = make_file(tmp_path / 'data' / 'b.log', b'b' * 5000)
+    plan = _plan((deleted, 'delete'), (trashed, 'trash'))
+    disk = plan['entries'][0]['disk']
+
+    done, freed, skipped, failed = execute_plan(plan)
+
+    assert (done, skipped, failed) == (2, 0, [])
+    assert freed == disk  # Перенесённое в корзину место не освобождает
+    assert not deleted.exists() and not trashed.exists()
+    assert [entry[0] for entry in load_ledger()] == [str(trashed)]
+
+
+def test_execute_plan_unknown_action_fails(tmp_path, trash):
+    kept = make_file(tmp_path / 'data' / 'c.log')
+
+    done, freed, skipped, failed = execute_plan(_plan((kept, 'shred')))
+
+    assert (done, freed, skipped, failed) == (0, 0, 0, [str(kept)])
+    assert kept.exists()
+
+
+def test_execute_plan_skips_changed_and_missing_files(tmp_path, trash):
+    changed = make_file(tmp_path / 'data' / 'changed.log', b'old')
+    missing = make_file(tmp_path / 'data' / 'missing.log')
+    plan = _plan((changed, 'delete'), (missing, 'delete'))
+    changed.write_bytes(b'new and longer')
+    missing.unlink()
+
+    assert execute_plan(plan) == (0, 0, 2, [])
+    assert changed.exists()
+
+
+def _write_policies(tmp_path, policies):
+    path = tmp_path / 'policies.json'
+    path.write_text(json.dumps(policies), encoding='utf-8')
+    return str(path)
+
+
+def test_load_policies_defaults(tmp_path):
+    root = tmp_path / 'cache'
+    path = _write_policies(tmp_path, [{'root': str(root), 'max_size': '5 MB'}])
+
+    policy, = load_policies(path)
+
+    assert policy['name'] == str(root)
+    assert policy['max_size'] == 5 * 1024 ** 2
+
+
+@pytest.mark.parametrize('policy', [
+    {'older_than_days': 7, 'action': 'shred'},
+    {'max_size': '1 GB', 'action': 'trash'},
+    {'match': ['*.log']},
+])
+def test_load_policies_rejects_invalid(tmp_path, policy):
+    policy['root'] = str(tmp_path / 'cache')
+    with pytest.raises(ValueError):
+        load_policies(_write_policies(tmp_path, [policy]))
+
+
+@pytest.mark.parametrize('root', ['/', '/usr/lib'])
+def test_load_policies_rejects_system_roots(tmp_path, root):
+    with pytest.raises(ValueError):
+        load_policies(_write_policies(tmp_path, [{'root': root, 'older_than_days': 1}]))
+
+
+def test_load_policies_missing_file(tmp_path):
+    assert load_policies(str(tmp_path / 'none.json')) == []
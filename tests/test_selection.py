@@ -0,0 +1,66 @@
+from cleaner.core import DirIndex
+from cleaner.results import ResultSet
+from cleaner.selection import Selection
+from cleaner.snapshot import Snapshot, write_dirs_snapshot, write_items_snapshot
+
+
+def _results(tmp_path):
+    """Набор из снимка с изменённой, добавленными и удалёнными строками."""
+    items = {f'/data/f{i}.log': {'type': 'trash_file', 'size': 1000 + i * 7, 'category': 'Мусор (Файл/Лог)'}
+             for i in range(200)}
+    path = str(tmp_path / 'items.snap')
+    write_items_snapshot(items, path)
+    results = ResultSet(Snapshot(path))
+    results.update(5, dict(results.info(5), size=3))
+    results.extend([('/new/a', {'type': 'file', 'size': 50000}), ('/new/b', {'type': 'file', 'size': 7})])
+    for row in (0, 17, 200):
+        results.remove(row)
+    return results
+
+
+def _selection(results):
+    selection = Selection(results.size)
+    selection.reset(len(results))
+    return selection
+
+
+def test_select_all_matches_per_row(tmp_path):
+    results = _results(tmp_path)
+    bulk, per_row = _selection(results), _selection(results)
+    per_row.set(3, True)  # Уже выбранная строка не считается дважды
+    bulk.set(3, True)
+
+    bulk.select_all(results.live_mask(), results.size_column())
+    per_row.set_rows(results.rows(), True)
+
+    assert (bulk.count, bulk.total) == (per_row.count, per_row.total)
+    assert bulk.bits == per_row.bits
+    assert bulk.count == results.live_count == 199
+    assert not bulk.is_selected(17)
+
+    bulk.set(201, False)  # Дальше выбор меняется по одной строке, как обычно
+    assert bulk.total == per_row.total - 7
+    bulk.clear()
+    assert (bulk.count, bulk.total, bulk.selected_rows()) == (0, 0, [])
+
+
+def test_size_column_follows_changes(tmp_path):
+    results = _results(tmp_path)
+
+    sizes = results.size_column()
+    assert list(sizes) == [results.size(row) for row in range(len(results))]
+
+    results.update(201, {'type': 'file', 'size': 8})
+    results.extend([('/new/c', {'type': 'file', 'size': 9})])
+    assert results.size_column() is sizes
+    assert list(sizes) == [results.size(row) for row in range(len(results))]
+
+
+def test_snapshot_size_column(tmp_path):
+    items_path, dirs_path = str(tmp_path / 'items.snap'), str(tmp_path / 'dirs.snap')
+    write_items_snapshot({'/a': {'type': 'file', 'size': 5}, '/b': {'type': 'file', 'size': 9}}, items_path)
+    write_dirs_snapshot(DirIndex.from_entries([('/r/a', 4, 4), ('/r', 1, 5)]), dirs_path)
+
+    with Snapshot(items_path) as items, Snapshot(dirs_path) as dirs:
+        assert list(items.size_column()) == [9, 5]
+        assert list(dirs.size_column()) == [dirs.size(i) for i in range(len(dirs))] == [5, 4]
@@ -0,0 +1,154 @@
+import os
+import struct
+
+import pytest
+
+from cleaner import snapshot as snapshot_module
+from cleaner.core import DirIndex
+from cleaner.snapshot import (
+    Snapshot, SnapshotDirIndex, write_items_snapshot, write_dirs_snapshot, open_snapshot, current_snapshot,
+    retain_snapshot, KIND_ITEMS, KIND_DIRS
+)
+
+ITEMS = {
+    '/home/u/.cache/pip': {'type': 'trash_dir', 'size': 5000, 'apparent_size': 4800, 'count': 12,
+                           'category': 'Мусор (Кэш)', 'last_scan': 1700000000.5},
+    '/home/u/Downloads/old.iso': {'type': 'file', 'size': 700, 'apparent_size': 690, 'count': 1,
+                                  'category': 'Старый файл', 'last_scan': 1700000001.0},
+    '/home/u/проект/журнал.log': {'type': 'trash_file', 'size': 30, 'apparent_size': 30, 'count': 1,
+                                  'category': 'Мусор (Файл/Лог)', 'last_scan': 1700000002.0},
+}
+
+
+def test_items_round_trip(tmp_path):
+    path = str(tmp_path / 'items.snap')
+    assert write_items_snapshot(ITEMS, path) == len(ITEMS)
+
+    with Snapshot(path) as snapshot:
+        assert snapshot.kind == KIND_ITEMS
+        assert dict(snapshot.items()) == ITEMS
+        # Строки - по убыванию размера, порядок путей - по возрастанию
+        assert [snapshot.size(i) for i in range(len(snapshot))] == [5000, 700, 30]
+        assert [blob.decode() for blob, _ in snapshot.iter_sorted()] == sorted(ITEMS)
+        for item_path in ITEMS:
+            assert snapshot.path(snapshot.find(item_path)) == item_path
+        assert snapshot.find('/home/u/нет') is None
+
+
+def test_undecodable_path_round_trip(tmp_path):
+    path = str(tmp_path / 'items.snap')
+    odd = '/home/u/\udcff.bin'  # Имя файла не в UTF-8 (surrogateescape)
+    write_items_snapshot({odd: {'type': 'file', 'size': 1, 'category': 'Старый файл'}}, path)
+    with Snapshot(path) as snapshot:
+        assert snapshot.path(0) == odd
+
+
+def _dir_index():
+    return DirIndex.from_entries([
+        ('/r', 1, 111), ('/r/a', 10, 10), ('/r/b', 20, 100), ('/r/b/c', 80, 80), ('/other', 5, 5),
+    ])
+
+
+def test_dirs_round_trip_as_index(tmp_path):
+    index = _dir_index()
+    path = str(tmp_path / 'dirs.snap')
+    write_dirs_snapshot(index, path)
+
+    with Snapshot(path) as snapshot:
+        assert snapshot.kind == KIND_DIRS
+        view = SnapshotDirIndex(snapshot)
+        assert sorted(view.live_entries()) == sorted(index.live_entries())
+        assert [view.paths[i] for i in view.roots] == [index.paths[i] for i in index.roots]
+        for node_path, node_id in index.ids.items():
+            row = view.ids[node_path]
+            assert view.total_sizes[row] == index.total_sizes[node_id]
+            assert [view.paths[i] for i in view.children_of(row)] == \
+                   [index.paths[i] for i in index.children_of(node_id)]
+            parent = index.parents[node_id]
+            assert (view.parents[row] == -1) == (parent == -1)
+        assert '/r/zzz' not in view.ids
+
+
+def test_removed_dirs_are_not_written(tmp_path):
+    index = _dir_index()
+    index.remove_dir('/r/b')
+    path = str(tmp_path / 'dirs.snap')
+    write_dirs_snapshot(index, path)
+    with Snapshot(path) as snapshot:
+        assert sorted(p for p, _, _ in snapshot.dir_entries()) == ['/other', '/r', '/r/a']
+
+
+def test_truncated_snapshot_is_rejected(tmp_path):
+    path = tmp_path / 'items.snap'
+    write_items_snapshot(ITEMS, str(path))
+    path.write_bytes(path.read_bytes()[:-10])
+    with pytest.raises(ValueError):
+        Snapshot(str(path))
+    assert open_snapshot(str(path)) is None
+
+
+def _mapped_files_are_locked(monkeypatch, locked):
+    """Как на Windows: файл, который держит открытым mmap, нельзя заменить через os.replace."""
+    replace = os.replace
+
+    def windows_replace(src, dst):
+        if os.path.abspath(dst) in locked:
+            raise PermissionError(13, 'The process cannot access the file', dst)
+        return replace(src, dst)
+    monkeypatch.setattr(snapshot_module.os, 'replace', windows_replace)
+
+
+def test_write_while_mapped_creates_version(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cleaner_cache.snap')
+    write_items_snapshot(ITEMS, path)
+    locked = {path}
+    _mapped_files_are_locked(monkeypatch, locked)
+
+    with Snapshot(path) as mapped:
+        newer = dict(ITEMS, **{'/home/u/new.bin': {'type': 'file', 'size': 9000, 'category': 'Старый файл'}})
+        write_items_snapshot(newer, path)
+
+        current = current_snapshot(path)
+        assert current != path and current.startswith(path + '.')
+        assert len(mapped) == 3  # Открытый снимок не изменился
+        reopened = open_snapshot(path)
+        with reopened:
+            assert reopened.path(0) == '/home/u/new.bin'
+
+        retained = retain_snapshot(path, str(tmp_path / 'history'), 'items', 5)
+        with Snapshot(retained) as kept:
+            assert len(kept) == 4
+
+    # Окно закрыто: следующая запись снова заменяет path, версии убираются
+    locked.clear()
+    write_items_snapshot(ITEMS, path)
+    assert sorted(os.listdir(tmp_path)) == ['cleaner_cache.snap', 'history']
+    assert current_snapshot(path) == path
+
+
+def test_write_uses_unique_tmp_name(tmp_path):
+    path = str(tmp_path / 'items.snap')
+    foreign = tmp_path / 'items.snap.tmp'
+    foreign.write_bytes(b'another writer')
+
+    write_items_snapshot(ITEMS, path)
+
+    assert foreign.read_bytes() == b'another writer'
+    assert sorted(os.listdir(tmp_path)) == ['items.snap', 'items.snap.tmp']
+
+
+def test_failed_write_leaves_no_tmp(tmp_path):
+    path = str(tmp_path / 'items.snap')
+    write_items_snapshot(ITEMS, path)
+
+    with pytest.raises(struct.error):
+        write_items_snapshot({'/x': {'type': 'file', 'size': 1 << 70}}, path)
+
+    assert os.listdir(tmp_path) == ['items.snap']
+    with Snapshot(path) as snapshot:
+        assert len(snapshot) == 3
+
+
+def test_open_snapshot_missing(tmp_path):
+    assert open_snapshot(str(tmp_path / 'none.snap')) is None
+    assert current_snapshot(str(tmp_path / 'none.snap')) is None
@@ -0,0 +1,103 @@
+import os
+import random
+
+import pytest
+
+from cleaner import scanner
+from cleaner.stats import StatBatch
+
+DAY = 86400
+NOW = 1_700_000_000
+
+
+def _stat(size, atime, mtime, ctime):
+    return os.stat_result((0o100644, 1, 1, 1, 0, 0, size, int(atime), int(mtime), int(ctime)),
+                          {'st_atime': atime, 'st_mtime': mtime, 'st_ctime': ctime, 'st_blocks': (size + 511) // 512})
+
+
+# Меньше и больше NUMPY_MIN_BATCH: ветка NumPy проверяется, только если он установлен
+@pytest.mark.parametrize('count', [10, 300])
+def test_count_older_matches_classify(count):
+    rng = random.Random(count)
+    batch = StatBatch()
+    for i in range(count):
+        times = [NOW - rng.randrange(0, 400) * DAY + rng.random() for _ in range(3)]
+        batch.add(f'f{i}', _stat(rng.randrange(0, 1 << 20), *times))
+
+    thresholds = [NOW - days * DAY for days in (-1, 0, 1, 7, 30, 90, 180, 365, 401)]
+    thresholds += [batch.ages[0], batch.ages[count // 2]]  # Порог ровно на возрасте файла
+    for threshold in thresholds:
+        old_ids, old_size = batch.classify(threshold)
+        assert batch.count_older(threshold) == (len(old_ids), old_size)
+
+
+def test_add_uses_latest_time():
+    batch = StatBatch()
+    batch.add('a', _stat(10, NOW - 5 * DAY, NOW - 9 * DAY, NOW - 7 * DAY))
+    assert batch.ages[0] == NOW - 5 * DAY
+    assert batch.classify(NOW - 6 * DAY) == ([], 0)
+    assert batch.classify(NOW - 4 * DAY) == ([0], 512)
+
+
+def test_empty_batch():
+    batch = StatBatch()
+    assert batch.classify(NOW) == ([], 0)
+    assert batch.count_older(NOW) == (0, 0)
+
+
+@pytest.fixture
+def aged_tree(tmp_path, monkeypatch):
+    """Дерево с файлами разного возраста; ctime подменяется на mtime, иначе все файлы "новые"."""
+    rng = random.Random(1)
+    root = tmp_path / 'old'
+    for d in ('', 'a', 'a/b', 'a/b/c', 'd'):
+        directory = root / d
+        directory.mkdir(parents=True, exist_ok=True)
+        for i in range(rng.randrange(1, 12)):
+            path = directory / f'f{i}.dat'
+            path.write_bytes(b'x' * rng.randrange(0, 20000))
+            when = NOW - rng.randrange(0, 400) * DAY
+            os.utime(path, (when, when))
+
+    lstat = os.lstat
+
+    def aged_lstat(path):
+        st = lstat(path)
+        return os.stat_result(tuple(st)[:10], {'st_atime': st.st_atime, 'st_mtime': st.st_mtime,
+                                               'st_ctime': st.st_mtime, 'st_blocks': st.st_blocks})
+    monkeypatch.setattr(scanner.os, 'lstat', aged_lstat)
+    return str(root)
+
+
+def _counts(tree):
+    return {path: (node['old_count'], node['old_size'], node['total_old_count']) for path, node in tree.items()}
+
+
+def test_reclassify_matches_rescan(aged_tree):
+    tree = {}
+    assert scanner._walk_old_tree(aged_tree, NOW - 30 * DAY, tree)
+    assert len(tree) == 5
+
+    seen_totals = set()
+    for days in (0, 1, 60, 180, 365, 1000, -1):
+        threshold = NOW - days * DAY
+        scanner._reclassify_old_tree(tree, threshold)
+        fresh = {}
+        scanner._walk_old_tree(aged_tree, threshold, fresh)
+        assert _counts(tree) == _counts(fresh), days
+        seen_totals.add(tree[aged_tree]['total_old_count'])
+    assert len(seen_totals) > 3  # Пороги действительно меняют классификацию
+
+
+def test_reclassify_does_not_rely_on_insertion_order(aged_tree):
+    walked = {}
+    scanner._walk_old_tree(aged_tree, NOW - 30 * DAY, walked)
+    # Как при повторном обходе папки из следующей scan_folders: родители раньше подпапок
+    tree = dict(sorted(walked.items()))
+    assert next(iter(tree)) == aged_tree
+
+    threshold = NOW - 180 * DAY
+    scanner._reclassify_old_tree(tree, threshold)
+    fresh = {}
+    scanner._walk_old_tree(aged_tree, threshold, fresh)
+    assert _counts(tree) == _counts(fresh)